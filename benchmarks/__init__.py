@@ -0,0 +1,15 @@
+"""Performance benchmarks for pyvat.
+
+The benchmarks are not part of the distributed package. Run the benchmark
+suite of pyvat's hot paths from the repository root, optionally saving or
+comparing against a JSON baseline or profiling, see ``--help``::
+
+   python -m benchmarks
+   python -m benchmarks --save baseline.json
+   python -m benchmarks --compare baseline.json
+
+Comparative benchmarks of individual implementation choices are run as
+modules, e.g.::
+
+   python -m benchmarks.vat_rates
+"""
@@ -0,0 +1,194 @@
+"""Benchmark suite runner.
+
+Runs the benchmarks of :mod:`benchmarks.suite` from the repository root::
+
+   python -m benchmarks
+   python -m benchmarks --save baseline.json
+   python -m benchmarks --compare baseline.json
+   python -m benchmarks --profile suite.prof get_sale_vat_charge
+
+Results can be saved as a JSON baseline, against which later runs are
+compared, exiting with status 1 if any benchmark regressed by more than the
+tolerance. Profiles are written in :mod:`pstats` format.
+"""
+
+import argparse
+import cProfile
+import json
+import platform
+import pstats
+import sys
+import timeit
+
+import pyvat
+
+from .suite import make_benchmarks
+
+
+MIN_TIME = 0.2
+"""Minimum number of seconds a single measurement of a benchmark takes.
+"""
+
+
+REPEAT = 5
+"""Number of measurements of which the best is reported.
+"""
+
+
+def measure(benchmark, min_time=MIN_TIME, repeat=REPEAT):
+    """Measure a benchmark.
+
+    :param benchmark: Benchmark.
+    :type benchmark: benchmarks.suite.Benchmark
+    :param min_time: Minimum number of seconds a single measurement takes.
+    :param repeat: Number of measurements.
+    :returns: the best time in nanoseconds per operation.
+    :rtype: float
+    """
+
+    timer = timeit.Timer(benchmark.run)
+
+    # Calibrate the number of batches per measurement.
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+
+    best = min(timer.repeat(number=number, repeat=repeat))
+    return best / (number * benchmark.operations) * 1e9
+
+
+def profile(benchmarks, path, min_time=MIN_TIME):
+    """Profile benchmarks.
+
+    :param benchmarks: Benchmarks.
+    :param path: Path of the profile to write.
+    :param min_time: Minimum number of seconds every benchmark is run.
+    """
+
+    profiler = cProfile.Profile()
+    for benchmark in benchmarks:
+        timer = timeit.Timer(benchmark.run)
+        number = 1
+        while timer.timeit(number) < min_time:
+            number *= 2
+
+        profiler.enable()
+        for _ in range(number):
+            benchmark.run()
+        profiler.disable()
+
+    profiler.dump_stats(path)
+    pstats.Stats(path).sort_stats('tottime').print_stats(20)
+
+
+def load_baseline(path):
+    """Load baseline results.
+
+    :returns: a :class:`dict` mapping benchmark names to ns per operation.
+    """
+
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def save_baseline(path, results):
+    """Save results as a baseline.
+
+    :param results:
+        :class:`dict` mapping benchmark names to ns per operation.
+    """
+
+    with open(path, 'w') as f:
+        json.dump({
+            'pyvat': pyvat.__version__,
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'results': results,
+        }, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='Run pyvat benchmarks.')
+    parser.add_argument('names',
+                        nargs='*',
+                        metavar='NAME',
+                        help='run only benchmarks whose name starts with '
+                             'any of the given names')
+    parser.add_argument('--list',
+                        action='store_true',
+                        help='list the benchmarks and exit')
+    parser.add_argument('--save',
+                        metavar='PATH',
+                        help='save the results as a JSON baseline')
+    parser.add_argument('--compare',
+                        metavar='PATH',
+                        help='compare the results to a JSON baseline')
+    parser.add_argument('--tolerance',
+                        type=float,
+                        default=0.2,
+                        help='relative slowdown against the baseline '
+                             'tolerated before failing (default: 0.2)')
+    parser.add_argument('--profile',
+                        metavar='PATH',
+                        help='profile the benchmarks instead of timing them '
+                             'and write the profile to PATH')
+    parser.add_argument('--min-time',
+                        type=float,
+                        default=MIN_TIME,
+                        help='minimum seconds per measurement (default: '
+                             '%(default)s)')
+    options = parser.parse_args(args)
+
+    benchmarks = [benchmark for benchmark in make_benchmarks()
+                  if not options.names or
+                  any(benchmark.name.startswith(name)
+                      for name in options.names)]
+
+    if options.list:
+        for benchmark in benchmarks:
+            print('%-40s %s' % (benchmark.name, benchmark.description))
+        return 0
+
+    if options.profile:
+        profile(benchmarks, options.profile, options.min_time)
+        return 0
+
+    baseline = load_baseline(options.compare) if options.compare else {}
+
+    print('%-40s %12s %12s %8s' % ('benchmark', 'ns/op', 'baseline',
+                                   'change'))
+
+    results = {}
+    regressions = []
+    for benchmark in benchmarks:
+        result = measure(benchmark, options.min_time)
+        results[benchmark.name] = result
+
+        if benchmark.name in baseline:
+            change = result / baseline[benchmark.name] - 1
+            if change > options.tolerance:
+                regressions.append(benchmark.name)
+            print('%-40s %12.0f %12.0f %+7.1f%%' % (
+                benchmark.name, result, baseline[benchmark.name],
+                change * 100,
+            ))
+        else:
+            print('%-40s %12.0f %12s %8s' % (benchmark.name, result, '-', '-'))
+        sys.stdout.flush()
+
+    if options.save:
+        save_baseline(options.save, results)
+
+    if regressions:
+        print('regressed by more than %.0f%%: %s' % (
+            options.tolerance * 100, ', '.join(regressions),
+        ))
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
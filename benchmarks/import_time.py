@@ -0,0 +1,79 @@
+"""Benchmark of the time taken to ``import pyvat``.
+
+Every measurement imports pyvat in a fresh interpreter, so the results reflect
+the cold start cost paid by short lived processes. Also reports which of the
+dependencies only needed for registry checks or unknown country code lookups
+were imported anyway.
+"""
+
+import subprocess
+import sys
+
+
+DEFERRED_MODULES = ('requests', 'pycountry', 'asyncio', 'aiohttp',
+                    'concurrent.futures')
+"""Modules that should only be imported once actually needed.
+"""
+
+
+IMPORTS = 20
+"""Number of fresh interpreter imports measured.
+"""
+
+
+MEASURE_SCRIPT = '''
+import sys
+import time
+baseline = set(sys.modules)
+start = time.time()
+import pyvat
+elapsed = time.time() - start
+print(elapsed)
+print(' '.join(sorted(name for name in %r
+                      if name in sys.modules and name not in baseline)))
+''' % (DEFERRED_MODULES, )
+"""Script measuring a single import in a fresh interpreter.
+"""
+
+
+def measure_import():
+    """Measure importing pyvat in a fresh interpreter.
+
+    :returns:
+        a ``(seconds, imported deferred modules)`` tuple, where the imported
+        modules exclude any the interpreter had already loaded on startup.
+    """
+
+    output = subprocess.check_output([sys.executable, '-c', MEASURE_SCRIPT])
+    elapsed, modules = output.decode('utf-8').split('\n')[:2]
+    return float(elapsed), modules.split()
+
+
+def run():
+    """Run the benchmark.
+
+    :returns:
+        a ``(best ms, median ms, imported deferred modules)`` tuple.
+    """
+
+    timings = []
+    modules = set()
+    for _ in range(IMPORTS):
+        elapsed, imported = measure_import()
+        timings.append(elapsed * 1e3)
+        modules.update(imported)
+
+    timings.sort()
+    return timings[0], timings[len(timings) // 2], sorted(modules)
+
+
+def main():
+    best, median, modules = run()
+    print('%-10s %10s' % ('import', 'ms'))
+    print('%-10s %10.1f' % ('best', best))
+    print('%-10s %10.1f' % ('median', median))
+    print('deferred modules imported: %s' % (', '.join(modules) or 'none'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""Benchmark suite of pyvat's hot paths.
+
+Every benchmark performs a batch of operations over representative inputs, and
+is reported in nanoseconds per operation by :mod:`benchmarks.__main__`.
+"""
+
+import datetime
+
+from pyvat import (
+    are_vat_number_formats_valid,
+    decompose_vat_number,
+    get_sale_vat_charge,
+    is_vat_number_format_valid,
+    ItemType,
+    Party,
+    VatNumberCheckResult,
+)
+from pyvat.countries import EU_COUNTRY_CODES
+from pyvat.exceptions import ServerError
+from pyvat.registries import ViesRegistry
+from pyvat.vat_rules import SALE_VAT_CHARGES, VAT_RULES
+
+from .vies_parsing import load_payloads
+
+
+VAT_NUMBERS = [
+    'ATU13585627',
+    'BE0472429986',
+    'BG175074752',
+    'CY10259033P',
+    'CZ25123891',
+    'DE 111 111 125',
+    'DK13585628',
+    'DK-1358-5627',
+    'EE100931558',
+    'ESB58378431',
+    'ESX2482300W',
+    'FI20774740',
+    'FR40303265045',
+    'GB980780684',
+    'EL094259216',
+    'HR33392005961',
+    'HU12892312',
+    'IE6433435F',
+    'IT00743110157',
+    'LT119511515',
+    'LU15027442',
+    'LV40003521600',
+    'MT11679112',
+    'NL043133502B02',
+    'PL8567346215',
+    'PT501964843',
+    'RO18547290',
+    'SE123456789701',
+    'SI50223054',
+    'SK2022749619',
+    'NO123456789MVA',
+    'XX345678901',
+    '13585628',
+    '',
+]
+"""VAT numbers from every EU country along with invalid and unprefixed ones.
+"""
+
+
+SALE_DATES = [datetime.date(year, month, 1)
+              for year in range(2021, 2026)
+              for month in (1, 4, 7, 10)]
+"""Quarterly sale dates since all EU countries' rates are known.
+"""
+
+
+ELECTRONIC_ITEM_TYPES = [item_type for item_type in ItemType
+                         if not item_type.is_physical_good]
+"""Item types for which VAT charges can be determined.
+"""
+
+
+class Benchmark(object):
+    """Benchmark of a hot path.
+
+    :ivar name: Name of the benchmark.
+    :ivar description: Description of the benchmark.
+    :ivar run: Callable performing a batch of operations.
+    :ivar operations: Number of operations in a batch.
+    """
+
+    def __init__(self, name, description, run, operations):
+        self.name = name
+        self.description = description
+        self.run = run
+        self.operations = operations
+
+
+def make_decompose_benchmark():
+    def run():
+        for vat_number in VAT_NUMBERS:
+            decompose_vat_number(vat_number)
+
+    return Benchmark('decompose_vat_number',
+                     'decompose_vat_number(..) of mixed VAT numbers',
+                     run,
+                     len(VAT_NUMBERS))
+
+
+def make_format_benchmark():
+    def run():
+        for vat_number in VAT_NUMBERS:
+            is_vat_number_format_valid(vat_number)
+
+    return Benchmark('is_vat_number_format_valid',
+                     'is_vat_number_format_valid(..) of mixed VAT numbers',
+                     run,
+                     len(VAT_NUMBERS))
+
+
+def make_bulk_format_benchmark():
+    vat_numbers = VAT_NUMBERS * 100
+
+    def run():
+        are_vat_number_formats_valid(vat_numbers)
+
+    return Benchmark('are_vat_number_formats_valid',
+                     'are_vat_number_formats_valid([..]) of mixed VAT numbers',
+                     run,
+                     len(vat_numbers))
+
+
+def make_sales():
+    """Make sales between all EU countries on all sale dates.
+
+    Sales for which no VAT charge can be determined are left out.
+
+    :returns: a list of ``(date, item type, buyer, seller)`` tuples.
+    """
+
+    sales = []
+    for buyer_country_code in sorted(EU_COUNTRY_CODES):
+        for seller_country_code in sorted(EU_COUNTRY_CODES):
+            for buyer_is_business in (False, True):
+                buyer = Party.of(buyer_country_code, buyer_is_business)
+                seller = Party.of(seller_country_code, True)
+                for date in SALE_DATES:
+                    for item_type in ELECTRONIC_ITEM_TYPES:
+                        try:
+                            get_sale_vat_charge(date, item_type, buyer, seller)
+                        except (NotImplementedError, ValueError):
+                            continue
+                        sales.append((date, item_type, buyer, seller))
+    return sales
+
+
+def make_sale_benchmarks():
+    sales = make_sales()
+
+    def run_memoized():
+        for date, item_type, buyer, seller in sales:
+            get_sale_vat_charge(date, item_type, buyer, seller)
+
+    def run_unmemoized():
+        for date, item_type, buyer, seller in sales:
+            SALE_VAT_CHARGES.clear()
+            get_sale_vat_charge(date, item_type, buyer, seller)
+
+    return [
+        Benchmark('get_sale_vat_charge',
+                  'get_sale_vat_charge(..) of memoized sales between all EU '
+                  'countries',
+                  run_memoized,
+                  len(sales)),
+        Benchmark('get_sale_vat_charge.unmemoized',
+                  'get_sale_vat_charge(..) of sales between all EU countries '
+                  'without memoization',
+                  run_unmemoized,
+                  len(sales)),
+    ]
+
+
+def make_vat_rate_benchmark():
+    lookups = []
+    for _, rule in sorted(VAT_RULES.items()):
+        for item_type in ItemType:
+            for date in SALE_DATES:
+                try:
+                    rule.get_vat_rate(item_type, date)
+                except ValueError:
+                    continue
+                lookups.append((rule, item_type, date))
+
+    def run():
+        for rule, item_type, date in lookups:
+            rule.get_vat_rate(item_type, date)
+
+    return Benchmark('EuVatRateRule.get_vat_rate',
+                     'EuVatRateRule.get_vat_rate(..) of all EU countries',
+                     run,
+                     len(lookups))
+
+
+def make_vies_parsing_benchmarks():
+    registry = ViesRegistry()
+
+    benchmarks = []
+    for name, content in sorted(load_payloads().items()):
+        def run(content=content):
+            try:
+                registry._parse_response(VatNumberCheckResult(),
+                                         200,
+                                         'text/xml; charset=UTF-8',
+                                         content)
+            except ServerError:
+                pass
+
+        benchmarks.append(Benchmark(
+            'ViesRegistry._parse_response.%s' % (name, ),
+            'ViesRegistry._parse_response(..) of the recorded %s response' %
+            (name, ),
+            run,
+            1,
+        ))
+    return benchmarks
+
+
+def make_benchmarks():
+    """Make the benchmarks of the suite.
+
+    :returns: a list of :class:`Benchmark` instances.
+    """
+
+    return [
+        make_decompose_benchmark(),
+        make_format_benchmark(),
+        make_bulk_format_benchmark(),
+    ] + make_sale_benchmarks() + [
+        make_vat_rate_benchmark(),
+    ] + make_vies_parsing_benchmarks()
@@ -0,0 +1,105 @@
+"""Benchmark of :meth:`pyvat.vat_rules.EuVatRateRule.get_vat_rate`.
+
+Measures the cost of a rate lookup as the number of historic rate periods for
+a country grows, comparing the indexed rate timeline against the linear scan
+over all rate periods it replaced.
+"""
+
+import datetime
+import timeit
+from decimal import Decimal
+
+from pyvat.item_type import ItemType
+from pyvat.vat_rules import EuVatRateRule
+
+
+PERIOD_COUNTS = (1, 10, 100, 1000)
+"""Numbers of rate periods to benchmark.
+"""
+
+
+LOOKUPS = 20000
+"""Number of lookups per measurement.
+"""
+
+
+def make_vat_rates(period_count):
+    """Make synthetic rate periods for a country.
+
+    :param period_count: Number of rate periods.
+    :returns: a list of rate periods with monthly ``valid_from`` dates.
+    """
+
+    vat_rates = []
+    for i in range(period_count):
+        year, month = divmod(i, 12)
+        vat_rates.append({
+            'valid_from': datetime.date(1990 + year, month + 1, 1),
+            'rates': dict((item_type, Decimal(i % 25))
+                          for item_type in ItemType),
+        })
+    return vat_rates
+
+
+def get_vat_rate_linear(vat_rates, item_type, date):
+    """Look up a VAT rate by scanning all rate periods.
+    """
+
+    rates = None
+    for item in vat_rates:
+        if date >= item['valid_from'] and \
+           not rates:
+            rates = item
+        if date >= item['valid_from'] and \
+           rates and rates['valid_from'] < item['valid_from']:
+            rates = item
+    if not rates:
+        raise ValueError('`date` is invalid, date: ', date)
+    for category in rates['rates']:
+        if category == item_type:
+            return rates['rates'][category]
+    raise ValueError('`item_type` is invalid, item_type: ', item_type)
+
+
+def run():
+    """Run the benchmark.
+
+    :returns:
+        a list of ``(period count, linear ns per lookup, indexed ns per
+        lookup)`` tuples.
+    """
+
+    item_type = ItemType.enewspaper
+    date = datetime.date(2100, 1, 1)
+    rows = []
+
+    for period_count in PERIOD_COUNTS:
+        vat_rates = make_vat_rates(period_count)
+        rule = EuVatRateRule(vat_rates)
+
+        linear = min(timeit.repeat(
+            lambda: get_vat_rate_linear(vat_rates, item_type, date),
+            number=LOOKUPS,
+            repeat=3,
+        ))
+        indexed = min(timeit.repeat(
+            lambda: rule.get_vat_rate(item_type, date),
+            number=LOOKUPS,
+            repeat=3,
+        ))
+
+        rows.append((period_count,
+                     linear / LOOKUPS * 1e9,
+                     indexed / LOOKUPS * 1e9))
+
+    return rows
+
+
+def main():
+    print('%8s %16s %16s' % ('periods', 'linear ns/op', 'indexed ns/op'))
+    for period_count, linear, indexed in run():
+        print('%8d %16.0f %16.0f' % (period_count, linear, indexed))
+
+
+if __name__ == '__main__':
+    main()
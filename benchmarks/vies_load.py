@@ -0,0 +1,349 @@
+"""Load generator for VIES registry checks.
+
+Drives :func:`pyvat.check_vat_number` at a target rate and reports the
+throughput, latency percentiles and outcomes of the checks. Unless the URL of
+a running VIES stand-in is given, a stand-in is started in the process, so the
+load test runs fully offline::
+
+   python -m benchmarks.vies_load --rate 200 --duration 10 \\
+       --latency lognormal:80,0.5 --fault MS_MAX_CONCURRENT_REQ=0.05
+
+Requests are sent on a fixed schedule regardless of how fast earlier requests
+complete, and latencies are measured from the time a request was scheduled,
+so queueing delays caused by a slow service are included in the latencies.
+"""
+
+import argparse
+import collections
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pyvat
+from pyvat.circuit_breaker import CircuitBreaker
+from pyvat.exceptions import ServerError
+from pyvat.rate_limiter import RateLimiter
+from pyvat.retry import HedgingPolicy, RetryPolicy
+
+from .vies_server import add_server_arguments, make_server
+
+
+PERCENTILES = (50, 90, 99, 99.9)
+"""Reported latency percentiles.
+"""
+
+
+def make_vat_numbers(country_code, count, seed=None):
+    """Make distinct VAT numbers with a valid format.
+
+    :param country_code: Country code of the VAT numbers.
+    :param count: Number of VAT numbers.
+    :param seed: Optional seed of the random number generator.
+    :returns: a list of VAT numbers prefixed with the country code.
+    :raises ValueError:
+        if VAT numbers for the country cannot be made of digits alone.
+    """
+
+    rng = random.Random(seed)
+    vat_numbers = set()
+    attempts = 0
+    while len(vat_numbers) < count:
+        attempts += 1
+        if attempts > count * 1000:
+            raise ValueError('unable to make VAT numbers for %s' %
+                             (country_code, ))
+
+        vat_number = '%s%0*d' % (country_code,
+                                 rng.choice((8, 9, 10, 11, 12)),
+                                 rng.randrange(10 ** 7, 10 ** 8))
+        if pyvat.is_vat_number_format_valid(vat_number):
+            vat_numbers.add(vat_number)
+
+    return sorted(vat_numbers)
+
+
+def percentile(values, percent):
+    """Get a percentile of sorted values by the nearest rank method.
+    """
+
+    if not values:
+        return None
+    rank = max(0, int(round(percent / 100.0 * len(values) + 0.5)) - 1)
+    return values[min(rank, len(values) - 1)]
+
+
+class LoadReport(object):
+    """Outcome of a load test.
+
+    :ivar latencies:
+        Latencies in seconds measured from the time the checks were
+        scheduled.
+    :ivar service_times:
+        Latencies in seconds measured from the time the checks were started.
+    :ivar outcomes: Counter of check outcomes.
+    """
+
+    def __init__(self):
+        self.latencies = []
+        self.service_times = []
+        self.outcomes = collections.Counter()
+        self.started = None
+        self.finished = None
+
+        self._lock = threading.Lock()
+
+    def add(self, scheduled, started, finished, outcome):
+        with self._lock:
+            self.latencies.append(finished - scheduled)
+            self.service_times.append(finished - started)
+            self.outcomes[outcome] += 1
+            self.finished = max(self.finished or finished, finished)
+
+    def summarize(self, rate):
+        """Summarize the load test.
+
+        :param rate: Target rate.
+        :rtype: dict
+        """
+
+        latencies = sorted(self.latencies)
+        service_times = sorted(self.service_times)
+        elapsed = (self.finished or self.started) - self.started
+
+        return {
+            'target_rate': rate,
+            'requests': len(latencies),
+            'elapsed': elapsed,
+            'throughput': len(latencies) / elapsed if elapsed else None,
+            'latency_ms': dict(
+                ('p%s' % (p, ), percentile(latencies, p) * 1000.0)
+                for p in PERCENTILES
+            ) if latencies else {},
+            'latency_max_ms': latencies[-1] * 1000.0 if latencies else None,
+            'service_time_ms': dict(
+                ('p%s' % (p, ), percentile(service_times, p) * 1000.0)
+                for p in PERCENTILES
+            ) if service_times else {},
+            'outcomes': dict(self.outcomes),
+        }
+
+
+def check(vat_number, scheduled, report):
+    """Check a VAT number and add the outcome to the report.
+    """
+
+    started = time.time()
+    try:
+        result = pyvat.check_vat_number(vat_number)
+        rejections = [event.name for event in result.log_events
+                      if event.name in ('circuit_open', 'rate_limited')]
+        if rejections:
+            outcome = rejections[0]
+        else:
+            outcome = {True: 'valid',
+                       False: 'invalid',
+                       None: 'nondeterministic'}[result.is_valid]
+    except ServerError as e:
+        outcome = 'fault:%s' % (e.fault_code, )
+    except Exception as e:
+        outcome = 'exception:%s' % (type(e).__name__, )
+    report.add(scheduled, started, time.time(), outcome)
+
+
+def run(url,
+        rate,
+        duration,
+        vat_numbers,
+        workers,
+        circuit_breaker=None,
+        coalesce=True,
+        rate_limiter=None,
+        retry_policy=None,
+        hedging_policy=None):
+    """Run a load test.
+
+    :param url: URL of the VAT checking service.
+    :param rate: Target rate of checks per second.
+    :param duration: Duration of the test in seconds.
+    :param vat_numbers: VAT numbers to check, cycled through.
+    :param workers: Maximum number of concurrent checks.
+    :param circuit_breaker: Optional circuit breaker of the registry.
+    :param coalesce: Whether concurrent checks of a VAT number are coalesced.
+    :param rate_limiter: Optional rate limiter of the registry.
+    :param retry_policy: Optional retry policy of the registry.
+    :param hedging_policy: Optional hedging policy of the registry.
+    :rtype: LoadReport
+    """
+
+    registry = pyvat.VIES_REGISTRY
+    registry.close()
+    registry.service_url = url
+    registry.pool_size = workers
+    registry.capture_bodies = False
+    registry.circuit_breaker = circuit_breaker
+    registry.coalesce = coalesce
+    registry.rate_limiter = rate_limiter
+    registry.retry_policy = retry_policy
+    registry.hedging_policy = hedging_policy
+
+    report = LoadReport()
+    count = int(rate * duration)
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        report.started = start = time.time()
+        for i in range(count):
+            scheduled = start + i / float(rate)
+            delay = scheduled - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(check,
+                            vat_numbers[i % len(vat_numbers)],
+                            scheduled,
+                            report)
+    finally:
+        executor.shutdown(wait=True)
+
+    return report
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.vies_load',
+                                     description='Load test VIES registry '
+                                                 'checks.')
+    parser.add_argument('--url',
+                        help='URL of a running VIES stand-in; by default a '
+                             'stand-in is started in the process')
+    parser.add_argument('--rate',
+                        type=float,
+                        default=100.0,
+                        help='target checks per second (default: 100)')
+    parser.add_argument('--duration',
+                        type=float,
+                        default=10.0,
+                        help='duration in seconds (default: 10)')
+    parser.add_argument('--workers',
+                        type=int,
+                        default=50,
+                        help='maximum concurrent checks (default: 50)')
+    parser.add_argument('--country',
+                        default='DK',
+                        help='country of the checked VAT numbers (default: '
+                             'DK)')
+    parser.add_argument('--distinct',
+                        type=int,
+                        default=1000,
+                        help='number of distinct VAT numbers checked '
+                             '(default: 1000)')
+    parser.add_argument('--circuit-breaker',
+                        action='store_true',
+                        help='check through a circuit breaker with default '
+                             'settings')
+    parser.add_argument('--no-coalesce',
+                        dest='coalesce',
+                        action='store_false',
+                        help='make a request for every check rather than '
+                             'sharing requests between concurrent checks of '
+                             'the same VAT number')
+    parser.add_argument('--rate-limit',
+                        type=float,
+                        metavar='RATE',
+                        help='limit requests to RATE per second in total')
+    parser.add_argument('--country-rate-limit',
+                        type=float,
+                        metavar='RATE',
+                        help='limit requests to RATE per second by country')
+    parser.add_argument('--max-queue',
+                        type=int,
+                        default=100,
+                        help='maximum checks waiting for the rate limiter '
+                             '(default: 100)')
+    parser.add_argument('--attempts',
+                        type=int,
+                        default=1,
+                        help='maximum attempts per check, retrying after '
+                             'transient faults, timeouts and exceptions '
+                             '(default: 1)')
+    parser.add_argument('--hedge',
+                        type=float,
+                        metavar='PERCENTILE',
+                        help='make a second request for checks taking longer '
+                             'than PERCENTILE of recent checks')
+    parser.add_argument('--json',
+                        metavar='PATH',
+                        help='write the report as JSON to PATH')
+    add_server_arguments(parser)
+    options = parser.parse_args(args)
+
+    try:
+        vat_numbers = make_vat_numbers(options.country,
+                                       options.distinct,
+                                       options.seed)
+    except ValueError as e:
+        parser.error(str(e))
+
+    rate_limiter = None
+    if options.rate_limit or options.country_rate_limit:
+        rate_limiter = RateLimiter(rate=options.rate_limit,
+                                   country_rate=options.country_rate_limit,
+                                   max_queue=options.max_queue)
+
+    server = None
+    url = options.url
+    if url is None:
+        try:
+            server = make_server(options).start()
+        except ValueError as e:
+            parser.error(str(e))
+        url = server.url
+
+    try:
+        report = run(url,
+                     options.rate,
+                     options.duration,
+                     vat_numbers,
+                     options.workers,
+                     CircuitBreaker() if options.circuit_breaker else None,
+                     options.coalesce,
+                     rate_limiter,
+                     RetryPolicy(max_attempts=options.attempts)
+                     if options.attempts > 1 else None,
+                     HedgingPolicy(percentile=options.hedge)
+                     if options.hedge else None)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    summary = report.summarize(options.rate)
+    if server is not None:
+        summary['service_requests'] = server.requests
+
+    print('target rate   %10.1f/s' % (summary['target_rate'], ))
+    print('throughput    %10.1f/s' % (summary['throughput'] or 0, ))
+    print('requests      %10d' % (summary['requests'], ))
+    if 'service_requests' in summary:
+        print('service reqs  %10d' % (summary['service_requests'], ))
+    for p in PERCENTILES:
+        name = 'p%s' % (p, )
+        print('latency %-5s %10.1f ms (service time %.1f ms)' % (
+            name, summary['latency_ms'].get(name, 0),
+            summary['service_time_ms'].get(name, 0),
+        ))
+    print('latency max   %10.1f ms' % (summary['latency_max_ms'] or 0, ))
+    for outcome, count in sorted(summary['outcomes'].items()):
+        print('%-30s %8d' % (outcome, count))
+
+    if options.json:
+        with open(options.json, 'w') as f:
+            json.dump(summary, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
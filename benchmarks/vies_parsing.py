@@ -0,0 +1,140 @@
+"""Benchmark of VIES ``checkVat`` SOAP response parsing.
+
+Compares :func:`pyvat.xml_utils.parse_check_vat_response`, which parses the raw
+response bytes in a single streaming pass, against building a
+:mod:`xml.dom.minidom` document from the decoded and re-encoded response text
+and walking it.
+"""
+
+import os
+import timeit
+import xml.dom.minidom
+
+from pyvat.exceptions import ServerError
+from pyvat.xml_utils import (
+    get_first_child_element,
+    get_text,
+    NodeNotFoundError,
+    parse_check_vat_response,
+)
+
+
+PAYLOADS_PATH = os.path.join(os.path.dirname(__file__), 'payloads')
+"""Path of the recorded VIES response payloads.
+"""
+
+
+PARSES = 20000
+"""Number of parses per measurement.
+"""
+
+
+def load_payloads():
+    """Load the recorded VIES response payloads.
+
+    :returns: a :class:`dict` mapping payload names to raw response bodies.
+    """
+
+    payloads = {}
+    for filename in sorted(os.listdir(PAYLOADS_PATH)):
+        name, extension = os.path.splitext(filename)
+        if extension == '.xml':
+            with open(os.path.join(PAYLOADS_PATH, filename), 'rb') as f:
+                payloads[name] = f.read()
+    return payloads
+
+
+def parse_with_minidom(content):
+    """Parse a response by walking a :mod:`xml.dom.minidom` document.
+
+    :returns: a ``(valid, name, address)`` tuple of the response text.
+    :raises ServerError: if the response is a SOAP fault.
+    :raises NodeNotFoundError: if the response has no validity field.
+    """
+
+    result_dom = xml.dom.minidom.parseString(
+        content.decode('utf-8').encode('utf-8')
+    )
+
+    envelope_node = result_dom.documentElement
+    if envelope_node.tagName != 'env:Envelope':
+        raise ValueError(
+            'expected response XML root element to be a SOAP envelope'
+        )
+
+    body_node = get_first_child_element(envelope_node, 'env:Body')
+
+    try:
+        error_node = get_first_child_element(body_node, 'env:Fault')
+        fault_strings = error_node.getElementsByTagName('faultstring')
+        raise ServerError(fault_strings[0].firstChild.nodeValue)
+    except NodeNotFoundError:
+        pass
+
+    check_vat_response_node = get_first_child_element(body_node,
+                                                      'ns2:checkVatResponse')
+    fields = [get_text(get_first_child_element(check_vat_response_node,
+                                               'ns2:valid'))]
+    for tag_name in ['ns2:name', 'ns2:address']:
+        try:
+            fields.append(get_text(get_first_child_element(
+                check_vat_response_node,
+                tag_name
+            )))
+        except NodeNotFoundError:
+            fields.append(None)
+    return tuple(fields)
+
+
+def parse_with_expat(content):
+    """Parse a response with :func:`parse_check_vat_response`.
+
+    :returns: a ``(valid, name, address)`` tuple of the response text.
+    :raises ServerError: if the response is a SOAP fault.
+    :raises NodeNotFoundError: if the response has no validity field.
+    """
+
+    response = parse_check_vat_response(content)
+    if response.fault:
+        raise ServerError(response.fault_string)
+    if response.error is not None:
+        raise response.error
+    return response.valid, response.name, response.address
+
+
+def run():
+    """Run the benchmark.
+
+    :returns:
+        a list of ``(payload name, minidom us per parse, expat us per parse)``
+        tuples.
+    """
+
+    rows = []
+
+    for name, content in sorted(load_payloads().items()):
+        timings = []
+        for parse in [parse_with_minidom, parse_with_expat]:
+            def parse_payload():
+                try:
+                    parse(content)
+                except ServerError:
+                    pass
+
+            timings.append(min(timeit.repeat(parse_payload,
+                                             number=PARSES,
+                                             repeat=3)) / PARSES * 1e6)
+
+        rows.append((name, timings[0], timings[1]))
+
+    return rows
+
+
+def main():
+    print('%-10s %16s %16s' % ('payload', 'minidom us/op', 'expat us/op'))
+    for name, minidom, expat in run():
+        print('%-10s %16.1f %16.1f' % (name, minidom, expat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,474 @@
+"""Local stand-in for the VIES ``checkVatService`` SOAP endpoint.
+
+Answers ``checkVat`` requests with valid, invalid or ``env:Fault`` responses,
+after a latency drawn from a configurable distribution, so
+:class:`pyvat.registries.ViesRegistry` can be exercised at volume without
+touching the real VIES service::
+
+   python -m benchmarks.vies_server --port 8080 --latency lognormal:80,0.5 \\
+       --invalid-rate 0.1 --fault MS_UNAVAILABLE=0.02 \\
+       --fault MS_MAX_CONCURRENT_REQ=0.01
+
+Registries are pointed at the stand-in through their ``service_url``::
+
+   pyvat.VIES_REGISTRY.service_url = 'http://127.0.0.1:8080/'
+
+Whether a VAT number is valid is determined by a hash of the VAT number, so
+repeated checks of a VAT number give the same answer. Faults are drawn at
+random for every request, and the concurrency limits of the VIES service can
+be simulated with ``--max-concurrent`` and ``--global-max-concurrent``.
+
+The availability status endpoint is served as well, reporting the countries
+given by ``--unavailable`` as unavailable.
+"""
+
+import argparse
+import collections
+import datetime
+import json
+import random
+import re
+import threading
+import time
+import zlib
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:  # pragma: no cover
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+
+FAULT_STRINGS = ('MS_UNAVAILABLE', 'TIMEOUT', 'MS_MAX_CONCURRENT_REQ')
+"""Fault strings of the VIES service that are commonly simulated.
+"""
+
+
+RESPONSE_TEMPLATE = (
+    u'<env:Envelope xmlns:env="http://schemas.xmlsoap.org/soap/envelope/">'
+    u'<env:Header/><env:Body><ns2:checkVatResponse xmlns:ns2="urn:ec.europa.'
+    u'eu:taxud:vies:services:checkVat:types"><ns2:countryCode>%s</ns2:country'
+    u'Code><ns2:vatNumber>%s</ns2:vatNumber><ns2:requestDate>%s+01:00</ns2:'
+    u'requestDate><ns2:valid>%s</ns2:valid><ns2:name>%s</ns2:name><ns2:addres'
+    u's>%s</ns2:address></ns2:checkVatResponse></env:Body></env:Envelope>'
+)
+"""``checkVat`` response template.
+"""
+
+
+FAULT_TEMPLATE = (
+    u'<env:Envelope xmlns:env="http://schemas.xmlsoap.org/soap/envelope/">'
+    u'<env:Header/><env:Body><env:Fault><faultcode>env:Server</faultcode>'
+    u'<faultstring>%s</faultstring></env:Fault></env:Body></env:Envelope>'
+)
+"""SOAP fault response template.
+"""
+
+
+REQUEST_EXPRESSION = re.compile(
+    br'<(?:\w+:)?countryCode>([A-Z]{2})</(?:\w+:)?countryCode>\s*'
+    br'<(?:\w+:)?vatNumber>([0-9A-Z+*]{2,12})</(?:\w+:)?vatNumber>'
+)
+"""Expression for the country code and VAT number of a ``checkVat`` request.
+"""
+
+
+def parse_latency(spec):
+    """Parse a latency distribution.
+
+    Distributions are given in milliseconds as one of:
+
+    * ``fixed:MS``
+    * ``uniform:MIN,MAX``
+    * ``normal:MEAN,STDDEV``
+    * ``exponential:MEAN``
+    * ``lognormal:MEDIAN,SIGMA``
+
+    :param spec: Latency distribution.
+    :returns:
+        a callable taking a :class:`random.Random` instance and returning a
+        latency in seconds.
+    :raises ValueError: if the distribution is invalid.
+    """
+
+    name, _, args = spec.partition(':')
+    try:
+        args = [float(arg) for arg in args.split(',')] if args else []
+    except ValueError:
+        raise ValueError('invalid latency distribution: %r' % (spec, ))
+
+    distributions = {
+        'fixed': (1, lambda rng, ms: ms),
+        'uniform': (2, lambda rng, low, high: rng.uniform(low, high)),
+        'normal': (2, lambda rng, mean, stddev: rng.gauss(mean, stddev)),
+        'exponential': (1, lambda rng, mean: rng.expovariate(1.0 / mean)),
+        'lognormal': (2, lambda rng, median, sigma:
+                      median * rng.lognormvariate(0, sigma)),
+    }
+    if name not in distributions or len(args) != distributions[name][0]:
+        raise ValueError('invalid latency distribution: %r' % (spec, ))
+
+    sample = distributions[name][1]
+    return lambda rng: max(0.0, sample(rng, *args)) / 1000.0
+
+
+class ViesStandInHandler(BaseHTTPRequestHandler):
+    """Request handler of the VIES stand-in server.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    # Headers and body are written separately, which would otherwise be
+    # delayed by Nagle's algorithm on persistent connections.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+
+        if not self.path.rstrip('/').endswith('/check-status'):
+            self.send_error(404)
+            return
+
+        body = json.dumps(server.get_status()).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+
+        content = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        match = REQUEST_EXPRESSION.search(content)
+
+        if match is None:
+            time.sleep(server.latency(server.random))
+            status = server.fault_status
+            body = FAULT_TEMPLATE % (u'INVALID_INPUT', )
+        else:
+            country_code, vat_number = [group.decode('ascii')
+                                        for group in match.groups()]
+
+            # Requests beyond the concurrency limits are rejected right away.
+            fault_string = server.enter(country_code)
+            if fault_string is not None:
+                status = server.fault_status
+                body = FAULT_TEMPLATE % (fault_string, )
+            else:
+                try:
+                    time.sleep(server.latency(server.random))
+                    status, body = server.respond(country_code, vat_number)
+                finally:
+                    server.leave(country_code)
+
+        body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/xml;charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ViesStandInServer(ThreadingMixIn, HTTPServer):
+    """VIES stand-in server.
+
+    :ivar latency: Latency distribution as returned by :func:`parse_latency`.
+    :ivar invalid_rate: Fraction of VAT numbers that are invalid.
+    :ivar fault_rates:
+        Mapping from fault strings to the fraction of requests answered with
+        the fault.
+    :ivar fault_status: HTTP status code of fault responses.
+    :ivar unavailable:
+        Country codes reported as unavailable by the status endpoint.
+    :ivar max_concurrent: Maximum number of concurrent requests by country.
+    :ivar global_max_concurrent:
+        Maximum number of concurrent requests in total.
+    :ivar requests: Number of requests answered.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self,
+                 address=('127.0.0.1', 0),
+                 latency='fixed:0',
+                 invalid_rate=0.0,
+                 fault_rates=None,
+                 fault_status=200,
+                 unavailable=(),
+                 max_concurrent=None,
+                 global_max_concurrent=None,
+                 seed=None):
+        """Initialize a VIES stand-in server.
+
+        :param address:
+            ``(host, port)`` address to listen on. Default listening on an
+            arbitrary free port on the loopback interface.
+        :param latency:
+            Latency distribution as accepted by :func:`parse_latency`. Default
+            ``'fixed:0'``.
+        :param invalid_rate: Fraction of VAT numbers that are invalid.
+        :param fault_rates:
+            Optional mapping from fault strings, e.g. the ones in
+            :data:`FAULT_STRINGS`, to the fraction of requests answered with
+            the fault.
+        :param fault_status:
+            HTTP status code of fault responses. Default ``200``, as pyvat
+            only interprets faults in successful responses.
+        :param unavailable:
+            Country codes reported as unavailable by the status endpoint.
+        :param max_concurrent:
+            Optional maximum number of concurrent requests by country, beyond
+            which requests are answered with ``MS_MAX_CONCURRENT_REQ`` faults.
+        :param global_max_concurrent:
+            Optional maximum number of concurrent requests in total, beyond
+            which requests are answered with ``GLOBAL_MAX_CONCURRENT_REQ``
+            faults.
+        :param seed: Optional seed of the random number generator.
+        """
+
+        self.latency = parse_latency(latency)
+        self.invalid_rate = invalid_rate
+        self.fault_rates = dict(fault_rates or {})
+        self.fault_status = fault_status
+        self.unavailable = set(unavailable)
+        self.max_concurrent = max_concurrent
+        self.global_max_concurrent = global_max_concurrent
+        self.random = random.Random(seed)
+        self.requests = 0
+
+        self._requests_lock = threading.Lock()
+        self._in_flight = collections.Counter()
+
+        HTTPServer.__init__(self, address, ViesStandInHandler)
+
+    @property
+    def url(self):
+        """URL of the service.
+        """
+
+        host, port = self.server_address[:2]
+        return 'http://%s:%d/taxation_customs/vies/services/checkVatService' \
+            % (host, port)
+
+    @property
+    def status_url(self):
+        """URL of the availability status service.
+        """
+
+        host, port = self.server_address[:2]
+        return 'http://%s:%d/taxation_customs/vies/rest-api/check-status' % (
+            host, port,
+        )
+
+    def get_status(self):
+        """Get the availability status of the service.
+
+        :returns: the status response document.
+        :rtype: dict
+        """
+
+        from pyvat import VAT_REGISTRIES
+
+        countries = []
+        for country_code in sorted(VAT_REGISTRIES):
+            unavailable = country_code in self.unavailable
+
+            # Non-ISO code used for Greece.
+            if country_code == 'GR':
+                country_code = 'EL'
+
+            countries.append({
+                'countryCode': country_code,
+                'availability': 'Unavailable' if unavailable else 'Available',
+            })
+
+        return {'vow': {'available': True}, 'countries': countries}
+
+    def is_vat_number_valid(self, country_code, vat_number):
+        """Determine whether a VAT number is valid.
+
+        :rtype: bool
+        """
+
+        digest = zlib.crc32(('%s%s' % (country_code, vat_number))
+                            .encode('ascii')) & 0xffffffff
+        return digest % 10000 >= self.invalid_rate * 10000
+
+    def enter(self, country_code):
+        """Start answering a ``checkVat`` request.
+
+        Every request that is not rejected must be followed by a call to
+        :meth:`leave`.
+
+        :returns:
+            the fault string to reject the request with if a concurrency limit
+            is exceeded, otherwise ``None``.
+        """
+
+        with self._requests_lock:
+            self.requests += 1
+
+            in_flight = self._in_flight
+            if self.global_max_concurrent is not None and \
+               in_flight[None] >= self.global_max_concurrent:
+                return u'GLOBAL_MAX_CONCURRENT_REQ'
+            if self.max_concurrent is not None and \
+               in_flight[country_code] >= self.max_concurrent:
+                return u'MS_MAX_CONCURRENT_REQ'
+
+            in_flight[None] += 1
+            in_flight[country_code] += 1
+
+    def leave(self, country_code):
+        """Finish answering a ``checkVat`` request.
+        """
+
+        with self._requests_lock:
+            self._in_flight[None] -= 1
+            self._in_flight[country_code] -= 1
+
+    def respond(self, country_code, vat_number):
+        """Make the response to a ``checkVat`` request.
+
+        :returns: a ``(status code, body)`` tuple.
+        """
+
+        draw = self.random.random()
+        for fault_string, rate in sorted(self.fault_rates.items()):
+            if draw < rate:
+                return self.fault_status, FAULT_TEMPLATE % (fault_string, )
+            draw -= rate
+
+        today = datetime.date.today().isoformat()
+        if self.is_vat_number_valid(country_code, vat_number):
+            return 200, RESPONSE_TEMPLATE % (
+                country_code, vat_number, today, u'true',
+                u'STAND-IN %s%s ApS' % (country_code, vat_number),
+                u'Standinvej 1\n1000 K\xf8benhavn K',
+            )
+
+        return 200, RESPONSE_TEMPLATE % (country_code, vat_number, today,
+                                         u'false', u'---', u'---')
+
+    def start(self):
+        """Serve requests in a background thread.
+
+        :returns: the server.
+        """
+
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+
+def parse_fault_rate(spec):
+    """Parse a ``FAULT_STRING=RATE`` fault rate.
+
+    :returns: a ``(fault string, rate)`` tuple.
+    """
+
+    fault_string, _, rate = spec.partition('=')
+    try:
+        return fault_string, float(rate)
+    except ValueError:
+        raise argparse.ArgumentTypeError('invalid fault rate: %r' % (spec, ))
+
+
+def add_server_arguments(parser):
+    """Add the arguments configuring a stand-in server to a parser.
+    """
+
+    parser.add_argument('--latency',
+                        default='fixed:0',
+                        help='latency distribution in ms, e.g. fixed:50, '
+                             'uniform:20,200, normal:100,20, exponential:100 '
+                             'or lognormal:80,0.5 (default: fixed:0)')
+    parser.add_argument('--invalid-rate',
+                        type=float,
+                        default=0.0,
+                        help='fraction of VAT numbers that are invalid')
+    parser.add_argument('--fault',
+                        type=parse_fault_rate,
+                        action='append',
+                        default=[],
+                        metavar='FAULT_STRING=RATE',
+                        help='fraction of requests answered with a fault, '
+                             'e.g. %s=0.05; may be repeated' %
+                             (FAULT_STRINGS[0], ))
+    parser.add_argument('--fault-status',
+                        type=int,
+                        default=200,
+                        help='HTTP status code of fault responses (default: '
+                             '200)')
+    parser.add_argument('--unavailable',
+                        action='append',
+                        default=[],
+                        metavar='COUNTRY_CODE',
+                        help='country reported as unavailable by the status '
+                             'endpoint; may be repeated')
+    parser.add_argument('--max-concurrent',
+                        type=int,
+                        help='maximum concurrent requests by country, beyond '
+                             'which MS_MAX_CONCURRENT_REQ faults are answered')
+    parser.add_argument('--global-max-concurrent',
+                        type=int,
+                        help='maximum concurrent requests in total, beyond '
+                             'which GLOBAL_MAX_CONCURRENT_REQ faults are '
+                             'answered')
+    parser.add_argument('--seed',
+                        type=int,
+                        help='seed of the random number generator')
+
+
+def make_server(options, address=('127.0.0.1', 0)):
+    """Make a stand-in server from parsed arguments.
+
+    :rtype: ViesStandInServer
+    """
+
+    return ViesStandInServer(address,
+                             latency=options.latency,
+                             invalid_rate=options.invalid_rate,
+                             fault_rates=dict(options.fault),
+                             fault_status=options.fault_status,
+                             unavailable=options.unavailable,
+                             max_concurrent=options.max_concurrent,
+                             global_max_concurrent=(
+                                 options.global_max_concurrent
+                             ),
+                             seed=options.seed)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.vies_server',
+                                     description='Run a local stand-in for '
+                                                 'the VIES service.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    add_server_arguments(parser)
+    options = parser.parse_args(args)
+
+    try:
+        server = make_server(options, (options.host, options.port))
+    except ValueError as e:
+        parser.error(str(e))
+
+    print('Serving VIES stand-in at %s' % (server.url, ))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,23 @@
+import collections
 import re
-import pycountry
-from .item_type import ItemType
+import sys
+from itertools import compress
+from .countries import ISO_3166_1_ALPHA_2_COUNTRY_CODES
+from .checksums import VAT_NUMBER_CHECKSUMS
+from .item_type import ItemType, ItemTypeCategory
+from .exceptions import ServerError
 from .party import Party
 from .registries import ViesRegistry
-from .result import VatNumberCheckResult
+from .result import VatNumberCheckLogEvent, VatNumberCheckResult  # noqa
 from .vat_charge import VatCharge, VatChargeAction
-from .vat_rules import VAT_RULES
+from .vat_rules import (
+    EuVatRateRule,
+    JANUARY_1_2015,
+    NOT_APPLICABLE,
+    resolve_sale_vat_charge,
+    get_vat_rules_table,
+    SALE_VAT_CHARGES,
+)
 
 
 __version__ = '1.3.3.2'
@@ -118,6 +130,19 @@ def decompose_vat_number(vat_number, country_code=None):
     # Clean the VAT number.
     vat_number = WHITESPACE_EXPRESSION.sub('', vat_number).upper()
 
+    return _decompose_clean_vat_number(vat_number, country_code)
+
+
+def _decompose_clean_vat_number(vat_number, country_code):
+    """Decompose a cleaned VAT number and an optional country code.
+
+    :param vat_number: VAT number without whitespace in upper case.
+    :param country_code: Optional country code.
+    :returns:
+        a :class:`tuple` containing the VAT number and country code or
+        ``(None, None)`` if decomposition failed.
+    """
+
     # Attempt to determine the country code of the VAT number if possible.
     if not country_code:
         country_code = vat_number[0:2]
@@ -125,12 +150,9 @@ def decompose_vat_number(vat_number, country_code=None):
         if country_code == 'EL':
             country_code = 'GR'
 
-        if country_code not in VAT_REGISTRIES:
-            try:
-                if not pycountry.countries.get(alpha_2=country_code):
-                    return (None, None)
-            except KeyError:
-                return (None, None)
+        if country_code not in VAT_REGISTRIES and \
+           country_code not in ISO_3166_1_ALPHA_2_COUNTRY_CODES:
+            return (None, None)
         vat_number = vat_number[2:]
     elif vat_number[0:2] == country_code:
         vat_number = vat_number[2:]
@@ -143,6 +165,10 @@ def decompose_vat_number(vat_number, country_code=None):
 def is_vat_number_format_valid(vat_number, country_code=None):
     """Test if the format of a VAT number is valid.
 
+    Besides the structure of the VAT number, the check digits are tested for
+    countries with a known check digit algorithm, so VAT numbers certain to be
+    invalid are rejected without consulting a registry.
+
     :param vat_number: VAT number to validate.
     :param country_code:
         Optional country code. Should be supplied if known, as there is no
@@ -168,9 +194,137 @@ def is_vat_number_format_valid(vat_number, country_code=None):
     if not VAT_NUMBER_EXPRESSIONS[country_code].match(vat_number):
         return False
 
+    # Test the check digits of the VAT number if possible.
+    checksum = VAT_NUMBER_CHECKSUMS.get(country_code)
+    if checksum is not None and not checksum(vat_number):
+        return False
+
     return True
 
 
+def are_vat_number_formats_valid(vat_numbers, country_codes=None):
+    """Test if the formats of a number of VAT numbers are valid.
+
+    Bulk counterpart of :func:`is_vat_number_format_valid`, accepting NumPy
+    arrays. All VAT numbers are cleaned in a single pass and grouped by
+    country, so every country's expression and check digit algorithm is looked
+    up once per batch rather than once per VAT number.
+
+    :param vat_numbers:
+        Sequence of VAT numbers to validate or, if NumPy is installed, a NumPy
+        array of strings.
+    :param country_codes:
+        Optional country codes. Either a single country code applying to all
+        VAT numbers or a sequence of country codes, possibly ``None``, of the
+        same length as ``vat_numbers``. Default ``None`` prompting detection.
+    :returns:
+        a :class:`list` of ``True``, ``False`` or ``None`` values as returned
+        by :func:`is_vat_number_format_valid` for every VAT number or, if
+        ``vat_numbers`` is a NumPy array, a boolean NumPy masked array in which
+        ``None`` values are masked.
+    """
+
+    # Only accept NumPy arrays if NumPy is already in use.
+    numpy = sys.modules.get('numpy')
+    is_array = numpy is not None and isinstance(vat_numbers, numpy.ndarray)
+
+    if is_array:
+        vat_numbers = vat_numbers.tolist()
+    else:
+        vat_numbers = list(vat_numbers)
+
+    if numpy is not None and isinstance(country_codes, numpy.ndarray):
+        country_codes = country_codes.tolist()
+
+    if country_codes is None or isinstance(country_codes, (str, type(u''))):
+        country_codes = [country_codes] * len(vat_numbers)
+    elif len(country_codes) != len(vat_numbers):
+        raise ValueError('expected as many country codes as VAT numbers')
+
+    # Clean all VAT numbers at once, unless a VAT number contains the
+    # separator.
+    cleaned = WHITESPACE_EXPRESSION.sub('', u'\0'.join(vat_numbers)) \
+        .upper().split(u'\0')
+    if len(cleaned) != len(vat_numbers):
+        cleaned = [WHITESPACE_EXPRESSION.sub('', vat_number).upper()
+                   for vat_number in vat_numbers]
+
+    # Group the decomposed VAT numbers by country.
+    results = [False] * len(vat_numbers)
+    groups = {}
+    for index, (vat_number, country_code) in enumerate(zip(cleaned,
+                                                           country_codes)):
+        vat_number, country_code = _decompose_clean_vat_number(vat_number,
+                                                               country_code)
+        if not vat_number or not country_code:
+            continue
+
+        group = groups.get(country_code)
+        if group is None:
+            group = groups[country_code] = ([], [])
+        group[0].append(index)
+        group[1].append(vat_number)
+
+    # Test every group against its country's expression and check digits.
+    for country_code, (indices, group_vat_numbers) in groups.items():
+        expression = VAT_NUMBER_EXPRESSIONS.get(country_code)
+        if expression is None:
+            for index in indices:
+                results[index] = None
+            continue
+
+        checksum = VAT_NUMBER_CHECKSUMS.get(country_code)
+        for index, vat_number, match in zip(indices,
+                                            group_vat_numbers,
+                                            map(expression.match,
+                                                group_vat_numbers)):
+            results[index] = match is not None and \
+                (checksum is None or checksum(vat_number))
+
+    if is_array:
+        return numpy.ma.masked_array(
+            [result is True for result in results],
+            mask=[result is None for result in results],
+            dtype=bool
+        )
+
+    return results
+
+
+def _check_vat_number_format(vat_number, country_code):
+    """Check a VAT number as far as possible without consulting a registry.
+
+    :param vat_number: VAT number to validate.
+    :param country_code: Optional country code.
+    :returns:
+        a :class:`tuple` containing the decomposed VAT number, the country code
+        and either a :class:`VatNumberCheckResult` instance if the check is
+        already conclusive or ``None`` if the VAT number should be checked
+        against a registry.
+    """
+
+    # Decompose the VAT number.
+    vat_number, country_code = decompose_vat_number(vat_number, country_code)
+    if not vat_number or not country_code:
+        result = VatNumberCheckResult(False)
+        result.log('decomposition',
+                   '> Unable to decompose VAT number, resulted in %r and %r',
+                   vat_number,
+                   country_code)
+        return vat_number, country_code, result
+
+    # Test the VAT number format.
+    format_result = is_vat_number_format_valid(vat_number, country_code)
+    if format_result is not True:
+        result = VatNumberCheckResult(format_result)
+        result.log('format',
+                   '> VAT number validation failed: %r',
+                   format_result)
+        return vat_number, country_code, result
+
+    return vat_number, country_code, None
+
+
 def check_vat_number(vat_number, country_code=None):
     """Check if a VAT number is valid.
 
@@ -188,20 +342,10 @@ def check_vat_number(vat_number, country_code=None):
         the full VAT number check.
     """
 
-    # Decompose the VAT number.
-    vat_number, country_code = decompose_vat_number(vat_number, country_code)
-    if not vat_number or not country_code:
-        return VatNumberCheckResult(False, [
-            '> Unable to decompose VAT number, resulted in %r and %r' %
-            (vat_number, country_code)
-        ])
-
-    # Test the VAT number format.
-    format_result = is_vat_number_format_valid(vat_number, country_code)
-    if format_result is not True:
-        return VatNumberCheckResult(format_result, [
-            '> VAT number validation failed: %r' % (format_result)
-        ])
+    vat_number, country_code, result = _check_vat_number_format(vat_number,
+                                                                country_code)
+    if result is not None:
+        return result
 
     # Attempt to check the VAT number against a registry.
     if country_code not in VAT_REGISTRIES:
@@ -211,6 +355,130 @@ def check_vat_number(vat_number, country_code=None):
                                                          country_code)
 
 
+def check_vat_numbers(vat_numbers,
+                      max_workers=10,
+                      max_workers_per_country=2,
+                      max_pending=None):
+    """Check if a number of VAT numbers are valid.
+
+    Bulk counterpart of :func:`check_vat_number`. VAT numbers are decomposed
+    and have their format validated as they are read, after which the
+    remaining VAT numbers are checked against available registries
+    concurrently. The number of concurrent registry checks is capped both in
+    total and per country to avoid overloading any single registry backend,
+    and only a bounded number of VAT numbers is read ahead of the checks, so
+    results stream even for very large or unbounded inputs.
+
+    Results are yielded as they complete rather than in the order the VAT
+    numbers were given. Server errors reported by a registry and exceptions
+    raised by registry checks are yielded as nondeterministic results rather
+    than raised.
+
+    :param vat_numbers:
+        Iterable of ``(vat_number, country_code)`` tuples, where the country
+        code may be ``None`` prompting detection.
+    :param max_workers:
+        Maximum number of concurrent registry checks. Default 10.
+    :type max_workers: int
+    :param max_workers_per_country:
+        Maximum number of concurrent registry checks per country. Default 2.
+    :type max_workers_per_country: int
+    :param max_pending:
+        Maximum number of VAT numbers read ahead of completed registry
+        checks, including the checks in progress. Default ``None`` using four
+        times ``max_workers``.
+    :type max_pending: int
+    :returns:
+        a generator yielding a :class:`tuple` containing the given
+        ``(vat_number, country_code)`` tuple and a
+        :class:`VatNumberCheckResult` instance for every VAT number.
+    """
+
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    if max_pending is None:
+        max_pending = 4 * max_workers
+    max_pending = max(max_pending, max_workers)
+
+    def check(vat_number, country_code):
+        try:
+            return VAT_REGISTRIES[country_code].check_vat_number(vat_number,
+                                                                 country_code)
+        except ServerError as e:
+            result = VatNumberCheckResult()
+            result.log('server_error',
+                       '< Registry check failed with server error: %s',
+                       e.fault_code)
+            return result
+        except Exception as e:
+            # Do not let a single problematic check abort the batch.
+            result = VatNumberCheckResult()
+            result.log('exception',
+                       '< Registry check failed with exception: %r',
+                       e)
+            return result
+
+    vat_numbers = iter(vat_numbers)
+    exhausted = False
+
+    # VAT numbers awaiting registry checks by country.
+    queues = collections.OrderedDict()
+    queued = 0
+
+    futures = {}
+    country_workers = collections.defaultdict(int)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            # Check VAT numbers as far as possible locally as they are read,
+            # queueing the remaining VAT numbers for registry checks.
+            while not exhausted and len(futures) + queued < max_pending:
+                try:
+                    vat_number_tuple = next(vat_numbers)
+                except StopIteration:
+                    exhausted = True
+                    break
+
+                vat_number, country_code, result = _check_vat_number_format(
+                    *vat_number_tuple
+                )
+                if result is None and country_code not in VAT_REGISTRIES:
+                    result = VatNumberCheckResult()
+
+                if result is not None:
+                    yield vat_number_tuple, result
+                    continue
+
+                queues.setdefault(country_code, collections.deque()).append(
+                    (vat_number_tuple, vat_number)
+                )
+                queued += 1
+
+            # Fan the registry checks out, submitting checks only when there
+            # is capacity both in total and for the given country.
+            for country_code, queue in queues.items():
+                while queue and \
+                        len(futures) < max_workers and \
+                        country_workers[country_code] < \
+                        max_workers_per_country:
+                    vat_number_tuple, vat_number = queue.popleft()
+                    queued -= 1
+                    future = executor.submit(check, vat_number, country_code)
+                    futures[future] = (vat_number_tuple, country_code)
+                    country_workers[country_code] += 1
+
+            if not futures:
+                if exhausted:
+                    break
+                continue
+
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                vat_number_tuple, country_code = futures.pop(future)
+                country_workers[country_code] -= 1
+                yield vat_number_tuple, future.result()
+
+
 def get_sale_vat_charge(date,
                         item_type,
                         buyer,
@@ -220,6 +488,16 @@ def get_sale_vat_charge(date,
     Currently only supports determination of the VAT charge for
     telecommunications, broadcasting and electronic services in the EU.
 
+    VAT charges are memoized in :data:`pyvat.vat_rules.SALE_VAT_CHARGES` by
+    the countries of the buyer and seller, whether they are businesses, the
+    item type and the rate periods in effect at the sale date. The same
+    immutable :class:`VatCharge` instance is thereby returned for identical
+    sales.
+
+    The VAT charge is determined entirely by the active
+    :class:`pyvat.vat_rules.VatRulesTable`, the version of whose VAT rate
+    dataset is given by :attr:`VatCharge.version`.
+
     :param date: Sale date.
     :type date: datetime.date
     :param item_type: Type of the item being sold.
@@ -231,6 +509,114 @@ def get_sale_vat_charge(date,
     :rtype: VatCharge
     """
 
+    return _get_table_sale_vat_charge(get_vat_rules_table(),
+                                      date,
+                                      item_type,
+                                      buyer,
+                                      seller)
+
+
+def _get_table_sale_vat_charge(table, date, item_type, buyer, seller):
+    """Get the VAT charge for performing the sale of an item by a table.
+
+    :param table: VAT rules table.
+    :type table: pyvat.vat_rules.VatRulesTable
+    :rtype: VatCharge
+    """
+
+    # Take the generation of memoized VAT charges before looking at any
+    # rules, so VAT charges of rules changed in the meantime are not
+    # memoized.
+    generation = SALE_VAT_CHARGES.generation
+
+    # Determine the rules for the countries in which the buyer and seller
+    # reside.
+    buyer_vat_rules = table.rules.get(buyer.country_code, None)
+    seller_vat_rules = table.rules.get(seller.country_code, None)
+
+    # Look up the VAT charge for identical sales in the same rate periods.
+    key = _get_sale_key(date,
+                        item_type,
+                        buyer,
+                        seller,
+                        buyer_vat_rules,
+                        seller_vat_rules)
+    if key is not None:
+        vat_charge = SALE_VAT_CHARGES.get(key)
+        if vat_charge is not None:
+            return vat_charge
+
+    vat_charge = _get_sale_vat_charge(date,
+                                      item_type,
+                                      buyer,
+                                      seller,
+                                      buyer_vat_rules,
+                                      seller_vat_rules)
+    if vat_charge.version != table.version:
+        vat_charge = vat_charge.of(vat_charge.action,
+                                   vat_charge.country_code,
+                                   vat_charge.rate,
+                                   table.version)
+
+    if key is not None:
+        SALE_VAT_CHARGES.set(key, vat_charge, generation)
+
+    return vat_charge
+
+
+def _get_sale_key(date,
+                  item_type,
+                  buyer,
+                  seller,
+                  buyer_vat_rules,
+                  seller_vat_rules):
+    """Get the key of a sale for memoizing its VAT charge.
+
+    :returns:
+        a :class:`tuple` of the values determining the VAT charge for the sale
+        or ``None`` if the VAT charge cannot be memoized, as either country
+        uses rules without rate periods.
+    """
+
+    if buyer_vat_rules is None:
+        buyer_period = None
+    elif isinstance(buyer_vat_rules, EuVatRateRule):
+        buyer_period = buyer_vat_rules.get_vat_rate_period(date)
+    else:
+        return None
+
+    if seller_vat_rules is None:
+        seller_period = None
+    elif isinstance(seller_vat_rules, EuVatRateRule):
+        seller_period = seller_vat_rules.get_vat_rate_period(date)
+    else:
+        return None
+
+    # The rules themselves are part of the key, as the rules for a country may
+    # be replaced.
+    return (item_type,
+            buyer.country_code,
+            buyer.is_business,
+            seller.country_code,
+            seller.is_business,
+            date >= JANUARY_1_2015,
+            buyer_vat_rules,
+            buyer_period,
+            seller_vat_rules,
+            seller_period)
+
+
+def _get_sale_vat_charge(date,
+                         item_type,
+                         buyer,
+                         seller,
+                         buyer_vat_rules,
+                         seller_vat_rules):
+    """Determine the VAT charge for performing the sale of an item.
+
+    :rtype: VatCharge
+    """
+
     # Only telecommunications, broadcasting and electronic services are
     # currently supported.
     if not item_type.is_electronic_service and \
@@ -242,31 +628,17 @@ def get_sale_vat_charge(date,
             'currently not supported'
         )
 
-    # Determine the rules for the countries in which the buyer and seller
-    # reside.
-    buyer_vat_rules = VAT_RULES.get(buyer.country_code, None)
-    seller_vat_rules = VAT_RULES.get(seller.country_code, None)
-
     # Test if the country to which the item is being sold enforces specific
-    # VAT rules for selling to the given country.
-    if buyer_vat_rules:
-        try:
-            return buyer_vat_rules.get_sale_to_country_vat_charge(date,
-                                                                  item_type,
-                                                                  buyer,
-                                                                  seller)
-        except NotImplementedError:
-            pass
-
-    # Fall back to applying VAT rules for selling from the seller's country.
-    if seller_vat_rules:
-        try:
-            return seller_vat_rules.get_sale_from_country_vat_charge(date,
-                                                                     item_type,
-                                                                     buyer,
-                                                                     seller)
-        except NotImplementedError:
-            pass
+    # VAT rules for selling to the given country, falling back to applying VAT
+    # rules for selling from the seller's country.
+    vat_charge = resolve_sale_vat_charge(date,
+                                         item_type,
+                                         buyer,
+                                         seller,
+                                         buyer_vat_rules,
+                                         seller_vat_rules)
+    if vat_charge is not NOT_APPLICABLE:
+        return vat_charge
 
     # Nothing we can do from here.
     raise NotImplementedError(
@@ -275,12 +647,143 @@ def get_sale_vat_charge(date,
     )
 
 
+def get_sale_vat_charges(dates,
+                         item_types,
+                         buyer_country_codes,
+                         buyer_is_business,
+                         seller_country_codes,
+                         seller_is_business):
+    """Get the VAT charges for performing a number of sales.
+
+    Columnar bulk counterpart of :func:`get_sale_vat_charge`. Every argument
+    is either a column of values, one for every sale, or a single value
+    applying to all sales. Identical sales are only evaluated once, so a large
+    number of sales between a limited number of countries and on a limited
+    number of dates collapses to few evaluations of the VAT rules.
+
+    :param dates: Sale dates.
+    :param item_types: Types of the items being sold.
+    :param buyer_country_codes: Country codes of the buyers.
+    :param buyer_is_business: Whether the buyers are businesses.
+    :param seller_country_codes: Country codes of the sellers.
+    :param seller_is_business: Whether the sellers are businesses.
+    :returns:
+        a :class:`tuple` of three :class:`list` columns containing the
+        :class:`VatChargeAction`, the country code and the VAT rate in percent
+        of the VAT charge for every sale. All three values are ``None`` for
+        sales for which the VAT charge cannot be determined.
+    :raises ValueError:
+        if no columns are given, the columns are of different lengths or the
+        VAT rate of a sale is unknown.
+    """
+
+    # Only accept NumPy arrays if NumPy is already in use.
+    numpy = sys.modules.get('numpy')
+
+    columns = [dates,
+               item_types,
+               buyer_country_codes,
+               buyer_is_business,
+               seller_country_codes,
+               seller_is_business]
+    if numpy is not None:
+        columns = [column.tolist() if isinstance(column, numpy.ndarray)
+                   else column
+                   for column in columns]
+
+    # Strings are single values rather than columns of characters.
+    is_column = [not isinstance(column, (str, type(u''))) and
+                 hasattr(column, '__len__')
+                 for column in columns]
+
+    lengths = set(len(column)
+                  for column in compress(columns, is_column))
+    if not lengths:
+        raise ValueError('expected at least one column of sales')
+    if len(lengths) > 1:
+        raise ValueError('expected columns of the same length')
+
+    # Identify sales by their values in the given columns only, as single
+    # values are the same for all sales.
+    sales = list(zip(*compress(columns, is_column)))
+    vat_charges = dict.fromkeys(sales)
+
+    # All sales are determined by the same rules, even if another table is
+    # activated meanwhile.
+    table = get_vat_rules_table()
+
+    # Determine the VAT charge for every distinct sale.
+    for sale in vat_charges:
+        values = iter(sale)
+        date, item_type, buyer_cc, buyer_business, seller_cc, \
+            seller_business = [next(values) if column_is_column else column
+                               for column, column_is_column
+                               in zip(columns, is_column)]
+        try:
+            vat_charge = _get_table_sale_vat_charge(
+                table,
+                date,
+                item_type,
+                Party.of(buyer_cc, buyer_business),
+                Party.of(seller_cc, seller_business)
+            )
+        except NotImplementedError:
+            vat_charges[sale] = (None, None, None)
+            continue
+
+        vat_charges[sale] = (vat_charge.action,
+                             vat_charge.country_code,
+                             vat_charge.rate)
+
+    results = list(map(vat_charges.__getitem__, sales))
+
+    return ([result[0] for result in results],
+            [result[1] for result in results],
+            [result[2] for result in results])
+
+
 __all__ = (
+    'are_vat_number_formats_valid',
     'check_vat_number',
+    'check_vat_numbers',
     'get_sale_vat_charge',
+    'get_sale_vat_charges',
     'is_vat_number_format_valid',
     ItemType.__name__,
+    ItemTypeCategory.__name__,
     Party.__name__,
     VatCharge.__name__,
     VatChargeAction.__name__,
 )
+
+
+# The asyncio interface requires native coroutine support and is only loaded
+# on first use where module attributes can be resolved lazily, as importing
+# asyncio adds considerably to the import time. For the same reason, and as it
+# requires the optional aiohttp dependency, it is left out of ``__all__``.
+_AIO_NAMES = frozenset([
+    'ASYNC_VAT_REGISTRIES',
+    'ASYNC_VIES_REGISTRY',
+    'AsyncViesRegistry',
+    'check_vat_number_async',
+])
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        if name in _AIO_NAMES:
+            from . import aio
+            return getattr(aio, name)
+
+        raise AttributeError('module %r has no attribute %r' %
+                             (__name__, name))
+elif sys.version_info >= (3, 5):
+    try:
+        from .aio import (  # noqa
+            ASYNC_VAT_REGISTRIES,
+            ASYNC_VIES_REGISTRY,
+            AsyncViesRegistry,
+            check_vat_number_async,
+        )
+    except ImportError:  # pragma: no cover
+        # The optional aiohttp dependency is not installed.
+        pass
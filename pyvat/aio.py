@@ -0,0 +1,573 @@
+"""asyncio interface for checking VAT numbers.
+
+Requires Python 3.5 or newer and the optional ``aiohttp`` dependency, which can
+be installed through the ``async`` extra::
+
+   pip install pyvat[async]
+"""
+
+import asyncio
+
+import aiohttp
+
+from . import VAT_REGISTRIES, VIES_REGISTRY, _check_vat_number_format
+from .exceptions import ServerError
+from .registries import _RateLimited, ViesRegistry
+from .result import VatNumberCheckLogEvent, VatNumberCheckResult
+
+
+class AsyncViesRegistry(ViesRegistry):
+    """asyncio VIES registry.
+
+    Checks VAT numbers against the VIES registry like :class:`ViesRegistry`
+    with the same response parsing and result semantics, but
+    :meth:`check_vat_number` and :meth:`check_status` are coroutines and
+    requests are made through a pooled ``aiohttp`` session kept for every
+    event loop it is used on, which is closed by :meth:`aclose`.
+    """
+
+    def __init__(self,
+                 pool_size=None,
+                 max_idle=None,
+                 cache=None,
+                 capture_bodies=True,
+                 service_url=None,
+                 circuit_breaker=None,
+                 status_url=None,
+                 coalesce=True,
+                 rate_limiter=None,
+                 retry_policy=None,
+                 hedging_policy=None):
+        """Initialize an asyncio VIES registry.
+
+        :param pool_size:
+            Maximum number of concurrent connections to the VIES service.
+            Further requests wait for a connection to become available.
+            Default ``None`` using :attr:`DEFAULT_POOL_SIZE`.
+        :type pool_size: int
+        :param max_idle:
+            Number of seconds idle connections are kept alive. Default
+            ``None`` using :attr:`DEFAULT_MAX_IDLE`.
+        :type max_idle: float
+        :param cache:
+            Optional cache for check results. Default ``None`` disabling
+            caching.
+        :type cache: pyvat.cache.ResultCache
+        :param capture_bodies:
+            Whether to keep the request and response bodies in the check log
+            of results. Default ``True``.
+        :type capture_bodies: bool
+        :param service_url:
+            URL of the VAT checking service. Default ``None`` using
+            :attr:`CHECK_VAT_SERVICE_URL`.
+        :type service_url: str
+        :param circuit_breaker:
+            Optional circuit breaker by country. Default ``None`` always
+            making requests.
+        :type circuit_breaker: pyvat.circuit_breaker.CircuitBreaker
+        :param status_url:
+            URL of the VIES availability status service. Default ``None``
+            using :attr:`STATUS_SERVICE_URL`.
+        :type status_url: str
+        :param coalesce:
+            Whether concurrent checks of the same VAT number share a single
+            request to the VIES service. Default ``True``.
+        :type coalesce: bool
+        :param rate_limiter:
+            Optional rate limiter of the requests to the VIES service. Checks
+            wait for a token without blocking the event loop. Default
+            ``None`` not limiting the rate of requests.
+        :type rate_limiter: pyvat.rate_limiter.RateLimiter
+        :param retry_policy:
+            Optional policy for retrying checks. Default ``None`` making a
+            single attempt.
+        :type retry_policy: pyvat.retry.RetryPolicy
+        :param hedging_policy:
+            Optional policy for making a second request when a check takes
+            longer than most recent checks. Default ``None`` never making a
+            second request.
+        :type hedging_policy: pyvat.retry.HedgingPolicy
+        """
+
+        super(AsyncViesRegistry, self).__init__(pool_size,
+                                                max_idle,
+                                                cache,
+                                                capture_bodies,
+                                                service_url,
+                                                circuit_breaker,
+                                                status_url,
+                                                coalesce,
+                                                rate_limiter,
+                                                retry_policy,
+                                                hedging_policy)
+
+        self._client_sessions = {}
+
+    async def _get_client_session(self):
+        """Get the HTTP client session for the running event loop.
+
+        A session is kept for every event loop the registry is used on, and
+        the sessions of event loops that have since been closed are closed
+        rather than left open.
+
+        :rtype: aiohttp.ClientSession
+        """
+
+        loop = asyncio.get_event_loop()
+        sessions = self._client_sessions
+
+        for closed_loop in [other_loop for other_loop in sessions
+                            if other_loop.is_closed()]:
+            await sessions.pop(closed_loop).close()
+
+        session = sessions.get(loop)
+        if session is None or session.closed:
+            session = sessions[loop] = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.pool_size,
+                    keepalive_timeout=self.max_idle,
+                )
+            )
+
+        return session
+
+    async def aclose(self):
+        """Close the HTTP client session of the running event loop and its
+        pooled connections.
+
+        The sessions of event loops that have been closed are closed as well.
+        """
+
+        loop = asyncio.get_event_loop()
+        sessions = self._client_sessions
+
+        for other_loop in list(sessions):
+            if other_loop is loop or other_loop.is_closed():
+                await sessions.pop(other_loop).close()
+
+    async def check_status(self):
+        """Check the availability of the VIES service by country.
+
+        The availability is fed to the circuit breaker of the registry, if
+        any, opening the circuits of unavailable countries up front.
+
+        :returns:
+            a :class:`dict` mapping ISO 3166-1-alpha-2 country codes to
+            whether the VIES service is available for the country.
+        :raises ValueError: if the status response is malformed.
+        :raises aiohttp.ClientError: if the status request fails.
+        """
+
+        session = await self._get_client_session()
+
+        async with session.get(
+            self.status_url,
+            timeout=aiohttp.ClientTimeout(total=self.DEFAULT_TIMEOUT)
+        ) as response:
+            response.raise_for_status()
+            status = await response.json(content_type=None)
+
+        return self._set_availability(status)
+
+    def _get_in_flight(self):
+        """Get the checks in flight on the running event loop.
+
+        Checks are tasks bound to the event loop they were started on, so
+        they are only joined by checks on the same event loop. The checks of
+        event loops that have been closed, possibly with checks still in
+        flight, are discarded.
+
+        :returns:
+            a :class:`dict` mapping ``(country code, VAT number)`` tuples to
+            the tasks of the checks.
+        """
+
+        loop = asyncio.get_event_loop()
+        in_flight = self._in_flight.get(loop)
+
+        if in_flight is None:
+            for closed_loop in [other_loop for other_loop in self._in_flight
+                                if other_loop.is_closed()]:
+                del self._in_flight[closed_loop]
+            in_flight = self._in_flight[loop] = {}
+
+        return in_flight
+
+    async def check_vat_number(self, vat_number, country_code):
+        """Check if a VAT number is valid according to the registry.
+
+        :param vat_number: VAT number without country code prefix.
+        :param country_code: ISO 3166-1-alpha-2 country code.
+        :returns: a :class:`VatNumberCheckResult` instance.
+        """
+
+        cache = self.cache
+        if cache is not None:
+            result = cache.get(vat_number, country_code)
+            if result is not None:
+                return result
+
+        if not self.coalesce:
+            return await self._check_vat_number_guarded(vat_number,
+                                                        country_code)
+
+        # Join a check of the same VAT number already in flight on the
+        # running event loop, if any. The check runs as a task of its own, so
+        # cancelling any one caller does not cancel the check for the others.
+        in_flight = self._get_in_flight()
+        key = (country_code, vat_number)
+
+        task = in_flight.get(key)
+        if task is not None:
+            result = await asyncio.shield(task)
+            return self._make_coalesced_result(result)
+
+        task = asyncio.ensure_future(
+            self._check_vat_number_guarded(vat_number, country_code)
+        )
+        in_flight[key] = task
+        task.add_done_callback(lambda _: in_flight.pop(key, None))
+
+        return await asyncio.shield(task)
+
+    async def _check_vat_number_guarded(self, vat_number, country_code):
+        """Check a VAT number through the circuit breaker, caching the result.
+
+        The circuit breaker records the outcome of the check once all of its
+        attempts are made.
+
+        :param vat_number: VAT number without country code prefix.
+        :param country_code: ISO 3166-1-alpha-2 country code.
+        :returns: a :class:`VatNumberCheckResult` instance.
+        :raises ServerError: if the VIES service responds with a fault.
+        """
+
+        circuit_breaker = self.circuit_breaker
+        if circuit_breaker is not None and \
+           not circuit_breaker.allow(country_code):
+            return self._make_circuit_open_result(country_code)
+
+        try:
+            result = await self._check_vat_number_retried(vat_number,
+                                                          country_code)
+        except _RateLimited as e:
+            # Checks rejected by the rate limiter were never made, and say
+            # nothing about the availability of the registry.
+            if circuit_breaker is not None:
+                circuit_breaker.release(country_code)
+            result = e.result
+        except asyncio.CancelledError:
+            # Neither do checks cancelled before they finish.
+            if circuit_breaker is not None:
+                circuit_breaker.release(country_code)
+            raise
+        except ServerError as e:
+            if circuit_breaker is not None:
+                circuit_breaker.record_fault(country_code, e.fault_code)
+            raise
+        except Exception:
+            if circuit_breaker is not None:
+                circuit_breaker.record_failure(country_code)
+            raise
+        else:
+            if circuit_breaker is not None:
+                circuit_breaker.record(country_code, result)
+
+        cache = self.cache
+        if cache is not None:
+            cache.set(vat_number, country_code, result)
+
+        return result
+
+    async def _check_vat_number_retried(self, vat_number, country_code):
+        """Check a VAT number as per the retry policy.
+
+        :param vat_number: VAT number without country code prefix.
+        :param country_code: ISO 3166-1-alpha-2 country code.
+        :returns: a :class:`VatNumberCheckResult` instance.
+        :raises ServerError: if the VIES service responds with a fault.
+        :raises _RateLimited: if an attempt is rejected by the rate limiter.
+        """
+
+        retry_policy = self.retry_policy
+        log_events = []
+        attempt = 0
+
+        while True:
+            try:
+                result = await self._attempt_check_vat_number(vat_number,
+                                                              country_code)
+            except ServerError as e:
+                if retry_policy is None:
+                    raise
+                delay = retry_policy.get_fault_delay(e.fault_code, attempt)
+                if delay is None:
+                    raise
+                log_events.append(VatNumberCheckLogEvent(
+                    'fault',
+                    u'< Request failed with fault %s',
+                    (e.fault_code, ),
+                ))
+            except _RateLimited as e:
+                # Rejected attempts are not retried.
+                if log_events:
+                    e.result.log_events = log_events + e.result.log_events
+                raise
+            else:
+                if retry_policy is None:
+                    break
+                delay = retry_policy.get_result_delay(result, attempt)
+                if delay is None:
+                    break
+                log_events.extend(result.log_events)
+
+            attempt += 1
+            log_events.append(VatNumberCheckLogEvent(
+                'retry',
+                u'> Retrying request in %.3f seconds, attempt %d of %d',
+                (delay, attempt + 1, retry_policy.max_attempts),
+            ))
+            await asyncio.sleep(delay)
+
+        if log_events:
+            result.log_events = log_events + result.log_events
+
+        return result
+
+    async def _attempt_check_vat_number(self, vat_number, country_code):
+        """Attempt to check a VAT number through the rate limiter.
+
+        :param vat_number: VAT number without country code prefix.
+        :param country_code: ISO 3166-1-alpha-2 country code.
+        :returns: a :class:`VatNumberCheckResult` instance.
+        :raises ServerError: if the VIES service responds with a fault.
+        :raises _RateLimited: if the attempt is rejected by the rate limiter.
+        """
+
+        rate_limiter = self.rate_limiter
+        if rate_limiter is not None:
+            delay = rate_limiter.reserve(country_code)
+            if delay is None:
+                raise _RateLimited(
+                    self._make_rate_limited_result(country_code)
+                )
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        try:
+            result = await self._check_vat_number_hedged(vat_number,
+                                                         country_code)
+        except ServerError as e:
+            if rate_limiter is not None:
+                rate_limiter.record_fault(country_code, e.fault_code)
+            raise
+
+        if rate_limiter is not None and result.is_valid is not None:
+            rate_limiter.record_success(country_code)
+
+        return result
+
+    async def _check_vat_number_hedged(self, vat_number, country_code):
+        """Check a VAT number as per the hedging policy.
+
+        Requests run as tasks, and the request that loses the race is
+        cancelled.
+
+        :param vat_number: VAT number without country code prefix.
+        :param country_code: ISO 3166-1-alpha-2 country code.
+        :returns: a :class:`VatNumberCheckResult` instance.
+        :raises ServerError: if the VIES service responds with a fault.
+        """
+
+        hedging_policy = self.hedging_policy
+        if hedging_policy is None:
+            return await self._check_vat_number(vat_number, country_code)
+
+        delay = hedging_policy.get_delay()
+        if delay is None:
+            return await self._check_vat_number_timed(vat_number,
+                                                      country_code)
+
+        first = asyncio.ensure_future(
+            self._check_vat_number_timed(vat_number, country_code)
+        )
+        try:
+            done, _ = await asyncio.wait([first], timeout=delay)
+        except asyncio.CancelledError:
+            first.cancel()
+            raise
+
+        rate_limiter = self.rate_limiter
+        if done or (rate_limiter is not None and
+                    rate_limiter.reserve(country_code, wait=False) is None):
+            return await first
+
+        second = asyncio.ensure_future(
+            self._check_vat_number_timed(vat_number, country_code)
+        )
+        pending = set((first, second))
+        finished = []
+        try:
+            # Use whichever conclusive result arrives first, or the earliest
+            # outcome if neither is conclusive.
+            while True:
+                done, pending = await asyncio.wait(
+                    pending,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                finished.extend(task for task in (first, second)
+                                if task in done)
+                conclusive = [task for task in finished
+                              if task.exception() is None and
+                              task.result().is_valid is not None]
+                if conclusive or not pending:
+                    task = (conclusive or finished)[0]
+                    break
+        finally:
+            for other in pending:
+                other.cancel()
+
+        result = task.result()
+        result.log_events.insert(0, VatNumberCheckLogEvent(
+            'hedge',
+            u'> Second request made after %.3f seconds without a response',
+            (delay, ),
+        ))
+        return result
+
+    async def _check_vat_number_timed(self, vat_number, country_code):
+        """Check a VAT number, recording the latency of conclusive results
+        with the hedging policy.
+
+        :param vat_number: VAT number without country code prefix.
+        :param country_code: ISO 3166-1-alpha-2 country code.
+        :returns: a :class:`VatNumberCheckResult` instance.
+        :raises ServerError: if the VIES service responds with a fault.
+        """
+
+        loop = asyncio.get_event_loop()
+        started = loop.time()
+        result = await self._check_vat_number(vat_number, country_code)
+
+        hedging_policy = self.hedging_policy
+        if hedging_policy is not None and result.is_valid is not None:
+            hedging_policy.record(loop.time() - started)
+
+        return result
+
+    async def _check_vat_number(self, vat_number, country_code):
+        """Check a VAT number against the VIES service.
+
+        :param vat_number: VAT number without country code prefix.
+        :param country_code: ISO 3166-1-alpha-2 country code.
+        :returns: a :class:`VatNumberCheckResult` instance.
+        :raises ServerError: if the VIES service responds with a fault.
+        """
+
+        # Non-ISO code used for Greece.
+        if country_code == 'GR':
+            country_code = 'EL'
+
+        # Request information about the VAT number.
+        result = VatNumberCheckResult()
+
+        request_data = self._make_request_data(vat_number, country_code)
+
+        self._log_request(result, request_data)
+
+        try:
+            response = await self._post(request_data)
+        except asyncio.TimeoutError as e:
+            result.log('timeout',
+                       u'< Request to EU VIEW registry timed out: %s',
+                       e)
+            return result
+        except Exception as exception:
+            # Do not completely fail problematic requests.
+            result.log('exception',
+                       u'< Request failed with exception: %r',
+                       exception)
+            return result
+
+        return self._parse_response(result, *response)
+
+    async def _post(self, request_data):
+        """Post a request to the VIES service.
+
+        :param request_data: Request payload.
+        :returns:
+            a :class:`tuple` containing the response status code, content type
+            and raw body.
+        """
+
+        session = await self._get_client_session()
+
+        async with session.post(
+            self.service_url,
+            data=request_data.encode('utf-8'),
+            headers={
+                'Content-Type': 'text/xml; charset=utf-8',
+            },
+            timeout=aiohttp.ClientTimeout(total=self.DEFAULT_TIMEOUT)
+        ) as response:
+            return (response.status,
+                    response.headers.get('Content-Type', ''),
+                    await response.read())
+
+
+ASYNC_VIES_REGISTRY = AsyncViesRegistry()
+"""asyncio VIES registry instance.
+"""
+
+
+ASYNC_VAT_REGISTRIES = dict(
+    (country_code, ASYNC_VIES_REGISTRY)
+    for country_code, registry in VAT_REGISTRIES.items()
+    if registry is VIES_REGISTRY
+)
+"""asyncio VAT registries.
+
+Mapping from ISO 3166-1-alpha-2 country codes to the asyncio VAT registry
+capable of validating the VAT number.
+"""
+
+
+async def check_vat_number_async(vat_number, country_code=None):
+    """Check if a VAT number is valid without blocking the event loop.
+
+    asyncio counterpart of :func:`check_vat_number` checking the VAT number
+    against available asyncio registries.
+
+    :param vat_number: VAT number to validate.
+    :param country_code:
+        Optional country code. Should be supplied if known, as there is no
+        guarantee that naively entered VAT numbers contain the correct alpha-2
+        country code prefix for EU countries just as not all non-EU countries
+        have a reliable country code prefix. Default ``None`` prompting
+        detection.
+    :returns:
+        a :class:`VatNumberCheckResult` instance containing the result for
+        the full VAT number check.
+    """
+
+    vat_number, country_code, result = _check_vat_number_format(vat_number,
+                                                                country_code)
+    if result is not None:
+        return result
+
+    # Attempt to check the VAT number against a registry.
+    if country_code not in ASYNC_VAT_REGISTRIES:
+        return VatNumberCheckResult()
+
+    return await ASYNC_VAT_REGISTRIES[country_code].check_vat_number(
+        vat_number,
+        country_code
+    )
+
+
+__all__ = (
+    'ASYNC_VAT_REGISTRIES',
+    'ASYNC_VIES_REGISTRY',
+    'AsyncViesRegistry',
+    'check_vat_number_async',
+)
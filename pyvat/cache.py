@@ -0,0 +1,335 @@
+import collections
+import os
+import sqlite3
+import threading
+import time
+
+from .result import VatNumberCheckResult
+
+
+class _CheckTime(float):
+    """Time a result was checked, logged as an ISO 8601 UTC timestamp.
+    """
+
+    def __str__(self):
+        return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self))
+
+
+class ResultCache(object):
+    """Abstract base VAT number check result cache.
+
+    Defines an explicit interface for caching VAT number check results in front
+    of a registry. Only deterministic results, i.e. results for which
+    :attr:`VatNumberCheckResult.is_valid` is not ``None``, are cached.
+    """
+
+    def get(self, vat_number, country_code):
+        """Get a cached check result.
+
+        :param vat_number: VAT number without country code prefix.
+        :param country_code: Country code.
+        :returns:
+            a :class:`VatNumberCheckResult` instance or ``None`` if no
+            unexpired result is cached for the VAT number.
+        """
+
+        raise NotImplementedError()
+
+    def set(self, vat_number, country_code, result):
+        """Cache a check result.
+
+        Nondeterministic results are ignored.
+
+        :param vat_number: VAT number without country code prefix.
+        :param country_code: Country code.
+        :param result: Check result.
+        :type result: VatNumberCheckResult
+        """
+
+        raise NotImplementedError()
+
+    def get_ttl(self, result):
+        """Get the number of seconds a check result should be cached for.
+
+        :param result: Check result.
+        :type result: VatNumberCheckResult
+        :returns:
+            the number of seconds to cache the result for, ``None`` if the
+            result should not expire or ``0`` if the result should not be
+            cached.
+        """
+
+        if result.is_valid is None:
+            return 0
+
+        return self.valid_ttl if result.is_valid else self.invalid_ttl
+
+
+class LruResultCache(ResultCache):
+    """In-process least recently used VAT number check result cache.
+
+    Bounded to a maximum number of results, evicting the least recently used
+    result when full. Valid and invalid results expire separately. The cache is
+    safe to share between threads.
+
+    :ivar hits: Number of lookups answered from the cache.
+    :ivar misses: Number of lookups not answered from the cache.
+    :ivar evictions: Number of results evicted to make room for new results.
+    :ivar expirations: Number of results dropped on lookup due to expiry.
+    """
+
+    def __init__(self,
+                 max_size=10000,
+                 valid_ttl=86400,
+                 invalid_ttl=3600,
+                 clock=time.time):
+        """Initialize an in-process result cache.
+
+        :param max_size: Maximum number of cached results. Default 10000.
+        :type max_size: int
+        :param valid_ttl:
+            Number of seconds to cache valid results for or ``None`` to never
+            expire them. Default one day.
+        :param invalid_ttl:
+            Number of seconds to cache invalid results for or ``None`` to never
+            expire them. Default one hour.
+        :param clock: Function returning the current time in seconds.
+        """
+
+        self.max_size = max_size
+        self.valid_ttl = valid_ttl
+        self.invalid_ttl = invalid_ttl
+        self.clock = clock
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, vat_number, country_code):
+        key = (country_code, vat_number)
+
+        with self._lock:
+            entry = self._entries.pop(key, None)
+
+            if entry is not None:
+                expires_at = entry[0]
+                if expires_at is not None and expires_at <= self.clock():
+                    self.expirations += 1
+                    entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            # Mark the result as most recently used.
+            self._entries[key] = entry
+            self.hits += 1
+
+        _, is_valid, business_name, business_address = entry
+        result = VatNumberCheckResult(is_valid,
+                                      business_name=business_name,
+                                      business_address=business_address)
+        result.log('cache', u'< Result retrieved from cache')
+        return result
+
+    def set(self, vat_number, country_code, result):
+        ttl = self.get_ttl(result)
+        if ttl == 0 or self.max_size <= 0:
+            return
+
+        key = (country_code, vat_number)
+
+        with self._lock:
+            self._entries.pop(key, None)
+
+            while len(self._entries) >= self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+            self._entries[key] = (
+                None if ttl is None else self.clock() + ttl,
+                result.is_valid,
+                result.business_name,
+                result.business_address,
+            )
+
+    def clear(self):
+        """Remove all cached results.
+        """
+
+        with self._lock:
+            self._entries.clear()
+
+
+class SqliteResultCache(ResultCache):
+    """On-disk VAT number check result cache backed by SQLite.
+
+    Results are stored in a local SQLite database in WAL mode, allowing any
+    number of threads and processes on a host to share the cache concurrently
+    and the cache to survive process restarts. Each thread of each process uses
+    its own database connection.
+
+    Expiry is determined from the time a result was checked when it is looked
+    up, so changing the TTLs also applies to previously cached results.
+    Expired results can be removed by :meth:`purge`. Lookups and updates
+    failing due to database errors, e.g. of a corrupt database file, are
+    treated as misses and ignored respectively.
+
+    :ivar hits: Number of lookups answered from the cache by this instance.
+    :ivar misses: Number of lookups not answered from the cache by this
+        instance.
+    """
+
+    def __init__(self,
+                 path,
+                 valid_ttl=86400,
+                 invalid_ttl=3600,
+                 timeout=5.0,
+                 clock=time.time):
+        """Initialize an on-disk result cache.
+
+        :param path: Path of the SQLite database file.
+        :type path: str
+        :param valid_ttl:
+            Number of seconds to cache valid results for or ``None`` to never
+            expire them. Default one day.
+        :param invalid_ttl:
+            Number of seconds to cache invalid results for or ``None`` to never
+            expire them. Default one hour.
+        :param timeout:
+            Number of seconds to wait for a lock held by a concurrent writer
+            before giving up. Lookups and updates that give up are treated as
+            misses and ignored respectively. Default 5 seconds.
+        :type timeout: float
+        :param clock: Function returning the current time in seconds.
+        """
+
+        self.path = path
+        self.valid_ttl = valid_ttl
+        self.invalid_ttl = invalid_ttl
+        self.timeout = timeout
+        self.clock = clock
+
+        self.hits = 0
+        self.misses = 0
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _get_connection(self):
+        """Get the database connection for the current thread and process.
+
+        :rtype: sqlite3.Connection
+        """
+
+        pid = os.getpid()
+        connection = getattr(self._local, 'connection', None)
+
+        # Never reuse a connection inherited from a parent process.
+        if connection is None or self._local.pid != pid:
+            connection = sqlite3.connect(self.path,
+                                         timeout=self.timeout,
+                                         isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS vat_number_check_results ('
+                'country_code TEXT NOT NULL, '
+                'vat_number TEXT NOT NULL, '
+                'is_valid INTEGER NOT NULL, '
+                'business_name TEXT, '
+                'business_address TEXT, '
+                'checked_at REAL NOT NULL, '
+                'PRIMARY KEY (country_code, vat_number))'
+            )
+
+            self._local.connection = connection
+            self._local.pid = pid
+
+        return connection
+
+    def get(self, vat_number, country_code):
+        try:
+            row = self._get_connection().execute(
+                'SELECT is_valid, business_name, business_address, checked_at '
+                'FROM vat_number_check_results '
+                'WHERE country_code = ? AND vat_number = ?',
+                (country_code, vat_number)
+            ).fetchone()
+        except sqlite3.DatabaseError:
+            row = None
+
+        if row is not None:
+            is_valid, business_name, business_address, checked_at = row
+            is_valid = bool(is_valid)
+            ttl = self.valid_ttl if is_valid else self.invalid_ttl
+            if ttl is not None and checked_at + ttl <= self.clock():
+                row = None
+
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        result = VatNumberCheckResult(is_valid,
+                                      business_name=business_name,
+                                      business_address=business_address)
+        result.log('cache',
+                   u'< Result retrieved from cache checked at %s',
+                   _CheckTime(checked_at))
+        return result
+
+    def set(self, vat_number, country_code, result):
+        if self.get_ttl(result) == 0:
+            return
+
+        try:
+            self._get_connection().execute(
+                'INSERT OR REPLACE INTO vat_number_check_results '
+                '(country_code, vat_number, is_valid, business_name, '
+                'business_address, checked_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (country_code,
+                 vat_number,
+                 int(result.is_valid),
+                 result.business_name,
+                 result.business_address,
+                 self.clock())
+            )
+        except sqlite3.DatabaseError:
+            pass
+
+    def purge(self):
+        """Remove expired results.
+        """
+
+        now = self.clock()
+        connection = self._get_connection()
+
+        for is_valid, ttl in ((1, self.valid_ttl), (0, self.invalid_ttl)):
+            if ttl is None:
+                continue
+            connection.execute(
+                'DELETE FROM vat_number_check_results '
+                'WHERE is_valid = ? AND checked_at <= ?',
+                (is_valid, now - ttl)
+            )
+
+    def clear(self):
+        """Remove all cached results.
+        """
+
+        self._get_connection().execute(
+            'DELETE FROM vat_number_check_results'
+        )
+
+
+__all__ = ('LruResultCache', 'ResultCache', 'SqliteResultCache', )
@@ -0,0 +1,285 @@
+"""VAT number check digit algorithms.
+
+Every checksum function takes a whitespace-less, upper case VAT number without
+country code prefix that matches the expression for the country in
+:data:`pyvat.VAT_NUMBER_EXPRESSIONS` and returns ``False`` only if the VAT
+number is certain to be invalid. VAT number structures without a known check
+digit algorithm are always accepted.
+"""
+
+
+def _luhn_checksum(digits):
+    """Calculate the Luhn checksum of a string of digits.
+
+    :returns: the checksum, which is ``0`` for valid numbers.
+    :rtype: int
+    """
+
+    total = 0
+    for i, digit in enumerate(reversed(digits)):
+        value = int(digit)
+        if i % 2:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return total % 10
+
+
+def _mod_11_10_is_valid(digits):
+    """Test a string of digits against the ISO 7064 Mod 11, 10 algorithm.
+    """
+
+    product = 10
+    for digit in digits[:-1]:
+        total = (int(digit) + product) % 10 or 10
+        product = (2 * total) % 11
+    return (11 - product) % 10 == int(digits[-1])
+
+
+def _weighted_sum(digits, weights):
+    return sum(int(digit) * weight for digit, weight in zip(digits, weights))
+
+
+def is_at_checksum_valid(vat_number):
+    check = (6 - _luhn_checksum(vat_number[1:8])) % 10
+    return check == int(vat_number[8])
+
+
+def is_be_checksum_valid(vat_number):
+    vat_number = vat_number.zfill(10)
+    return 97 - int(vat_number[:8]) % 97 == int(vat_number[8:])
+
+
+def is_bg_checksum_valid(vat_number):
+    # Only legal entities have a single known check digit algorithm.
+    if len(vat_number) != 9:
+        return True
+
+    check = _weighted_sum(vat_number, range(1, 9)) % 11
+    if check == 10:
+        check = _weighted_sum(vat_number, range(3, 11)) % 11
+    return check % 10 == int(vat_number[8])
+
+
+def is_cy_checksum_valid(vat_number):
+    translation = (1, 0, 5, 7, 9, 13, 15, 17, 19, 21)
+    total = sum(translation[int(digit)] for digit in vat_number[0:8:2]) + \
+        sum(int(digit) for digit in vat_number[1:8:2])
+    return chr(ord('A') + total % 26) == vat_number[8]
+
+
+def is_de_checksum_valid(vat_number):
+    return _mod_11_10_is_valid(vat_number)
+
+
+def is_dk_checksum_valid(vat_number):
+    return _weighted_sum(vat_number, (2, 7, 6, 5, 4, 3, 2, 1)) % 11 == 0
+
+
+def is_ee_checksum_valid(vat_number):
+    check = (10 - _weighted_sum(vat_number, (3, 7, 1, 3, 7, 1, 3, 7)) % 10) \
+        % 10
+    return check == int(vat_number[8])
+
+
+ES_DNI_CHECK_LETTERS = 'TRWAGMYFPDXBNJZSQVHLCKE'
+"""Check letters of Spanish personal numbers by remainder modulo 23.
+"""
+
+
+def is_es_checksum_valid(vat_number):
+    first, digits, last = vat_number[0], vat_number[1:8], vat_number[8]
+
+    # Spanish nationals (DNI).
+    if first.isdigit() and not last.isdigit():
+        return ES_DNI_CHECK_LETTERS[int(vat_number[:8]) % 23] == last
+
+    # Foreigners (NIE).
+    if first in 'XYZ':
+        return ES_DNI_CHECK_LETTERS[
+            int(str('XYZ'.index(first)) + digits) % 23
+        ] == last
+
+    # Spanish nationals without DNI and foreigners without NIE.
+    if first in 'KLM':
+        return ES_DNI_CHECK_LETTERS[int(digits) % 23] == last
+
+    # Legal entities (CIF), checked by either a digit or a letter.
+    if first in 'ABCDEFGHJNPQRSUVW':
+        check = (10 - _luhn_checksum(digits + '0')) % 10
+        return last in (str(check), 'JABCDEFGHI'[check])
+
+    return True
+
+
+def is_fi_checksum_valid(vat_number):
+    return _weighted_sum(vat_number, (7, 9, 10, 5, 8, 4, 2, 1)) % 11 == 0
+
+
+def is_fr_checksum_valid(vat_number):
+    # Only numeric keys have a single known check algorithm.
+    if not vat_number[:2].isdigit():
+        return True
+
+    return int(vat_number[:2]) == (12 + 3 * (int(vat_number[2:]) % 97)) % 97
+
+
+def is_gb_checksum_valid(vat_number):
+    # Government departments and health authorities.
+    if vat_number.startswith('GD'):
+        return int(vat_number[2:]) < 500
+    if vat_number.startswith('HA'):
+        return int(vat_number[2:]) >= 500
+
+    total = _weighted_sum(vat_number, (8, 7, 6, 5, 4, 3, 2)) + \
+        int(vat_number[7:9])
+    return total % 97 == 0 or (total + 55) % 97 == 0
+
+
+def is_gr_checksum_valid(vat_number):
+    total = _weighted_sum(vat_number, (256, 128, 64, 32, 16, 8, 4, 2))
+    return total % 11 % 10 == int(vat_number[8])
+
+
+def is_hr_checksum_valid(vat_number):
+    return _mod_11_10_is_valid(vat_number)
+
+
+def is_hu_checksum_valid(vat_number):
+    return _weighted_sum(vat_number, (9, 7, 3, 1, 9, 7, 3, 1)) % 10 == 0
+
+
+IE_CHECK_LETTERS = 'WABCDEFGHIJKLMNOPQRSTUV'
+"""Check letters of Irish numbers by remainder modulo 23.
+"""
+
+
+def is_ie_checksum_valid(vat_number):
+    # Old style numbers with a letter in the second position are converted to
+    # the new style.
+    if vat_number[1].isalpha() and len(vat_number) == 8:
+        vat_number = '0' + vat_number[2:7] + vat_number[0] + vat_number[7]
+
+    # Only seven digits followed by one or two letters are checked.
+    if not vat_number[:7].isdigit() or len(vat_number) not in (8, 9):
+        return True
+
+    total = _weighted_sum(vat_number, (8, 7, 6, 5, 4, 3, 2))
+    if len(vat_number) == 9:
+        if vat_number[8] not in IE_CHECK_LETTERS:
+            return True
+        total += 9 * IE_CHECK_LETTERS.index(vat_number[8])
+    return IE_CHECK_LETTERS[total % 23] == vat_number[7]
+
+
+def is_it_checksum_valid(vat_number):
+    return _luhn_checksum(vat_number) == 0
+
+
+def is_lt_checksum_valid(vat_number):
+    digits = vat_number[:-1]
+    check = sum((1 + i % 9) * int(digit)
+                for i, digit in enumerate(digits)) % 11
+    if check == 10:
+        check = sum((1 + (i + 2) % 9) * int(digit)
+                    for i, digit in enumerate(digits)) % 11
+    return check % 10 == int(vat_number[-1])
+
+
+def is_lu_checksum_valid(vat_number):
+    return int(vat_number[:6]) % 89 == int(vat_number[6:])
+
+
+def is_lv_checksum_valid(vat_number):
+    # Only legal entities have a single known check digit algorithm.
+    if vat_number[0] <= '3':
+        return True
+
+    return _weighted_sum(vat_number,
+                         (9, 1, 4, 8, 3, 10, 2, 5, 7, 6, 1)) % 11 == 3
+
+
+def is_mt_checksum_valid(vat_number):
+    return _weighted_sum(vat_number, (3, 4, 6, 7, 8, 9, 10, 1)) % 37 == 0
+
+
+def is_nl_checksum_valid(vat_number):
+    # Numbers derived from the citizen service number (BSN/RSIN).
+    if (_weighted_sum(vat_number, (9, 8, 7, 6, 5, 4, 3, 2)) -
+            int(vat_number[8])) % 11 == 0:
+        return True
+
+    # Sole proprietors' numbers since 2020 are checked by ISO 7064 Mod 97, 10
+    # over the prefixed number with letters converted to numbers.
+    converted = ''.join(str(int(c, 36)) for c in 'NL' + vat_number)
+    return int(converted) % 97 == 1
+
+
+def is_pl_checksum_valid(vat_number):
+    check = _weighted_sum(vat_number, (6, 5, 7, 2, 3, 4, 5, 6, 7)) % 11
+    return check == int(vat_number[9])
+
+
+def is_pt_checksum_valid(vat_number):
+    check = (11 - _weighted_sum(vat_number, (9, 8, 7, 6, 5, 4, 3, 2))) % 11
+    return check % 10 == int(vat_number[8])
+
+
+def is_ro_checksum_valid(vat_number):
+    vat_number = vat_number.zfill(10)
+    check = 10 * _weighted_sum(vat_number, (7, 5, 3, 2, 1, 7, 5, 3, 2)) % 11
+    return check % 10 == int(vat_number[9])
+
+
+def is_se_checksum_valid(vat_number):
+    return _luhn_checksum(vat_number[:10]) == 0
+
+
+def is_si_checksum_valid(vat_number):
+    check = 11 - _weighted_sum(vat_number, (8, 7, 6, 5, 4, 3, 2)) % 11
+    if check == 11:
+        return False
+    return check % 10 == int(vat_number[7])
+
+
+def is_sk_checksum_valid(vat_number):
+    return int(vat_number) % 11 == 0
+
+
+VAT_NUMBER_CHECKSUMS = {
+    'AT': is_at_checksum_valid,
+    'BE': is_be_checksum_valid,
+    'BG': is_bg_checksum_valid,
+    'CY': is_cy_checksum_valid,
+    'DE': is_de_checksum_valid,
+    'DK': is_dk_checksum_valid,
+    'EE': is_ee_checksum_valid,
+    'ES': is_es_checksum_valid,
+    'FI': is_fi_checksum_valid,
+    'FR': is_fr_checksum_valid,
+    'GB': is_gb_checksum_valid,
+    'GR': is_gr_checksum_valid,
+    'HR': is_hr_checksum_valid,
+    'HU': is_hu_checksum_valid,
+    'IE': is_ie_checksum_valid,
+    'IT': is_it_checksum_valid,
+    'LT': is_lt_checksum_valid,
+    'LU': is_lu_checksum_valid,
+    'LV': is_lv_checksum_valid,
+    'MT': is_mt_checksum_valid,
+    'NL': is_nl_checksum_valid,
+    'PL': is_pl_checksum_valid,
+    'PT': is_pt_checksum_valid,
+    'RO': is_ro_checksum_valid,
+    'SE': is_se_checksum_valid,
+    'SI': is_si_checksum_valid,
+    'SK': is_sk_checksum_valid,
+}
+"""VAT number checksums.
+
+Mapping from ISO 3166-1-alpha-2 country codes to a function testing the check
+digits of a VAT number from the given country excluding the country code
+prefix. Countries without check digits or a reliable check digit algorithm,
+such as the Czech Republic, are not included.
+"""
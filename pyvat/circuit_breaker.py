@@ -0,0 +1,254 @@
+import threading
+import time
+
+
+CLOSED = 'closed'
+"""Circuit state in which checks are made.
+"""
+
+OPEN = 'open'
+"""Circuit state in which checks are rejected.
+"""
+
+HALF_OPEN = 'half_open'
+"""Circuit state in which a limited number of trial checks are made.
+"""
+
+
+CLIENT_FAULT_CODES = frozenset([
+    'INVALID_INPUT',
+    'INVALID_REQUESTER_INFO',
+])
+"""Fault codes caused by the request rather than the availability of the
+registry, which are not counted as failures.
+"""
+
+
+class _Circuit(object):
+    """Circuit state of a single country.
+    """
+
+    __slots__ = ('state', 'failures', 'opened_at', 'trials', 'trial_at')
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.trials = 0
+        self.trial_at = None
+
+
+class CircuitBreaker(object):
+    """Circuit breaker for registry checks by country.
+
+    Every country has its own circuit. A circuit is closed until
+    ``failure_threshold`` consecutive checks for the country fail, i.e. time
+    out, fail to connect, result in a nondeterministic result or in a fault
+    other than one of :data:`CLIENT_FAULT_CODES`. The circuit then opens and
+    checks are rejected without a request for ``reset_timeout`` seconds,
+    after which the circuit is half-open and up to ``half_open_trials`` trial
+    checks are made. The circuit closes if a trial check succeeds and opens
+    again if it fails. The circuit breaker is safe to share between threads.
+
+    :ivar rejections: Number of checks rejected by open circuits.
+    """
+
+    def __init__(self,
+                 failure_threshold=5,
+                 reset_timeout=30,
+                 half_open_trials=1,
+                 clock=time.time):
+        """Initialize a circuit breaker.
+
+        :param failure_threshold:
+            Number of consecutive failed checks after which the circuit of a
+            country opens. Default 5.
+        :type failure_threshold: int
+        :param reset_timeout:
+            Number of seconds a circuit stays open before trial checks are
+            made. Default 30.
+        :type reset_timeout: float
+        :param half_open_trials:
+            Maximum number of concurrent trial checks of a half-open circuit.
+            Default 1.
+        :type half_open_trials: int
+        :param clock: Function returning the current time in seconds.
+        """
+
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_trials = half_open_trials
+        self.clock = clock
+
+        self.rejections = 0
+
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def _get_circuit(self, country_code):
+        circuit = self._circuits.get(country_code)
+        if circuit is None:
+            circuit = self._circuits[country_code] = _Circuit()
+        return circuit
+
+    def get_state(self, country_code):
+        """Get the state of the circuit of a country.
+
+        :param country_code: Country code.
+        :returns: one of :data:`CLOSED`, :data:`OPEN` or :data:`HALF_OPEN`.
+        """
+
+        with self._lock:
+            circuit = self._circuits.get(country_code)
+            if circuit is None:
+                return CLOSED
+
+            if circuit.state == OPEN and \
+               self.clock() - circuit.opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return circuit.state
+
+    def allow(self, country_code):
+        """Test if a check for a country may be made.
+
+        Every allowed check must be followed by a call to :meth:`record` or
+        :meth:`record_fault`, or to :meth:`release` if the check is not made
+        after all.
+
+        :param country_code: Country code.
+        :rtype: bool
+        """
+
+        with self._lock:
+            circuit = self._circuits.get(country_code)
+            if circuit is None or circuit.state == CLOSED:
+                return True
+
+            now = self.clock()
+
+            if circuit.state == OPEN:
+                if now - circuit.opened_at < self.reset_timeout:
+                    self.rejections += 1
+                    return False
+                circuit.state = HALF_OPEN
+                circuit.trials = 0
+
+            # Trial checks that were never recorded, e.g. due to being
+            # cancelled, are given up on after the reset timeout.
+            if circuit.trials >= self.half_open_trials and \
+               now - circuit.trial_at < self.reset_timeout:
+                self.rejections += 1
+                return False
+
+            if circuit.trials >= self.half_open_trials:
+                circuit.trials = 0
+            circuit.trials += 1
+            circuit.trial_at = now
+            return True
+
+    def release(self, country_code):
+        """Release an allowed check that was not made, e.g. as it was rejected
+        by a rate limiter, without recording an outcome.
+
+        Frees the trial check of a half-open circuit for another check.
+
+        :param country_code: Country code.
+        """
+
+        with self._lock:
+            circuit = self._circuits.get(country_code)
+            if circuit is not None and circuit.state == HALF_OPEN and \
+               circuit.trials > 0:
+                circuit.trials -= 1
+
+    def record(self, country_code, result):
+        """Record the result of a check.
+
+        :param country_code: Country code.
+        :param result: Check result.
+        :type result: pyvat.VatNumberCheckResult
+        """
+
+        if result.is_valid is None:
+            self.record_failure(country_code)
+        else:
+            self.record_success(country_code)
+
+    def record_fault(self, country_code, fault_code):
+        """Record a check resulting in a fault.
+
+        :param country_code: Country code.
+        :param fault_code: Fault code of the registry.
+        """
+
+        if fault_code in CLIENT_FAULT_CODES:
+            self.record_success(country_code)
+        else:
+            self.record_failure(country_code)
+
+    def record_success(self, country_code):
+        """Record a successful check, closing the circuit.
+
+        :param country_code: Country code.
+        """
+
+        with self._lock:
+            circuit = self._circuits.get(country_code)
+            if circuit is not None:
+                circuit.state = CLOSED
+                circuit.failures = 0
+                circuit.trials = 0
+
+    def record_failure(self, country_code):
+        """Record a failed check, opening the circuit if warranted.
+
+        :param country_code: Country code.
+        """
+
+        with self._lock:
+            circuit = self._get_circuit(country_code)
+            circuit.failures += 1
+
+            if circuit.state == HALF_OPEN or \
+               circuit.failures >= self.failure_threshold:
+                self._open(circuit)
+
+    def set_available(self, country_code, available):
+        """Set the availability of the registry for a country.
+
+        Used to learn of availability up front, e.g. from
+        :meth:`pyvat.registries.ViesRegistry.check_status`. Unavailable
+        countries have their circuits opened, whereas available countries
+        have their circuits closed.
+
+        :param country_code: Country code.
+        :param available: Whether the registry is available.
+        :type available: bool
+        """
+
+        if available:
+            self.record_success(country_code)
+        else:
+            with self._lock:
+                self._open(self._get_circuit(country_code))
+
+    def _open(self, circuit):
+        circuit.state = OPEN
+        circuit.opened_at = self.clock()
+        circuit.trials = 0
+
+    def reset(self):
+        """Close all circuits.
+        """
+
+        with self._lock:
+            self._circuits.clear()
+
+
+__all__ = (
+    'CircuitBreaker',
+    'CLIENT_FAULT_CODES',
+    'CLOSED',
+    'HALF_OPEN',
+    'OPEN',
+)
@@ -1,11 +1,47 @@
 from enum import Enum
 
 
+class ItemTypeCategory(Enum):
+    """Item type category.
+
+    Every category has a corresponding precomputed ``is_<category>`` flag on
+    all item types, e.g. :attr:`ItemType.is_electronic_service`.
+    """
+
+    physical_good = 1
+    """Physical good.
+    """
+
+    electronic_service = 2
+    """Electronically supplied service.
+    """
+
+    telecommunications_service = 3
+    """Telecommunications service.
+    """
+
+    broadcasting_service = 4
+    """Broadcasting service.
+    """
+
+
 class ItemType(Enum):
     """Item type.
 
     If no item type matches the type of item being sold, it is currently not
     supported by pyvat.
+
+    Category membership is precomputed when the module is loaded, so the
+    following attributes are constant time reads:
+
+    :ivar categories: :class:`frozenset` of the item type's categories.
+    :ivar is_physical_good: Whether the item type is a physical good.
+    :ivar is_electronic_service:
+        Whether the item type is an electronically supplied service.
+    :ivar is_telecommunications_service:
+        Whether the item type is a telecommunications service.
+    :ivar is_broadcasting_service:
+        Whether the item type is a broadcasting service.
     """
 
     generic_physical_good = 1
@@ -43,17 +79,63 @@ class ItemType(Enum):
     """E-newspaper.
     """
 
-    @property
-    def is_electronic_service(self):
-        return self in frozenset([ItemType.generic_electronic_service,
-                                  ItemType.ebook,
-                                  ItemType.enewspaper])
-
-    @property
-    def is_telecommunications_service(self):
-        return self in frozenset([ItemType.generic_telecommunications_service])
-
-    @property
-    def is_broadcasting_service(self):
-        return self in frozenset([ItemType.generic_broadcasting_service,
-                                  ItemType.prepaid_broadcasting_service])
+    @classmethod
+    def of_category(cls, category):
+        """Get the item types in a category.
+
+        :param category: Item type category.
+        :type category: ItemTypeCategory
+        :rtype: frozenset
+        """
+
+        return _ITEM_TYPES_BY_CATEGORY[category]
+
+
+ITEM_TYPE_CATEGORIES = {
+    ItemType.generic_physical_good: [
+        ItemTypeCategory.physical_good,
+    ],
+    ItemType.generic_electronic_service: [
+        ItemTypeCategory.electronic_service,
+    ],
+    ItemType.generic_telecommunications_service: [
+        ItemTypeCategory.telecommunications_service,
+    ],
+    ItemType.generic_broadcasting_service: [
+        ItemTypeCategory.broadcasting_service,
+    ],
+    ItemType.prepaid_broadcasting_service: [
+        ItemTypeCategory.broadcasting_service,
+    ],
+    ItemType.ebook: [
+        ItemTypeCategory.electronic_service,
+    ],
+    ItemType.enewspaper: [
+        ItemTypeCategory.electronic_service,
+    ],
+}
+"""Categories of every item type.
+
+Mapping from item types to the categories they belong to. Category membership
+is precomputed into attributes of the item types, so new item types must be
+added here.
+"""
+
+
+_ITEM_TYPES_BY_CATEGORY = dict(
+    (category, frozenset(item_type
+                         for item_type in ItemType
+                         if category in ITEM_TYPE_CATEGORIES[item_type]))
+    for category in ItemTypeCategory
+)
+"""Item types by category.
+"""
+
+
+for _item_type in ItemType:
+    _item_type.categories = frozenset(ITEM_TYPE_CATEGORIES[_item_type])
+    for _category in ItemTypeCategory:
+        setattr(_item_type,
+                'is_%s' % (_category.name),
+                _category in _item_type.categories)
+del _item_type, _category
@@ -1,9 +1,16 @@
+from .countries import ISO_3166_1_ALPHA_2_COUNTRY_CODES
+
+
 class Party(object):
     """Trading party.
 
     Represents either a consumer or business in a given country acting as a
     party to a transaction.
 
+    Parties are immutable and hashable, and equal if both their country code
+    and whether they are a business are equal. Shared instances can be
+    obtained through :meth:`of`.
+
     :ivar country_code:
         Party's legal or effective country of registration or residence as an
         ISO 3166-1 alpha-2 country code.
@@ -12,6 +19,15 @@ class Party(object):
     :type is_business: bool
     """
 
+    __slots__ = ('country_code', 'is_business')
+
+    _instances = {}
+    """Shared instances by class, country code and business flag.
+
+    Only parties of ISO 3166-1 alpha-2 countries are shared, so parties of
+    arbitrary country codes do not accumulate.
+    """
+
     def __init__(self, country_code, is_business):
         """Initialize a trading party.
 
@@ -23,8 +39,51 @@ class Party(object):
         :type is_business: bool
         """
 
-        self.country_code = country_code
-        self.is_business = is_business
+        object.__setattr__(self, 'country_code', country_code)
+        object.__setattr__(self, 'is_business', is_business)
+
+    @classmethod
+    def of(cls, country_code, is_business):
+        """Get the shared trading party for a country and business flag.
+
+        :param country_code:
+            Party's legal or effective country of registration or residence as
+            an ISO 3166-1 alpha-2 country code.
+        :type country_code: str
+        :param is_business: Whether the part is a legal business entity.
+        :type is_business: bool
+        :rtype: Party
+        """
+
+        key = (cls, country_code, is_business)
+        party = cls._instances.get(key)
+        if party is None:
+            party = cls(country_code, is_business)
+            if country_code in ISO_3166_1_ALPHA_2_COUNTRY_CODES:
+                party = cls._instances.setdefault(key, party)
+        return party
+
+    def __setattr__(self, name, value):
+        raise AttributeError('%s is immutable' % (self.__class__.__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError('%s is immutable' % (self.__class__.__name__))
+
+    def __reduce__(self):
+        return (self.__class__, (self.country_code, self.is_business))
+
+    def __eq__(self, other):
+        if not isinstance(other, Party):
+            return NotImplemented
+        return self.country_code == other.country_code and \
+            self.is_business == other.is_business
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        return hash((self.country_code, self.is_business))
 
     def __repr__(self):
         return '<pyvat.Party: country code = %s, is business = %r>' % (
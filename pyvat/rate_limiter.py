@@ -0,0 +1,298 @@
+import heapq
+import threading
+import time
+
+
+GLOBAL_MAX_CONCURRENT_REQ = 'GLOBAL_MAX_CONCURRENT_REQ'
+"""Fault code of the VIES service when its global concurrency limit is hit.
+"""
+
+MS_MAX_CONCURRENT_REQ = 'MS_MAX_CONCURRENT_REQ'
+"""Fault code of the VIES service when the concurrency limit of a member state
+is hit.
+"""
+
+
+class _TokenBucket(object):
+    """Token bucket.
+
+    Kept as the time the bucket is next refilled to hold no more than the
+    burst size less one token, which is equivalent to counting tokens but
+    allows tokens to be reserved ahead of time.
+    """
+
+    __slots__ = ('max_rate', 'rate', 'burst', 'ready_at', 'slowed_at')
+
+    def __init__(self, rate, burst):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = burst
+        self.ready_at = float('-inf')
+        self.slowed_at = float('-inf')
+
+    def get_start(self, now):
+        """Get the earliest time a token is available.
+        """
+
+        return max(now, self.ready_at - (self.burst - 1) / self.rate)
+
+    def take(self, start):
+        """Take a token at a time no earlier than :meth:`get_start`.
+        """
+
+        self.ready_at = max(self.ready_at, start) + 1.0 / self.rate
+
+
+class RateLimiter(object):
+    """Token bucket rate limiter for registry checks.
+
+    Checks take a token from a global bucket and from the bucket of their
+    country, each of which is optional. Checks for which no token is available
+    wait in a bounded queue until one is, in the order they arrived, whereas
+    checks arriving at a full queue or that would have to wait for longer than
+    ``max_wait`` seconds are rejected.
+
+    The rates adapt to the concurrency limits of the VIES service: a
+    :data:`GLOBAL_MAX_CONCURRENT_REQ` fault slows the global bucket down and a
+    :data:`MS_MAX_CONCURRENT_REQ` fault slows the bucket of the country down,
+    or the global bucket if countries have no buckets, after which successful
+    checks gradually speed the buckets back up to the configured rates. The
+    rate limiter is safe to share between threads.
+
+    :ivar rejections: Number of checks rejected.
+    :ivar delayed: Number of checks that waited for a token.
+    """
+
+    SLOW_DOWN_FACTOR = 0.5
+    """Factor a bucket's rate is multiplied by when slowed down.
+    """
+
+    SLOW_DOWN_INTERVAL = 1.0
+    """Minimum number of seconds between slowing a bucket down, so a burst of
+    faults caused by the same overload only slows the bucket down once.
+    """
+
+    MIN_RATE_FACTOR = 0.1
+    """Fraction of the configured rate below which a bucket is not slowed
+    down.
+    """
+
+    SPEED_UP_FACTOR = 0.01
+    """Fraction of the configured rate a bucket's rate is increased by for
+    every successful check.
+    """
+
+    def __init__(self,
+                 rate=None,
+                 burst=1,
+                 country_rate=None,
+                 country_burst=1,
+                 country_rates=None,
+                 max_queue=100,
+                 max_wait=None,
+                 clock=time.time,
+                 sleep=time.sleep):
+        """Initialize a rate limiter.
+
+        :param rate:
+            Maximum number of checks per second in total. Default ``None``
+            not limiting the total rate.
+        :type rate: float
+        :param burst:
+            Number of checks allowed at once in total after being idle.
+            Default 1.
+        :type burst: int
+        :param country_rate:
+            Maximum number of checks per second for every country. Default
+            ``None`` not limiting the rate by country.
+        :type country_rate: float
+        :param country_burst:
+            Number of checks allowed at once for a country after being idle.
+            Default 1.
+        :type country_burst: int
+        :param country_rates:
+            Optional mapping from country codes to the maximum number of
+            checks per second for the country, overriding ``country_rate``.
+        :type country_rates: dict
+        :param max_queue:
+            Maximum number of checks waiting for a token. Default 100.
+        :type max_queue: int
+        :param max_wait:
+            Maximum number of seconds a check waits for a token. Default
+            ``None`` only bounding the queue by its length.
+        :type max_wait: float
+        :param clock: Function returning the current time in seconds.
+        :param sleep: Function sleeping for a number of seconds.
+        """
+
+        self.country_rate = country_rate
+        self.country_burst = country_burst
+        self.country_rates = dict(country_rates or {})
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.clock = clock
+        self.sleep = sleep
+
+        self.rejections = 0
+        self.delayed = 0
+
+        self._bucket = None if rate is None else _TokenBucket(rate, burst)
+        self._country_buckets = {}
+        self._queue = []
+        self._lock = threading.Lock()
+
+    def _get_country_bucket(self, country_code):
+        bucket = self._country_buckets.get(country_code)
+        if bucket is None:
+            rate = self.country_rates.get(country_code, self.country_rate)
+            if rate is None:
+                return None
+            bucket = self._country_buckets[country_code] = _TokenBucket(
+                rate, self.country_burst
+            )
+        return bucket
+
+    def _get_buckets(self, country_code):
+        return [bucket for bucket in (self._bucket,
+                                      self._get_country_bucket(country_code))
+                if bucket is not None]
+
+    def get_rate(self, country_code=None):
+        """Get the current rate of a bucket.
+
+        :param country_code:
+            Country code of the bucket. Default ``None`` getting the rate of
+            the global bucket.
+        :returns:
+            the number of checks per second or ``None`` if the rate is not
+            limited.
+        """
+
+        with self._lock:
+            if country_code is None:
+                bucket = self._bucket
+            else:
+                bucket = self._get_country_bucket(country_code)
+            return None if bucket is None else bucket.rate
+
+    def reserve(self, country_code, wait=True):
+        """Reserve a token for a check.
+
+        :param country_code: Country code.
+        :param wait:
+            Whether the check may wait for a token. Default ``True``.
+        :type wait: bool
+        :returns:
+            the number of seconds to wait before making the check or ``None``
+            if the check is rejected.
+        :rtype: float
+        """
+
+        with self._lock:
+            buckets = self._get_buckets(country_code)
+            if not buckets:
+                return 0.0
+
+            now = self.clock()
+
+            # Drop checks that are done waiting from the queue.
+            queue = self._queue
+            while queue and queue[0] <= now:
+                heapq.heappop(queue)
+
+            # The check waits until every bucket has a token, and takes all of
+            # them at the time it is made, so it counts against each rate at
+            # the right time.
+            start = max(bucket.get_start(now) for bucket in buckets)
+            delay = start - now
+
+            if delay > 0:
+                if not wait or \
+                   len(queue) >= self.max_queue or \
+                   (self.max_wait is not None and delay > self.max_wait):
+                    self.rejections += 1
+                    return None
+
+                heapq.heappush(queue, start)
+                self.delayed += 1
+
+            for bucket in buckets:
+                bucket.take(start)
+
+            return delay
+
+    def acquire(self, country_code):
+        """Wait for a token for a check.
+
+        :param country_code: Country code.
+        :returns: whether the check may be made.
+        :rtype: bool
+        """
+
+        delay = self.reserve(country_code)
+        if delay is None:
+            return False
+
+        if delay > 0:
+            self.sleep(delay)
+        return True
+
+    def record_success(self, country_code):
+        """Record a successful check, speeding the buckets up.
+
+        :param country_code: Country code.
+        """
+
+        with self._lock:
+            for bucket in self._get_buckets(country_code):
+                if bucket.rate < bucket.max_rate:
+                    bucket.rate = min(
+                        bucket.max_rate,
+                        bucket.rate + bucket.max_rate * self.SPEED_UP_FACTOR,
+                    )
+
+    def record_fault(self, country_code, fault_code):
+        """Record a check resulting in a fault.
+
+        Slows the global or country bucket down if the fault indicates that
+        a concurrency limit of the registry was hit.
+
+        :param country_code: Country code.
+        :param fault_code: Fault code of the registry.
+        """
+
+        with self._lock:
+            if fault_code == GLOBAL_MAX_CONCURRENT_REQ:
+                bucket = self._bucket
+            elif fault_code == MS_MAX_CONCURRENT_REQ:
+                bucket = self._get_country_bucket(country_code) or \
+                    self._bucket
+            else:
+                return
+
+            now = self.clock()
+            if bucket is None or \
+               now - bucket.slowed_at < self.SLOW_DOWN_INTERVAL:
+                return
+
+            bucket.rate = max(bucket.max_rate * self.MIN_RATE_FACTOR,
+                              bucket.rate * self.SLOW_DOWN_FACTOR)
+            bucket.slowed_at = now
+
+    def reset(self):
+        """Restore the configured rates and refill all buckets.
+        """
+
+        with self._lock:
+            if self._bucket is not None:
+                self._bucket = _TokenBucket(self._bucket.max_rate,
+                                            self._bucket.burst)
+            self._country_buckets.clear()
+            del self._queue[:]
+
+
+__all__ = (
+    'GLOBAL_MAX_CONCURRENT_REQ',
+    'MS_MAX_CONCURRENT_REQ',
+    'RateLimiter',
+)
@@ -1,13 +1,54 @@
-import requests
-import xml.dom.minidom
+import threading
+import time
 
-from requests import Timeout
+try:
+    from queue import Queue
+except ImportError:  # pragma: no cover
+    from Queue import Queue
 
-from .result import VatNumberCheckResult
-from .xml_utils import get_first_child_element, get_text, NodeNotFoundError
+from .result import VatNumberCheckLogEvent, VatNumberCheckResult
+from .xml_utils import parse_check_vat_response
 from .exceptions import ServerError
 
 
+class _RateLimited(Exception):
+    """Raised when an attempt to check a VAT number is rejected by the rate
+    limiter.
+
+    :ivar result: Nondeterministic result of the check.
+    :type result: VatNumberCheckResult
+    """
+
+    def __init__(self, result):
+        super(_RateLimited, self).__init__()
+        self.result = result
+
+
+class _InFlightCheck(object):
+    """VAT number check in flight, shared by concurrent callers.
+    """
+
+    __slots__ = ('done', 'result', 'exception')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exception = None
+
+
+class _HedgedRequest(object):
+    """Second request of a hedged VAT number check.
+    """
+
+    __slots__ = ('lock', 'answered', 'sent', 'outcome')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.answered = threading.Event()
+        self.sent = False
+        self.outcome = Queue()
+
+
 class Registry(object):
     """Abstract base registry.
 
@@ -35,10 +76,587 @@ class ViesRegistry(Registry):
     """URL for the VAT checking service.
     """
 
+    STATUS_SERVICE_URL = 'https://ec.europa.eu/taxation_customs/vies/' \
+        'rest-api/check-status'
+    """URL for the VIES availability status service.
+    """
+
     DEFAULT_TIMEOUT = 8
     """Timeout for the requests."""
 
+    DEFAULT_POOL_SIZE = 10
+    """Default maximum number of pooled connections to the VIES service.
+    """
+
+    DEFAULT_MAX_IDLE = 30
+    """Default maximum number of seconds a pooled connection may be idle.
+    """
+
+    def __init__(self,
+                 pool_size=None,
+                 max_idle=None,
+                 cache=None,
+                 capture_bodies=True,
+                 service_url=None,
+                 circuit_breaker=None,
+                 status_url=None,
+                 coalesce=True,
+                 rate_limiter=None,
+                 retry_policy=None,
+                 hedging_policy=None):
+        """Initialize a VIES registry.
+
+        Requests to the VIES service are made through a pool of persistent
+        connections shared by all threads using the registry.
+
+        :param pool_size:
+            Maximum number of connections kept open to the VIES service.
+            Default ``None`` using :attr:`DEFAULT_POOL_SIZE`.
+        :type pool_size: int
+        :param max_idle:
+            Number of seconds after which idle pooled connections are closed
+            rather than reused. Default ``None`` using
+            :attr:`DEFAULT_MAX_IDLE`.
+        :type max_idle: float
+        :param cache:
+            Optional cache for check results. Deterministic results are cached
+            and served from the cache until they expire, whereas
+            nondeterministic results and server errors are never cached.
+            Default ``None`` disabling caching.
+        :type cache: pyvat.cache.ResultCache
+        :param capture_bodies:
+            Whether to keep the request and response bodies in the check log
+            of results. Default ``True``.
+        :type capture_bodies: bool
+        :param service_url:
+            URL of the VAT checking service, e.g. of a local stand-in for the
+            VIES service. Default ``None`` using
+            :attr:`CHECK_VAT_SERVICE_URL`.
+        :type service_url: str
+        :param circuit_breaker:
+            Optional circuit breaker by country. Checks for countries whose
+            circuit is open are answered with a nondeterministic result
+            without making a request. Default ``None`` always making
+            requests.
+        :type circuit_breaker: pyvat.circuit_breaker.CircuitBreaker
+        :param status_url:
+            URL of the VIES availability status service used by
+            :meth:`check_status`. Default ``None`` using
+            :attr:`STATUS_SERVICE_URL`.
+        :type status_url: str
+        :param coalesce:
+            Whether concurrent checks of the same VAT number share a single
+            request to the VIES service, all receiving its result. Default
+            ``True``.
+        :type coalesce: bool
+        :param rate_limiter:
+            Optional rate limiter of the requests to the VIES service. Checks
+            rejected by the rate limiter are answered with a nondeterministic
+            result without making a request. Default ``None`` not limiting
+            the rate of requests.
+        :type rate_limiter: pyvat.rate_limiter.RateLimiter
+        :param retry_policy:
+            Optional policy for retrying checks after transient faults,
+            timeouts and exceptions. Default ``None`` making a single attempt.
+        :type retry_policy: pyvat.retry.RetryPolicy
+        :param hedging_policy:
+            Optional policy for making a second request when a check takes
+            longer than most recent checks. Default ``None`` never making a
+            second request.
+        :type hedging_policy: pyvat.retry.HedgingPolicy
+        """
+
+        self.pool_size = pool_size or self.DEFAULT_POOL_SIZE
+        self.max_idle = max_idle or self.DEFAULT_MAX_IDLE
+        self.cache = cache
+        self.capture_bodies = capture_bodies
+        self.service_url = service_url or self.CHECK_VAT_SERVICE_URL
+        self.circuit_breaker = circuit_breaker
+        self.status_url = status_url or self.STATUS_SERVICE_URL
+        self.coalesce = coalesce
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.hedging_policy = hedging_policy
+
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+
+        self._adapter = None
+        self._adapter_lock = threading.Lock()
+        self._last_used = None
+        self._local = threading.local()
+
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_adapter(self):
+        """Get the connection pool adapter, closing idle connections.
+
+        :rtype: requests.adapters.HTTPAdapter
+        """
+
+        from requests.adapters import HTTPAdapter
+
+        with self._adapter_lock:
+            now = time.time()
+
+            if self._adapter is None:
+                self._adapter = HTTPAdapter(pool_connections=1,
+                                            pool_maxsize=self.pool_size)
+            elif now - self._last_used > self.max_idle:
+                # Close connections that have been idle for too long rather
+                # than risking the server having dropped them.
+                self._adapter.close()
+
+            self._last_used = now
+            return self._adapter
+
+    def _get_session(self):
+        """Get the HTTP session for the current thread.
+
+        Sessions are not shared between threads, but all sessions use the same
+        connection pool adapter.
+
+        :rtype: requests.Session
+        """
+
+        import requests
+
+        adapter = self._get_adapter()
+
+        session = getattr(self._local, 'session', None)
+        if session is None or session.adapters.get('http://') is not adapter:
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._local.session = session
+
+        return session
+
+    def _get_executor(self):
+        """Get the executor making hedged requests.
+
+        The executor's threads are kept between checks, so each of them
+        reuses its HTTP session.
+
+        :rtype: concurrent.futures.ThreadPoolExecutor
+        """
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with self._executor_lock:
+            if self._executor is None:
+                # Leave room for waiting to make the second requests of more
+                # hedged checks than there are pooled connections.
+                self._executor = ThreadPoolExecutor(
+                    max_workers=2 * self.pool_size
+                )
+            return self._executor
+
+    def close(self):
+        """Close all pooled connections and stop the threads making hedged
+        requests once they are done.
+        """
+
+        with self._adapter_lock:
+            if self._adapter is not None:
+                self._adapter.close()
+                self._adapter = None
+
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
     def check_vat_number(self, vat_number, country_code):
+        cache = self.cache
+        if cache is not None:
+            result = cache.get(vat_number, country_code)
+            if result is not None:
+                return result
+
+        if not self.coalesce:
+            return self._check_vat_number_guarded(vat_number, country_code)
+
+        # Join a check of the same VAT number already in flight, if any.
+        key = (country_code, vat_number)
+
+        with self._in_flight_lock:
+            check = self._in_flight.get(key)
+            leader = check is None
+            if leader:
+                check = self._in_flight[key] = _InFlightCheck()
+
+        if not leader:
+            check.done.wait()
+            if check.exception is not None:
+                raise check.exception
+            return self._make_coalesced_result(check.result)
+
+        try:
+            check.result = self._check_vat_number_guarded(vat_number,
+                                                          country_code)
+        except BaseException as e:
+            check.exception = e
+            raise
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+            check.done.set()
+
+        return check.result
+
+    def _check_vat_number_guarded(self, vat_number, country_code):
+        """Check a VAT number through the circuit breaker, caching the result.
+
+        The circuit breaker records the outcome of the check once all of its
+        attempts are made.
+
+        :param vat_number: VAT number without country code prefix.
+        :param country_code: ISO 3166-1-alpha-2 country code.
+        :returns: a :class:`VatNumberCheckResult` instance.
+        :raises ServerError: if the VIES service responds with a fault.
+        """
+
+        circuit_breaker = self.circuit_breaker
+        if circuit_breaker is not None and \
+           not circuit_breaker.allow(country_code):
+            return self._make_circuit_open_result(country_code)
+
+        try:
+            result = self._check_vat_number_retried(vat_number, country_code)
+        except _RateLimited as e:
+            # Checks rejected by the rate limiter were never made, and say
+            # nothing about the availability of the registry.
+            if circuit_breaker is not None:
+                circuit_breaker.release(country_code)
+            result = e.result
+        except ServerError as e:
+            if circuit_breaker is not None:
+                circuit_breaker.record_fault(country_code, e.fault_code)
+            raise
+        except Exception:
+            if circuit_breaker is not None:
+                circuit_breaker.record_failure(country_code)
+            raise
+        else:
+            if circuit_breaker is not None:
+                circuit_breaker.record(country_code, result)
+
+        cache = self.cache
+        if cache is not None:
+            cache.set(vat_number, country_code, result)
+
+        return result
+
+    def _check_vat_number_retried(self, vat_number, country_code):
+        """Check a VAT number as per the retry policy.
+
+        :param vat_number: VAT number without country code prefix.
+        :param country_code: ISO 3166-1-alpha-2 country code.
+        :returns: a :class:`VatNumberCheckResult` instance.
+        :raises ServerError: if the VIES service responds with a fault.
+        :raises _RateLimited: if an attempt is rejected by the rate limiter.
+        """
+
+        retry_policy = self.retry_policy
+        log_events = []
+        attempt = 0
+
+        while True:
+            try:
+                result = self._attempt_check_vat_number(vat_number,
+                                                        country_code)
+            except ServerError as e:
+                if retry_policy is None:
+                    raise
+                delay = retry_policy.get_fault_delay(e.fault_code, attempt)
+                if delay is None:
+                    raise
+                log_events.append(VatNumberCheckLogEvent(
+                    'fault',
+                    u'< Request failed with fault %s',
+                    (e.fault_code, ),
+                ))
+            except _RateLimited as e:
+                # Rejected attempts are not retried.
+                if log_events:
+                    e.result.log_events = log_events + e.result.log_events
+                raise
+            else:
+                if retry_policy is None:
+                    break
+                delay = retry_policy.get_result_delay(result, attempt)
+                if delay is None:
+                    break
+                log_events.extend(result.log_events)
+
+            attempt += 1
+            log_events.append(VatNumberCheckLogEvent(
+                'retry',
+                u'> Retrying request in %.3f seconds, attempt %d of %d',
+                (delay, attempt + 1, retry_policy.max_attempts),
+            ))
+            time.sleep(delay)
+
+        if log_events:
+            result.log_events = log_events + result.log_events
+
+        return result
+
+    def _attempt_check_vat_number(self, vat_number, country_code):
+        """Attempt to check a VAT number through the rate limiter.
+
+        :param vat_number: VAT number without country code prefix.
+        :param country_code: ISO 3166-1-alpha-2 country code.
+        :returns: a :class:`VatNumberCheckResult` instance.
+        :raises ServerError: if the VIES service responds with a fault.
+        :raises _RateLimited: if the attempt is rejected by the rate limiter.
+        """
+
+        rate_limiter = self.rate_limiter
+        if rate_limiter is not None and \
+           not rate_limiter.acquire(country_code):
+            raise _RateLimited(self._make_rate_limited_result(country_code))
+
+        try:
+            result = self._check_vat_number_hedged(vat_number, country_code)
+        except ServerError as e:
+            if rate_limiter is not None:
+                rate_limiter.record_fault(country_code, e.fault_code)
+            raise
+
+        if rate_limiter is not None and result.is_valid is not None:
+            rate_limiter.record_success(country_code)
+
+        return result
+
+    def _check_vat_number_hedged(self, vat_number, country_code):
+        """Check a VAT number as per the hedging policy.
+
+        The first request is made by the calling thread, while a thread of a
+        shared executor makes the second request should the first one go
+        unanswered for longer than the hedging delay after being sent. As the
+        calling thread waits for its own request, the second request stands
+        in for a first request that fails or is inconclusive. Second requests
+        that are not needed are left to finish in the background.
+
+        :param vat_number: VAT number without country code prefix.
+        :param country_code: ISO 3166-1-alpha-2 country code.
+        :returns: a :class:`VatNumberCheckResult` instance.
+        :raises ServerError: if the VIES service responds with a fault.
+        """
+
+        hedging_policy = self.hedging_policy
+        if hedging_policy is None:
+            return self._check_vat_number(vat_number, country_code)
+
+        delay = hedging_policy.get_delay()
+        if delay is None:
+            return self._check_vat_number_timed(vat_number, country_code)
+
+        hedge = _HedgedRequest()
+        self._get_executor().submit(self._make_hedged_request,
+                                    hedge,
+                                    vat_number,
+                                    country_code,
+                                    time.time() + delay)
+
+        try:
+            result = self._check_vat_number_timed(vat_number, country_code)
+            exception = None
+        except Exception as e:
+            result, exception = None, e
+
+        with hedge.lock:
+            hedge.answered.set()
+            sent = hedge.sent
+
+        if sent:
+            # Use the second request's result should the first request fail
+            # or be inconclusive.
+            if result is None or result.is_valid is None:
+                other_result, other_exception = hedge.outcome.get()
+                if other_result is not None and \
+                   other_result.is_valid is not None:
+                    result, exception = other_result, other_exception
+
+            if result is not None:
+                result.log_events.insert(0, VatNumberCheckLogEvent(
+                    'hedge',
+                    u'> Second request made after %.3f seconds without a '
+                    u'response',
+                    (delay, ),
+                ))
+
+        if exception is not None:
+            raise exception
+        return result
+
+    def _make_hedged_request(self, hedge, vat_number, country_code, send_at):
+        """Make the second request of a hedged check unless the first request
+        is answered by the given time.
+
+        :param hedge: Second request of the check.
+        :type hedge: _HedgedRequest
+        :param vat_number: VAT number without country code prefix.
+        :param country_code: ISO 3166-1-alpha-2 country code.
+        :param send_at: Time at which to make the second request.
+        :type send_at: float
+        """
+
+        if hedge.answered.wait(max(0.0, send_at - time.time())):
+            return
+
+        with hedge.lock:
+            if hedge.answered.is_set():
+                return
+
+            rate_limiter = self.rate_limiter
+            if rate_limiter is not None and \
+               rate_limiter.reserve(country_code, wait=False) is None:
+                return
+
+            hedge.sent = True
+
+        try:
+            hedge.outcome.put((self._check_vat_number_timed(vat_number,
+                                                            country_code),
+                               None))
+        except Exception as e:
+            hedge.outcome.put((None, e))
+
+    def _check_vat_number_timed(self, vat_number, country_code):
+        """Check a VAT number, recording the latency of conclusive results
+        with the hedging policy.
+
+        :param vat_number: VAT number without country code prefix.
+        :param country_code: ISO 3166-1-alpha-2 country code.
+        :returns: a :class:`VatNumberCheckResult` instance.
+        :raises ServerError: if the VIES service responds with a fault.
+        """
+
+        started = time.time()
+        result = self._check_vat_number(vat_number, country_code)
+
+        hedging_policy = self.hedging_policy
+        if hedging_policy is not None and result.is_valid is not None:
+            hedging_policy.record(time.time() - started)
+
+        return result
+
+    def _make_rate_limited_result(self, country_code):
+        """Make the result of a check rejected by the rate limiter.
+
+        :param country_code: ISO 3166-1-alpha-2 country code.
+        :returns: a nondeterministic :class:`VatNumberCheckResult` instance.
+        """
+
+        result = VatNumberCheckResult()
+        result.log('rate_limited',
+                   u'> Request to EU VIES registry not made as the rate limit '
+                   u'for %s is exceeded',
+                   country_code)
+        return result
+
+    def _make_coalesced_result(self, result):
+        """Make the result of a check coalesced with a concurrent check.
+
+        Every caller receives its own result, so results can be modified
+        without affecting other callers.
+
+        :param result: Result of the concurrent check.
+        :type result: VatNumberCheckResult
+        :returns: a :class:`VatNumberCheckResult` instance.
+        """
+
+        coalesced = VatNumberCheckResult(
+            result.is_valid,
+            business_name=result.business_name,
+            business_address=result.business_address,
+        )
+        coalesced.log_events = list(result.log_events)
+        coalesced.log('coalesced',
+                      u'< Result shared with a concurrent check of the same '
+                      u'VAT number')
+        return coalesced
+
+    def _make_circuit_open_result(self, country_code):
+        """Make the result of a check rejected by an open circuit.
+
+        :param country_code: ISO 3166-1-alpha-2 country code.
+        :returns: a nondeterministic :class:`VatNumberCheckResult` instance.
+        """
+
+        result = VatNumberCheckResult()
+        result.log('circuit_open',
+                   u'> Request to EU VIES registry not made as the circuit '
+                   u'for %s is open',
+                   country_code)
+        return result
+
+    def check_status(self):
+        """Check the availability of the VIES service by country.
+
+        The availability is fed to the circuit breaker of the registry, if
+        any, opening the circuits of unavailable countries up front.
+
+        :returns:
+            a :class:`dict` mapping ISO 3166-1-alpha-2 country codes to
+            whether the VIES service is available for the country.
+        :raises ValueError: if the status response is malformed.
+        :raises requests.RequestException: if the status request fails.
+        """
+
+        response = self._get_session().get(self.status_url,
+                                           timeout=self.DEFAULT_TIMEOUT)
+        response.raise_for_status()
+
+        return self._set_availability(response.json())
+
+    def _set_availability(self, status):
+        """Set the availability of the VIES service by country from a status
+        response.
+
+        :param status: Decoded JSON status response.
+        :returns:
+            a :class:`dict` mapping ISO 3166-1-alpha-2 country codes to
+            whether the VIES service is available for the country.
+        :raises ValueError: if the status response is malformed.
+        """
+
+        try:
+            availability = {}
+            for country in status['countries']:
+                country_code = country['countryCode']
+
+                # Non-ISO code used for Greece.
+                if country_code == 'EL':
+                    country_code = 'GR'
+
+                availability[country_code] = \
+                    country['availability'] != 'Unavailable'
+        except (KeyError, TypeError) as e:
+            raise ValueError('malformed VIES status response: %r' % (e, ))
+
+        circuit_breaker = self.circuit_breaker
+        if circuit_breaker is not None:
+            for country_code, available in availability.items():
+                circuit_breaker.set_available(country_code, available)
+
+        return availability
+
+    def _check_vat_number(self, vat_number, country_code):
+        """Check a VAT number against the VIES service.
+
+        :param vat_number: VAT number without country code prefix.
+        :param country_code: ISO 3166-1-alpha-2 country code.
+        :returns: a :class:`VatNumberCheckResult` instance.
+        :raises ServerError: if the VIES service responds with a fault.
+        """
+
+        from requests import Timeout
+
         # Non-ISO code used for Greece.
         if country_code == 'GR':
             country_code = 'EL'
@@ -46,138 +664,144 @@ class ViesRegistry(Registry):
         # Request information about the VAT number.
         result = VatNumberCheckResult()
 
-        request_data = (
-                u'<?xml version="1.0" encoding="UTF-8"?><SOAP-ENV:Envelope'
-                u' xmlns:ns0="urn:ec.europa.eu:taxud:vies:services:checkVa'
-                u't:types" xmlns:ns1="http://schemas.xmlsoap.org/soap/enve'
-                u'lope/" xmlns:xsi="http://www.w3.org/2001/XMLSchema-insta'
-                u'nce" xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/env'
-                u'elope/"><SOAP-ENV:Header/><ns1:Body><ns0:checkVat><ns0:c'
-                u'ountryCode>%s</ns0:countryCode><ns0:vatNumber>%s</ns0:va'
-                u'tNumber></ns0:checkVat></ns1:Body></SOAP-ENV:Envelope>' %
-                (country_code, vat_number)
-        )
+        request_data = self._make_request_data(vat_number, country_code)
 
-        result.log_lines += [
-            u'> POST %s with payload of content type text/xml, charset UTF-8:',
-            request_data,
-        ]
+        self._log_request(result, request_data)
 
         try:
-            response = requests.post(
-                self.CHECK_VAT_SERVICE_URL,
-                data=request_data.encode('utf-8'),
-                headers={
-                    'Content-Type': 'text/xml; charset=utf-8',
-                },
-                timeout=self.DEFAULT_TIMEOUT
-            )
+            response = self._post(request_data)
         except Timeout as e:
-            result.log_lines.append(u'< Request to EU VIEW registry timed out:'
-                                    u' {}'.format(e))
+            result.log('timeout',
+                       u'< Request to EU VIEW registry timed out: %s',
+                       e)
             return result
         except Exception as exception:
             # Do not completely fail problematic requests.
-            result.log_lines.append(u'< Request failed with exception: %r' %
-                                    (exception))
+            result.log('exception',
+                       u'< Request failed with exception: %r',
+                       exception)
             return result
 
+        return self._parse_response(result, *response)
+
+    def _log_request(self, result, request_data):
+        """Log a request to the VIES service.
+
+        :param result: Check result to log the request to.
+        :type result: VatNumberCheckResult
+        :param request_data: Request payload.
+        """
+
+        result.log('request',
+                   u'> POST %s with payload of content type text/xml, '
+                   u'charset UTF-8:',
+                   self.service_url)
+        if self.capture_bodies:
+            result.log('request_body', u'%s', request_data)
+
+    def _make_request_data(self, vat_number, country_code):
+        """Make the SOAP request payload for checking a VAT number.
+
+        :param vat_number: VAT number without country code prefix.
+        :param country_code: VIES country code.
+        :returns: the request payload.
+        :rtype: str
+        """
+
+        return (
+            u'<?xml version="1.0" encoding="UTF-8"?><SOAP-ENV:Envelope'
+            u' xmlns:ns0="urn:ec.europa.eu:taxud:vies:services:checkVa'
+            u't:types" xmlns:ns1="http://schemas.xmlsoap.org/soap/enve'
+            u'lope/" xmlns:xsi="http://www.w3.org/2001/XMLSchema-insta'
+            u'nce" xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/env'
+            u'elope/"><SOAP-ENV:Header/><ns1:Body><ns0:checkVat><ns0:c'
+            u'ountryCode>%s</ns0:countryCode><ns0:vatNumber>%s</ns0:va'
+            u'tNumber></ns0:checkVat></ns1:Body></SOAP-ENV:Envelope>' %
+            (country_code, vat_number)
+        )
+
+    def _post(self, request_data):
+        """Post a request to the VIES service.
+
+        :param request_data: Request payload.
+        :returns:
+            a :class:`tuple` containing the response status code, content type
+            and raw body.
+        """
+
+        response = self._get_session().post(
+            self.service_url,
+            data=request_data.encode('utf-8'),
+            headers={
+                'Content-Type': 'text/xml; charset=utf-8',
+            },
+            timeout=self.DEFAULT_TIMEOUT
+        )
+
+        return (response.status_code,
+                response.headers.get('Content-Type', ''),
+                response.content)
+
+    def _parse_response(self, result, status_code, content_type, content):
+        """Parse a response from the VIES service into a check result.
+
+        :param result: Check result to update.
+        :type result: VatNumberCheckResult
+        :param status_code: Response status code.
+        :param content_type: Response content type.
+        :param content: Raw response body.
+        :type content: bytes
+        :returns: the updated check result.
+        :rtype: VatNumberCheckResult
+        :raises ServerError: if the response is a SOAP fault.
+        """
+
         # Log response information.
-        result.log_lines += [
-            u'< Response with status %d of content type %s:' %
-            (response.status_code, response.headers['Content-Type']),
-            response.text,
-            ]
+        result.log('response',
+                   u'< Response with status %d of content type %s:',
+                   status_code,
+                   content_type)
+        if self.capture_bodies:
+            result.log('response_body', u'%s', content)
 
         # Do not completely fail problematic requests.
-        if response.status_code != 200 or \
-                not response.headers['Content-Type'].startswith('text/xml'):
-            result.log_lines.append(u'< Response is nondeterministic due to '
-                                    u'invalid response status code or MIME '
-                                    u'type')
+        if status_code != 200 or not content_type.startswith('text/xml'):
+            result.log('nondeterministic',
+                       u'< Response is nondeterministic due to invalid '
+                       u'response status code or MIME type')
             return result
 
-        # Parse the DOM and validate as much as we can.
-        #
-        # We basically expect the result structure to be as follows,
-        # where the address and name nodes might be omitted.
-        #
-        # <env:Envelope
-        #     xmlns:env="http://schemas.xmlsoap.org/soap/envelope/">
-        #         <env:Header/>
-        #         <env:Body>
-        #         <ns2:checkVatResponse
-        #              xmlns:ns2="urn:ec.europa.eu:taxud:vies:services:checkVat:types">
-        #              <ns2:countryCode>DE</ns2:countryCode>
-        #              <ns2:vatNumber>812383453</ns2:vatNumber>
-        #              <ns2:requestDate>2022-08-12+02:00</ns2:requestDate>
-        #              <ns2:valid>true</ns2:valid>
-        #              <ns2:name>---</ns2:name>
-        #              <ns2:address>---</ns2:address>
-        #         </ns2:checkVatResponse>
-        #     </env:Body>
-        # </env:Envelope>
-        result_dom = xml.dom.minidom.parseString(response.text.encode('utf-8'))
-
-        envelope_node = result_dom.documentElement
-        if envelope_node.tagName != 'env:Envelope':
-            raise ValueError(
-                'expected response XML root element to be a SOAP envelope'
-            )
-
-        body_node = get_first_child_element(envelope_node, 'env:Body')
+        # Parse the response and validate as much as we can.
+        response = parse_check_vat_response(content)
 
         # Check for server errors
-        try:
-            error_node = get_first_child_element(body_node, 'env:Fault')
-            fault_strings = error_node.getElementsByTagName('faultstring')
-            fault_code = fault_strings[0].firstChild.nodeValue
-            raise ServerError(fault_code)
-        except NodeNotFoundError:
-            pass
+        if response.fault:
+            raise ServerError(response.fault_string)
 
-        try:
-            check_vat_response_node = get_first_child_element(
-                body_node,
-                'ns2:checkVatResponse'
-            )
-            valid_node = get_first_child_element(
-                check_vat_response_node,
-                'ns2:valid'
-            )
-        except Exception as e:
-            result.log_lines.append(u'< Response is nondeterministic due to '
-                                    u'invalid response body: %r' % (e))
+        if response.error is not None:
+            result.log('nondeterministic',
+                       u'< Response is nondeterministic due to invalid '
+                       u'response body: %r',
+                       response.error)
             return result
 
         # Parse the validity of the business.
-        valid_text = get_text(valid_node)
+        valid_text = response.valid
 
         if valid_text in frozenset(('true', 'false')):
             result.is_valid = valid_text == 'true'
         else:
-            result.log_lines.append(u'< Response is nondeterministic due to '
-                                    u'invalid validity field: %r' %
-                                    (valid_text))
+            result.log('nondeterministic',
+                       u'< Response is nondeterministic due to invalid '
+                       u'validity field: %r',
+                       valid_text)
 
         # Parse the business name and address if possible.
-        try:
-            name_node = get_first_child_element(
-                check_vat_response_node,
-                'ns2:name'
-            )
-            result.business_name = get_text(name_node).strip() or None
-        except Exception:
-            pass
+        if response.name is not None:
+            result.business_name = response.name.strip() or None
 
-        try:
-            address_node = get_first_child_element(
-                check_vat_response_node,
-                'ns2:address'
-            )
-            result.business_address = get_text(address_node).strip() or None
-        except Exception:
-            pass
+        if response.address is not None:
+            result.business_address = response.address.strip() or None
 
         return result
 
@@ -1,3 +1,45 @@
+class VatNumberCheckLogEvent(object):
+    """Structured VAT number check log event.
+
+    Events keep the values logged rather than a formatted log line, so the
+    line is only rendered if the log is actually read.
+
+    :ivar name:
+        Name of the kind of event, for example ``'request'``,
+        ``'request_body'``, ``'response'``, ``'response_body'`` or
+        ``'nondeterministic'``, or ``None`` for plain log lines.
+    :ivar message: Log line format string.
+    :ivar args: Values formatted into the log line format string.
+    """
+
+    __slots__ = ('name', 'message', 'args')
+
+    def __init__(self, name, message, args=()):
+        self.name = name
+        self.message = message
+        self.args = args
+
+    def render(self):
+        """Render the event as a log line.
+
+        Raw :class:`bytes` values, such as response bodies, are decoded as
+        UTF-8.
+
+        :rtype: str
+        """
+
+        if not self.args:
+            return self.message
+
+        return self.message % tuple(
+            arg.decode('utf-8', 'replace') if isinstance(arg, bytes) else arg
+            for arg in self.args
+        )
+
+    def __repr__(self):
+        return '<VatNumberCheckLogEvent %s: %r>' % (self.name, self.message)
+
+
 class VatNumberCheckResult(object):
     """Result of a VAT number validation check.
 
@@ -6,8 +48,8 @@ class VatNumberCheckResult(object):
         valid. ``True`` if the VAT number is valid, ``False`` if the VAT
         number is positively invalid or ``None`` if the validity is
         nondeterministic due to adverse conditions.
-    :ivar log_lines:
-        Check log lines.
+    :ivar log_events:
+        Check log as a list of :class:`VatNumberCheckLogEvent` instances.
     :ivar business_name: Optional business name retrieved for the VAT number.
     :ivar business_address: Optional address retrieved for the VAT number.
     """
@@ -18,6 +60,46 @@ class VatNumberCheckResult(object):
                  business_name=None,
                  business_address=None):
         self.is_valid = is_valid
-        self.log_lines = log_lines or []
+        self.log_events = []
         self.business_name = business_name
         self.business_address = business_address
+
+        self._log_lines = []
+        self._rendered_log_events = 0
+
+        if log_lines:
+            self.log_lines = log_lines
+
+    def log(self, name, message, *args):
+        """Add an event to the check log.
+
+        :param name: Name of the kind of event.
+        :param message: Log line format string.
+        :param args: Values formatted into the log line format string.
+        """
+
+        self.log_events.append(VatNumberCheckLogEvent(name, message, args))
+
+    @property
+    def log_lines(self):
+        """Check log lines.
+
+        Rendered from :attr:`log_events` when accessed.
+        """
+
+        events = self.log_events
+        if self._rendered_log_events < len(events):
+            self._log_lines.extend(
+                event.render()
+                for event in events[self._rendered_log_events:]
+            )
+            self._rendered_log_events = len(events)
+
+        return self._log_lines
+
+    @log_lines.setter
+    def log_lines(self, log_lines):
+        self.log_events = [VatNumberCheckLogEvent(None, line)
+                           for line in log_lines]
+        self._log_lines = list(log_lines)
+        self._rendered_log_events = len(self.log_events)
@@ -0,0 +1,188 @@
+import bisect
+import collections
+import random
+import threading
+
+
+RETRYABLE_FAULT_CODES = frozenset([
+    'GLOBAL_MAX_CONCURRENT_REQ',
+    'MS_MAX_CONCURRENT_REQ',
+    'MS_UNAVAILABLE',
+    'SERVER_BUSY',
+    'SERVICE_UNAVAILABLE',
+    'TIMEOUT',
+])
+"""Fault codes of the VIES service caused by transient conditions, after which
+a check is retried.
+"""
+
+
+class RetryPolicy(object):
+    """Policy for retrying registry checks.
+
+    Checks are retried after faults in ``fault_codes``, timeouts and
+    exceptions of the types in ``exception_types``, waiting for a random
+    delay of up to ``base_delay * 2 ** attempt`` seconds, capped at
+    ``max_delay`` seconds, before every retry. The randomness spreads the
+    retries of concurrent checks out, so they do not hit a recovering
+    registry at once.
+    """
+
+    def __init__(self,
+                 max_attempts=3,
+                 base_delay=0.1,
+                 max_delay=2.0,
+                 fault_codes=RETRYABLE_FAULT_CODES,
+                 exception_types=(Exception, ),
+                 jitter=random.random):
+        """Initialize a retry policy.
+
+        :param max_attempts:
+            Maximum number of attempts of a check, including the first one.
+            Default 3.
+        :type max_attempts: int
+        :param base_delay:
+            Maximum number of seconds to wait before the first retry, doubled
+            for every further retry. Default 0.1.
+        :type base_delay: float
+        :param max_delay:
+            Maximum number of seconds to wait before any retry. Default 2.
+        :type max_delay: float
+        :param fault_codes:
+            Fault codes of the registry after which checks are retried.
+            Default :data:`RETRYABLE_FAULT_CODES`.
+        :param exception_types:
+            Types of exceptions raised by requests after which checks are
+            retried. Default retrying after any exception.
+        :type exception_types: tuple
+        :param jitter:
+            Function returning a random number in the range ``[0, 1)`` that
+            the maximum delay is multiplied by.
+        """
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.fault_codes = frozenset(fault_codes)
+        self.exception_types = exception_types
+        self.jitter = jitter
+
+    def get_delay(self, attempt):
+        """Get the number of seconds to wait before retrying an attempt.
+
+        :param attempt: Zero-based number of the failed attempt.
+        :rtype: float
+        """
+
+        return self.jitter() * min(self.max_delay,
+                                   self.base_delay * 2 ** attempt)
+
+    def get_fault_delay(self, fault_code, attempt):
+        """Get the delay before retrying an attempt resulting in a fault.
+
+        :param fault_code: Fault code of the registry.
+        :param attempt: Zero-based number of the failed attempt.
+        :returns:
+            the number of seconds to wait before retrying or ``None`` if the
+            check should not be retried.
+        """
+
+        if attempt + 1 >= self.max_attempts or \
+           fault_code not in self.fault_codes:
+            return None
+
+        return self.get_delay(attempt)
+
+    def get_result_delay(self, result, attempt):
+        """Get the delay before retrying an attempt resulting in a result.
+
+        Only nondeterministic results due to a timeout or an exception of one
+        of the retried types are retried.
+
+        :param result: Check result of the attempt.
+        :type result: pyvat.VatNumberCheckResult
+        :param attempt: Zero-based number of the attempt.
+        :returns:
+            the number of seconds to wait before retrying or ``None`` if the
+            check should not be retried.
+        """
+
+        if attempt + 1 >= self.max_attempts or \
+           result.is_valid is not None or \
+           not result.log_events:
+            return None
+
+        event = result.log_events[-1]
+        if event.name == 'timeout' or \
+           (event.name == 'exception' and
+                isinstance(event.args[0], self.exception_types)):
+            return self.get_delay(attempt)
+
+        return None
+
+
+class HedgingPolicy(object):
+    """Policy for hedging registry checks.
+
+    The latencies of recent conclusive attempts are tracked, and once a check
+    has been waiting for longer than the given percentile of them, a second
+    request is made, using whichever conclusive result arrives first. With
+    the default 95th percentile, about one in twenty checks makes a second
+    request. The hedging policy is safe to share between threads.
+    """
+
+    def __init__(self, percentile=95, window=1000, min_samples=20):
+        """Initialize a hedging policy.
+
+        :param percentile:
+            Percentile of the recent latencies after which a second request
+            is made. Default 95.
+        :type percentile: float
+        :param window:
+            Number of recent latencies tracked. Default 1000.
+        :type window: int
+        :param min_samples:
+            Number of latencies tracked before checks are hedged. Default 20.
+        :type min_samples: int
+        """
+
+        self.percentile = percentile
+        self.min_samples = min_samples
+
+        self._samples = collections.deque(maxlen=window)
+        self._sorted = []
+        self._lock = threading.Lock()
+
+    def record(self, latency):
+        """Record the latency of a conclusive attempt.
+
+        :param latency: Latency in seconds.
+        :type latency: float
+        """
+
+        with self._lock:
+            samples = self._samples
+            if len(samples) == samples.maxlen:
+                del self._sorted[bisect.bisect_left(self._sorted,
+                                                    samples[0])]
+            samples.append(latency)
+            bisect.insort(self._sorted, latency)
+
+    def get_delay(self):
+        """Get the number of seconds after which a check is hedged.
+
+        :returns:
+            the percentile of the recent latencies or ``None`` if too few
+            latencies have been tracked to hedge checks.
+        """
+
+        with self._lock:
+            count = len(self._sorted)
+            if count < max(1, self.min_samples):
+                return None
+
+            rank = int(self.percentile / 100.0 * count + 0.5) - 1
+            return self._sorted[min(max(rank, 0), count - 1)]
+
+
+__all__ = ('HedgingPolicy', 'RetryPolicy', 'RETRYABLE_FAULT_CODES', )
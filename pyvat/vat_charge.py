@@ -22,6 +22,10 @@ class VatChargeAction(Enum):
 class VatCharge(object):
     """VAT charge.
 
+    VAT charges are immutable and hashable, and equal if their action, country
+    code and rate are equal regardless of their version. Shared instances can
+    be obtained through :meth:`of`.
+
     :ivar action: VAT charge action.
     :type action: VatChargeAction
     :ivar country_code:
@@ -31,12 +35,87 @@ class VatCharge(object):
     :ivar rate:
         VAT rate in percent. I.e. a value of 25 indicates a VAT charge of 25 %.
     :type rate: Decimal
+    :ivar version:
+        Version of the VAT rate dataset the charge was determined from or
+        ``None`` if unknown.
+    :type version: str
+    """
+
+    __slots__ = ('action', 'country_code', 'rate', 'version', '_hash')
+
+    MAX_SHARED_INSTANCES = 10000
+    """Maximum number of shared instances, beyond which the shared instances
+    are started over, so VAT charges of replaced VAT rate datasets do not
+    accumulate.
     """
 
-    def __init__(self, action, country_code, rate):
-        self.action = action
-        self.country_code = country_code
-        self.rate = ensure_decimal(rate)
+    _instances = {}
+    """Shared instances by class, action, country code, rate and version.
+    """
+
+    def __init__(self, action, country_code, rate, version=None):
+        rate = ensure_decimal(rate)
+
+        object.__setattr__(self, 'action', action)
+        object.__setattr__(self, 'country_code', country_code)
+        object.__setattr__(self, 'rate', rate)
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, '_hash', hash((action, country_code, rate)))
+
+    @classmethod
+    def of(cls, action, country_code, rate, version=None):
+        """Get the shared VAT charge for an action, country, rate and version.
+
+        :param action: VAT charge action.
+        :type action: VatChargeAction
+        :param country_code:
+            Country in which the action applies as the ISO 3166-1 alpha-2 code
+            of the country.
+        :type country_code: str
+        :param rate: VAT rate in percent.
+        :param version: Optional VAT rate dataset version.
+        :type version: str
+        :rtype: VatCharge
+        """
+
+        # Rates are keyed by their string representation, so rates given as
+        # different types share a VAT charge while equal rates of different
+        # precision do not.
+        rate = ensure_decimal(rate)
+        key = (cls, action, country_code, str(rate), version)
+        vat_charge = cls._instances.get(key)
+        if vat_charge is None:
+            if len(cls._instances) >= cls.MAX_SHARED_INSTANCES:
+                cls._instances.clear()
+            vat_charge = cls._instances.setdefault(
+                key,
+                cls(action, country_code, rate, version)
+            )
+        return vat_charge
+
+    def __setattr__(self, name, value):
+        raise AttributeError('%s is immutable' % (self.__class__.__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError('%s is immutable' % (self.__class__.__name__))
+
+    def __reduce__(self):
+        return (self.__class__,
+                (self.action, self.country_code, self.rate, self.version))
+
+    def __eq__(self, other):
+        if not isinstance(other, VatCharge):
+            return NotImplemented
+        return self.action == other.action and \
+            self.country_code == other.country_code and \
+            self.rate == other.rate
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        return self._hash
 
     def __repr__(self):
         return '<%s.%s: action = %r, country code = %r, rate = %s>' % (
@@ -1,534 +1,183 @@
-#!/usr/bin/env python
-# -*- coding: utf-8 -*-
+"""VAT rate dataset.
+
+The VAT rates are shipped as a compact, versioned JSON document,
+``vat_rates.json``, rather than as Python source, so rates can be updated
+without a code change. The document has the following structure::
+
+   {
+       "format": 1,
+       "version": "2025-01-01",
+       "item_types": ["generic_physical_good", ...],
+       "tables": [["20.0", null, ...], ...],
+       "countries": {"AT": [["2002-01-01", 0], ...], ...}
+   }
+
+``item_types`` names the :class:`ItemType` members by which the rates of
+every table in ``tables`` are ordered, with ``null`` for item types without a
+rate in the table. ``countries`` maps ISO 3166-1 alpha-2 country codes to the
+country's rate periods as pairs of the date from which the period is valid and
+the index of the rate table in effect.
+
+Rates are sourced from the European Commission's VAT rate database at
+http://ec.europa.eu/taxation_customs/tic/public/vatRates/vatratesSearch.html
+"""
+
 import datetime
+import json
+import pkgutil
 from decimal import Decimal
 
 from .item_type import ItemType
 
-# http://ec.europa.eu/taxation_customs/tic/public/vatRates/vatratesSearch.html
-VAT_RATES = {
-    'AT': [{
-        'valid_from': datetime.date(2002, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('20.0')
-        }
-    }, {
-        'valid_from': datetime.date(2015, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('20.0'),
-            ItemType.generic_electronic_service: Decimal('20.0'),
-            ItemType.generic_telecommunications_service: Decimal('20.0'),
-            ItemType.generic_broadcasting_service: Decimal('20.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('10.0'),
-            ItemType.ebook: Decimal('20.0'),
-            ItemType.enewspaper: Decimal('20.0')
-        }
-    }],
-    'BE': [{
-        'valid_from': datetime.date(2002, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('21.0')
-        }
-    }, {
-        'valid_from': datetime.date(2015, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('21.0'),
-            ItemType.generic_electronic_service: Decimal('21.0'),
-            ItemType.generic_telecommunications_service: Decimal('21.0'),
-            ItemType.generic_broadcasting_service: Decimal('21.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('21.0'),
-            ItemType.ebook: Decimal('21.0'),
-            ItemType.enewspaper: Decimal('21.0')
-        }
-    }],
-    'BG': [{
-        'valid_from': datetime.date(2002, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('20.0')
-        }
-    }, {
-        'valid_from': datetime.date(2015, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('20.0'),
-            ItemType.generic_electronic_service: Decimal('20.0'),
-            ItemType.generic_telecommunications_service: Decimal('20.0'),
-            ItemType.generic_broadcasting_service: Decimal('20.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('20.0'),
-            ItemType.ebook: Decimal('20.0'),
-            ItemType.enewspaper: Decimal('20.0')
-        }
-    }],
-    'CY': [{
-        'valid_from': datetime.date(2014, 1, 13),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('19.0'),
-            ItemType.generic_electronic_service: Decimal('19.0'),
-            ItemType.generic_telecommunications_service: Decimal('19.0'),
-            ItemType.generic_broadcasting_service: Decimal('19.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('19.0'),
-            ItemType.ebook: Decimal('19.0'),
-            ItemType.enewspaper: Decimal('19.0')
-        }
-    }],
-    'CZ': [{
-        'valid_from': datetime.date(2013, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('21.0')
-        }
-    }, {
-        'valid_from': datetime.date(2015, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('21.0'),
-            ItemType.generic_electronic_service: Decimal('21.0'),
-            ItemType.generic_telecommunications_service: Decimal('21.0'),
-            ItemType.generic_broadcasting_service: Decimal('21.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('21.0'),
-            ItemType.ebook: Decimal('21.0'),
-            ItemType.enewspaper: Decimal('21.0')
-        }
-    }],
-    'DE': [{
-        'valid_from': datetime.date(2007, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('19.0'),
-            ItemType.generic_electronic_service: Decimal('19.0'),
-            ItemType.generic_telecommunications_service: Decimal('19.0'),
-            ItemType.generic_broadcasting_service: Decimal('19.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('19.0'),
-            ItemType.ebook: Decimal('19.0'),
-            ItemType.enewspaper: Decimal('19.0')
-        }
-    }, {
-        'valid_from': datetime.date(2020, 7, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('16.0'),
-            ItemType.generic_electronic_service: Decimal('16.0'),
-            ItemType.generic_telecommunications_service: Decimal('16.0'),
-            ItemType.generic_broadcasting_service: Decimal('16.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('16.0'),
-            ItemType.ebook: Decimal('16.0'),
-            ItemType.enewspaper: Decimal('16.0')
-        }
-    }, {
-        'valid_from': datetime.date(2021, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('19.0'),
-            ItemType.generic_electronic_service: Decimal('19.0'),
-            ItemType.generic_telecommunications_service: Decimal('19.0'),
-            ItemType.generic_broadcasting_service: Decimal('19.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('19.0'),
-            ItemType.ebook: Decimal('19.0'),
-            ItemType.enewspaper: Decimal('19.0')
-        }
-    }],
-    'DK': [{
-        'valid_from': datetime.date(2002, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('25.0'),
-            ItemType.generic_electronic_service: Decimal('25.0'),
-            ItemType.generic_telecommunications_service: Decimal('25.0'),
-            ItemType.generic_broadcasting_service: Decimal('25.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('25.0'),
-            ItemType.ebook: Decimal('25.0'),
-            ItemType.enewspaper: Decimal('25.0')
-        }
-    }],
-    'EE': [{
-        'valid_from': datetime.date(2009, 7, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('20.0'),
-            ItemType.generic_electronic_service: Decimal('20.0'),
-            ItemType.generic_telecommunications_service: Decimal('20.0'),
-            ItemType.generic_broadcasting_service: Decimal('20.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('20.0'),
-            ItemType.ebook: Decimal('20.0'),
-            ItemType.enewspaper: Decimal('20.0')
-        }
-    }, {
-        'valid_from': datetime.date(2024, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('22.0'),
-            ItemType.generic_electronic_service: Decimal('22.0'),
-            ItemType.generic_telecommunications_service: Decimal('22.0'),
-            ItemType.generic_broadcasting_service: Decimal('22.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('22.0'),
-            ItemType.ebook: Decimal('22.0'),
-            ItemType.enewspaper: Decimal('22.0')
-        }
-    }],
-    'ES': [{
-        'valid_from': datetime.date(2012, 9, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('21.0')
-        }
-    }, {
-        'valid_from': datetime.date(2015, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('21.0'),
-            ItemType.generic_electronic_service: Decimal('21.0'),
-            ItemType.generic_telecommunications_service: Decimal('21.0'),
-            ItemType.generic_broadcasting_service: Decimal('21.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('21.0'),
-            ItemType.ebook: Decimal('21.0'),
-            ItemType.enewspaper: Decimal('21.0')
-        }
-    }],
-    'FI': [{
-        'valid_from': datetime.date(2013, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('24.0'),
-            ItemType.generic_electronic_service: Decimal('24.0'),
-            ItemType.generic_telecommunications_service: Decimal('24.0'),
-            ItemType.generic_broadcasting_service: Decimal('24.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('24.0'),
-            ItemType.ebook: Decimal('24.0'),
-            ItemType.enewspaper: Decimal('24.0')
-        }
-    }, {
-        'valid_from': datetime.date(2024, 9, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('25.5'),
-            ItemType.generic_electronic_service: Decimal('25.5'),
-            ItemType.generic_telecommunications_service: Decimal('25.5'),
-            ItemType.generic_broadcasting_service: Decimal('25.5'),
-            ItemType.prepaid_broadcasting_service: Decimal('25.5'),
-            ItemType.ebook: Decimal('25.5'),
-            ItemType.enewspaper: Decimal('25.5')
-        }
-    }],
-    'FR': [{
-        'valid_from': datetime.date(2014, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('20.0'),
-        }
-    }, {
-        'valid_from': datetime.date(2015, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('20.0'),
-            ItemType.generic_electronic_service: Decimal('20.0'),
-            ItemType.generic_telecommunications_service: Decimal('20.0'),
-            ItemType.ebook: Decimal('5.5'),
-            ItemType.enewspaper: Decimal('2.1'),
-            ItemType.generic_broadcasting_service: Decimal('10.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('10.0'),
-        }
-    }],
-    'GB': [{
-        'valid_from': datetime.date(2011, 1, 4),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('20.0')
-        }
-    }, {
-        'valid_from': datetime.date(2015, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('20.0'),
-            ItemType.generic_electronic_service: Decimal('20.0'),
-            ItemType.generic_telecommunications_service: Decimal('20.0'),
-            ItemType.generic_broadcasting_service: Decimal('20.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('20.0'),
-            ItemType.ebook: Decimal('20.0'),
-            ItemType.enewspaper: Decimal('20.0')
-        }
-    }],
-    'GR': [{
-        'valid_from': datetime.date(2010, 7, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('23.0'),
-            ItemType.generic_electronic_service: Decimal('23.0'),
-            ItemType.generic_telecommunications_service: Decimal('23.0'),
-            ItemType.generic_broadcasting_service: Decimal('23.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('23.0'),
-            ItemType.ebook: Decimal('23.0'),
-            ItemType.enewspaper: Decimal('23.0')
-        }
-    }, {
-        'valid_from': datetime.date(2016, 6, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('24.0'),
-            ItemType.generic_electronic_service: Decimal('24.0'),
-            ItemType.generic_telecommunications_service: Decimal('24.0'),
-            ItemType.generic_broadcasting_service: Decimal('24.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('24.0'),
-            ItemType.ebook: Decimal('24.0'),
-            ItemType.enewspaper: Decimal('24.0')
-        }
-    }],
-    'HR': [{
-        'valid_from': datetime.date(2012, 3, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('25.0'),
-            ItemType.generic_electronic_service: Decimal('25.0'),
-            ItemType.generic_telecommunications_service: Decimal('25.0'),
-            ItemType.generic_broadcasting_service: Decimal('25.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('25.0'),
-            ItemType.ebook: Decimal('25.0'),
-            ItemType.enewspaper: Decimal('25.0')
-        }
-    }],
-    'HU': [{
-        'valid_from': datetime.date(2012, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('27.0'),
-            ItemType.generic_electronic_service: Decimal('27.0'),
-            ItemType.generic_telecommunications_service: Decimal('27.0'),
-            ItemType.generic_broadcasting_service: Decimal('27.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('27.0'),
-            ItemType.ebook: Decimal('27.0'),
-            ItemType.enewspaper: Decimal('27.0')
-        }
-    }],
-    'IE': [{
-        'valid_from': datetime.date(2012, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('23.0')
-        }
-    }, {
-        'valid_from': datetime.date(2015, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('23.0'),
-            ItemType.generic_electronic_service: Decimal('23.0'),
-            ItemType.generic_telecommunications_service: Decimal('23.0'),
-            ItemType.generic_broadcasting_service: Decimal('23.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('23.0'),
-            ItemType.ebook: Decimal('23.0'),
-            ItemType.enewspaper: Decimal('23.0')
-        }
-    }],
-    'IT': [{
-        'valid_from': datetime.date(2013, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('22.0'),
-            ItemType.generic_electronic_service: Decimal('22.0'),
-            ItemType.generic_telecommunications_service: Decimal('22.0'),
-            ItemType.generic_broadcasting_service: Decimal('22.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('22.0'),
-            ItemType.ebook: Decimal('22.0'),
-            ItemType.enewspaper: Decimal('22.0')
-        }
-    }, {
-        'valid_from': datetime.date(2015, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('22.0'),
-            ItemType.generic_electronic_service: Decimal('22.0'),
-            ItemType.generic_telecommunications_service: Decimal('22.0'),
-            ItemType.generic_broadcasting_service: Decimal('22.0'),
-            ItemType.ebook: Decimal('4.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('22.0'),
-            ItemType.enewspaper: Decimal('22.0')
-        }
-    }],
-    'LT': [{
-        'valid_from': datetime.date(2009, 9, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('21.0')
-        }
-    }, {
-        'valid_from': datetime.date(2015, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('21.0'),
-            ItemType.generic_electronic_service: Decimal('21.0'),
-            ItemType.generic_telecommunications_service: Decimal('21.0'),
-            ItemType.generic_broadcasting_service: Decimal('21.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('21.0'),
-            ItemType.ebook: Decimal('21.0'),
-            ItemType.enewspaper: Decimal('21.0')
-        }
-    }],
-    'LU': [{
-        'valid_from': datetime.date(2006, 1, 1),
-        'rates': {
-            ItemType.ebook: Decimal('3.0'),
-            ItemType.generic_broadcasting_service: Decimal('3.0'),
-        }
-    }, {
-        'valid_from': datetime.date(2015, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('17.0'),
-            ItemType.generic_electronic_service: Decimal('17.0'),
-            ItemType.ebook: Decimal('17.0'),
-            ItemType.generic_telecommunications_service: Decimal('17.0'),
-            ItemType.generic_broadcasting_service: Decimal('3.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('3.0'),
-            ItemType.ebook: Decimal('17.0'),
-            ItemType.enewspaper: Decimal('17.0')
-        }
-    }],
-    'LV': [{
-        'valid_from': datetime.date(2012, 7, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('21.0')
-        }
-    }, {
-        'valid_from': datetime.date(2015, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('21.0'),
-            ItemType.generic_electronic_service: Decimal('21.0'),
-            ItemType.generic_telecommunications_service: Decimal('21.0'),
-            ItemType.generic_broadcasting_service: Decimal('21.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('21.0'),
-            ItemType.ebook: Decimal('21.0'),
-            ItemType.enewspaper: Decimal('21.0')
-        }
-    }],
-    'MT': [{
-        'valid_from': datetime.date(2002, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('18.0')
-        }
-    }, {
-        'valid_from': datetime.date(2015, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('18.0'),
-            ItemType.generic_electronic_service: Decimal('18.0'),
-            ItemType.generic_telecommunications_service: Decimal('18.0'),
-            ItemType.generic_broadcasting_service: Decimal('18.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('18.0'),
-            ItemType.ebook: Decimal('18.0'),
-            ItemType.enewspaper: Decimal('18.0')
-        }
-    }],
-    'NL': [{
-        'valid_from': datetime.date(2012, 10, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('21.0')
-        }
-    }, {
-        'valid_from': datetime.date(2015, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('21.0'),
-            ItemType.generic_electronic_service: Decimal('21.0'),
-            ItemType.generic_telecommunications_service: Decimal('21.0'),
-            ItemType.generic_broadcasting_service: Decimal('21.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('21.0'),
-            ItemType.ebook: Decimal('21.0'),
-            ItemType.enewspaper: Decimal('21.0')
-        }
-    }],
-    'PL': [{
-        'valid_from': datetime.date(2011, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('23.0'),
-            ItemType.generic_electronic_service: Decimal('23.0'),
-            ItemType.generic_telecommunications_service: Decimal('23.0'),
-            ItemType.generic_broadcasting_service: Decimal('8.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('8.0'),
-            ItemType.ebook: Decimal('23.0'),
-            ItemType.enewspaper: Decimal('23.0')
-        }
-    }],
-    'PT': [{
-        'valid_from': datetime.date(2011, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('23.0')
-        }
-    }, {
-        'valid_from': datetime.date(2015, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('23.0'),
-            ItemType.generic_electronic_service: Decimal('23.0'),
-            ItemType.generic_telecommunications_service: Decimal('23.0'),
-            ItemType.generic_broadcasting_service: Decimal('23.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('23.0'),
-            ItemType.ebook: Decimal('23.0'),
-            ItemType.enewspaper: Decimal('23.0')
-        }
-    }],
-    'RO': [{
-        'valid_from': datetime.date(2010, 7, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('24.0'),
-            ItemType.generic_electronic_service: Decimal('24.0'),
-            ItemType.generic_telecommunications_service: Decimal('24.0'),
-            ItemType.generic_broadcasting_service: Decimal('24.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('24.0'),
-            ItemType.ebook: Decimal('24.0'),
-            ItemType.enewspaper: Decimal('24.0')
-        }
-    }, {
-        'valid_from': datetime.date(2016, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('20.0'),
-            ItemType.generic_electronic_service: Decimal('20.0'),
-            ItemType.generic_telecommunications_service: Decimal('20.0'),
-            ItemType.generic_broadcasting_service: Decimal('20.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('20.0'),
-            ItemType.ebook: Decimal('20.0'),
-            ItemType.enewspaper: Decimal('20.0')
-        }
-    }, {
-        'valid_from': datetime.date(2017, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('19.0'),
-            ItemType.generic_electronic_service: Decimal('19.0'),
-            ItemType.generic_telecommunications_service: Decimal('19.0'),
-            ItemType.generic_broadcasting_service: Decimal('19.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('19.0'),
-            ItemType.ebook: Decimal('19.0'),
-            ItemType.enewspaper: Decimal('19.0')
-        }
-    }],
-    'SE': [{
-        'valid_from': datetime.date(2002, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('25.0')
-        }
-    }, {
-        'valid_from': datetime.date(2015, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('25.0'),
-            ItemType.generic_electronic_service: Decimal('25.0'),
-            ItemType.generic_telecommunications_service: Decimal('25.0'),
-            ItemType.generic_broadcasting_service: Decimal('25.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('25.0'),
-            ItemType.ebook: Decimal('25.0'),
-            ItemType.enewspaper: Decimal('25.0')
-        }
-    }],
-    'SI': [{
-        'valid_from': datetime.date(2013, 7, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('22.0'),
-            ItemType.generic_electronic_service: Decimal('22.0'),
-            ItemType.generic_telecommunications_service: Decimal('22.0'),
-            ItemType.generic_broadcasting_service: Decimal('22.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('22.0'),
-            ItemType.ebook: Decimal('22.0'),
-            ItemType.enewspaper: Decimal('22.0')
-        }
-    }],
-    'SK': [{
-        'valid_from': datetime.date(2010, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('20.0')
-        }
-    }, {
-        'valid_from': datetime.date(2015, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('20.0'),
-            ItemType.generic_electronic_service: Decimal('20.0'),
-            ItemType.generic_telecommunications_service: Decimal('20.0'),
-            ItemType.generic_broadcasting_service: Decimal('20.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('20.0'),
-            ItemType.ebook: Decimal('20.0'),
-            ItemType.enewspaper: Decimal('20.0')
-        }
-    }, {
-        'valid_from': datetime.date(2025, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('23.0'),
-            ItemType.generic_electronic_service: Decimal('23.0')
-        }
-    }],
-    'XI': [{
-        'valid_from': datetime.date(2021, 1, 1),
-        'rates': {
-            ItemType.generic_physical_good: Decimal('20.0'),
-            ItemType.generic_electronic_service: Decimal('20.0'),
-            ItemType.generic_telecommunications_service: Decimal('20.0'),
-            ItemType.generic_broadcasting_service: Decimal('20.0'),
-            ItemType.prepaid_broadcasting_service: Decimal('20.0'),
-            ItemType.ebook: Decimal('20.0'),
-            ItemType.enewspaper: Decimal('20.0')
-        }
-    }]
-}
+
+VAT_RATES_FORMAT = 1
+"""Version of the VAT rate dataset format understood by the loader.
+"""
+
+
+def parse_vat_rates(content):
+    """Parse a VAT rate dataset.
+
+    Identical rate tables are only built once and shared by all the rate
+    periods referencing them, as are identical rates.
+
+    :param content: JSON document.
+    :type content: str or bytes
+    :returns:
+        a ``(version, vat rates)`` tuple of the dataset version and a
+        :class:`dict` mapping country codes to a list of rate periods as
+        accepted by :class:`pyvat.vat_rules.EuVatRateRule`.
+    :raises ValueError:
+        if the document is malformed or of an unsupported format.
+    """
+
+    if isinstance(content, bytes):
+        content = content.decode('utf-8')
+
+    data = json.loads(content)
+    if not isinstance(data, dict) or \
+       data.get('format') != VAT_RATES_FORMAT:
+        raise ValueError('unsupported VAT rate dataset format')
+
+    try:
+        # Item types unknown to this version of pyvat are skipped, so newer
+        # datasets remain loadable.
+        item_types = [getattr(ItemType, name, None)
+                      for name in data['item_types']]
+
+        decimals = {}
+        tables = []
+        for table in data['tables']:
+            rates = {}
+            for item_type, rate in zip(item_types, table):
+                if item_type is None or rate is None:
+                    continue
+                if rate not in decimals:
+                    decimals[rate] = Decimal(rate)
+                rates[item_type] = decimals[rate]
+            tables.append(rates)
+
+        vat_rates = {}
+        for country_code, periods in data['countries'].items():
+            vat_rates[str(country_code)] = [{
+                'valid_from': datetime.date(*map(int, valid_from.split('-'))),
+                'rates': tables[table],
+            } for valid_from, table in periods]
+    except (KeyError, IndexError, TypeError, ValueError, ArithmeticError) as e:
+        raise ValueError('malformed VAT rate dataset: %s' % (e, ))
+
+    return data.get('version'), vat_rates
+
+
+def load_vat_rates(path=None):
+    """Load a VAT rate dataset.
+
+    :param path:
+        Optional path of the dataset file. Default ``None`` loading the
+        dataset shipped with pyvat.
+    :returns:
+        a ``(version, vat rates)`` tuple as returned by
+        :func:`parse_vat_rates`.
+    :raises ValueError:
+        if the dataset is malformed or of an unsupported format.
+    """
+
+    if path is None:
+        content = pkgutil.get_data(__name__.rpartition('.')[0],
+                                   'vat_rates.json')
+    else:
+        with open(path, 'rb') as f:
+            content = f.read()
+
+    return parse_vat_rates(content)
+
+
+def dump_vat_rates(version, vat_rates):
+    """Serialize VAT rates as a compact VAT rate dataset.
+
+    Rate periods with identical rates share a single rate table in the
+    dataset.
+
+    :param version: Dataset version.
+    :type version: str
+    :param vat_rates:
+        :class:`dict` mapping country codes to a list of rate periods as
+        accepted by :class:`pyvat.vat_rules.EuVatRateRule`.
+    :returns: the JSON document.
+    :rtype: str
+    """
+
+    item_types = list(ItemType)
+
+    tables = []
+    table_indices = {}
+    countries = {}
+    for country_code, periods in sorted(vat_rates.items()):
+        countries[country_code] = []
+        for period in periods:
+            table = tuple(
+                str(period['rates'][item_type])
+                if item_type in period['rates'] else None
+                for item_type in item_types
+            )
+            if table not in table_indices:
+                table_indices[table] = len(tables)
+                tables.append(table)
+
+            countries[country_code].append([
+                period['valid_from'].isoformat(),
+                table_indices[table],
+            ])
+
+    lines = [
+        '{',
+        '"format": %s,' % (json.dumps(VAT_RATES_FORMAT), ),
+        '"version": %s,' % (json.dumps(version), ),
+        '"item_types": %s,' % (json.dumps([item_type.name
+                                           for item_type in item_types]), ),
+        '"tables": [',
+        ',\n'.join(json.dumps(list(table)) for table in tables),
+        '],',
+        '"countries": {',
+        ',\n'.join('%s: %s' % (json.dumps(country_code), json.dumps(periods))
+                   for country_code, periods in sorted(countries.items())),
+        '}',
+        '}',
+    ]
+
+    return '\n'.join(lines) + '\n'
+
+
+VAT_RATES_VERSION, VAT_RATES = load_vat_rates()
+"""Version of the shipped VAT rate dataset and its VAT rates by country.
+"""
+
+
+__all__ = (
+    'dump_vat_rates',
+    'load_vat_rates',
+    'parse_vat_rates',
+    'VAT_RATES',
+    'VAT_RATES_FORMAT',
+    'VAT_RATES_VERSION',
+)
@@ -1,14 +1,42 @@
+import bisect
 import datetime
+import threading
 from .countries import EU_COUNTRY_CODES
 from .vat_charge import VatCharge, VatChargeAction
-from .vat_rates import VAT_RATES
+from .vat_rates import load_vat_rates, VAT_RATES, VAT_RATES_VERSION
 
 
 JANUARY_1_2015 = datetime.date(2015, 1, 1)
 
 
+class NotApplicable(object):
+    """Outcome of VAT rules that do not apply to a sale.
+    """
+
+    def __bool__(self):
+        return False
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        return 'NOT_APPLICABLE'
+
+
+NOT_APPLICABLE = NotApplicable()
+"""Outcome of VAT rules that do not apply to a sale.
+
+Returned by the ``resolve_*`` methods of VAT rules rather than raising
+:class:`NotImplementedError`, so the next rules in the resolution order can be
+tried without raising and catching an exception.
+"""
+
+
 class VatRules(object):
     """Base VAT rules for a country.
+
+    Rules implement the ``get_*`` methods, raising :class:`NotImplementedError`
+    if they do not apply to a sale, or override the exception-free
+    ``resolve_*`` methods instead.
     """
 
     def get_vat_rate(self, item_type):
@@ -70,21 +98,97 @@ class VatRules(object):
 
         raise NotImplementedError()
 
+    def resolve_sale_to_country_vat_charge(self,
+                                           date,
+                                           item_type,
+                                           buyer,
+                                           seller):
+        """Resolve the VAT charge for selling to a buyer in the country.
+
+        Exception-free counterpart of :meth:`get_sale_to_country_vat_charge`.
+
+        :returns:
+            the :class:`VatCharge` or :data:`NOT_APPLICABLE` if no explicit
+            rules for selling to the given country from the given country
+            exist.
+        """
+
+        try:
+            return self.get_sale_to_country_vat_charge(date,
+                                                       item_type,
+                                                       buyer,
+                                                       seller)
+        except NotImplementedError:
+            return NOT_APPLICABLE
+
+    def resolve_sale_from_country_vat_charge(self,
+                                             date,
+                                             item_type,
+                                             buyer,
+                                             seller):
+        """Resolve the VAT charge for selling as a seller in the country.
+
+        Exception-free counterpart of :meth:`get_sale_from_country_vat_charge`.
+
+        :returns:
+            the :class:`VatCharge` or :data:`NOT_APPLICABLE` if no rules for
+            selling from the given country to the given country exist.
+        """
+
+        try:
+            return self.get_sale_from_country_vat_charge(date,
+                                                         item_type,
+                                                         buyer,
+                                                         seller)
+        except NotImplementedError:
+            return NOT_APPLICABLE
+
 
 class EuVatRulesMixin(object):
     """Mixin for VAT rules in EU countries.
+
+    :ivar country_vat_rules:
+        VAT rules by country of the :class:`VatRulesTable` the rules belong
+        to, used to look up the rules of other EU countries, or ``None`` to
+        use the active rules.
     """
 
+    country_vat_rules = None
+
     def get_sale_to_country_vat_charge(self,
                                        date,
                                        item_type,
                                        buyer,
                                        seller):
+        vat_charge = self.resolve_sale_to_country_vat_charge(date,
+                                                             item_type,
+                                                             buyer,
+                                                             seller)
+        if vat_charge is NOT_APPLICABLE:
+            raise _not_implemented(seller)
+        return vat_charge
+
+    def get_sale_from_country_vat_charge(self,
+                                         date,
+                                         item_type,
+                                         buyer,
+                                         seller):
+        vat_charge = self.resolve_sale_from_country_vat_charge(date,
+                                                               item_type,
+                                                               buyer,
+                                                               seller)
+        if vat_charge is NOT_APPLICABLE:
+            raise _not_implemented(seller)
+        return vat_charge
+
+    def resolve_sale_to_country_vat_charge(self,
+                                           date,
+                                           item_type,
+                                           buyer,
+                                           seller):
         # We only support business sellers at this time.
         if not seller.is_business:
-            raise NotImplementedError(
-                'non-business sellers are currently not supported'
-            )
+            return NOT_APPLICABLE
 
         # If the seller resides in the same country as the buyer, we charge
         # VAT regardless of whether the buyer is a business or not. Similarly,
@@ -92,100 +196,505 @@ class EuVatRulesMixin(object):
         # of residence.
         if seller.country_code == buyer.country_code or \
            (not buyer.is_business and date >= JANUARY_1_2015):
-            return VatCharge(VatChargeAction.charge,
-                             buyer.country_code,
-                             self.get_vat_rate(item_type, date))
+            return VatCharge.of(VatChargeAction.charge,
+                                buyer.country_code,
+                                self.get_vat_rate(item_type, date))
 
         # EU consumers are charged VAT in the seller's country prior to January
         # 1st, 2015.
         if not buyer.is_business:
             # Fall back to the seller's VAT rules for this one.
-            raise NotImplementedError()
+            return NOT_APPLICABLE
 
         # EU businesses will never be charged VAT but must account for the VAT
         # by the reverse-charge mechanism.
-        return VatCharge(VatChargeAction.reverse_charge,
-                         buyer.country_code,
-                         0)
-
-    def get_sale_from_country_vat_charge(self,
-                                         date,
-                                         item_type,
-                                         buyer,
-                                         seller):
+        return VatCharge.of(VatChargeAction.reverse_charge,
+                            buyer.country_code,
+                            0)
+
+    def resolve_sale_from_country_vat_charge(self,
+                                             date,
+                                             item_type,
+                                             buyer,
+                                             seller):
         # We only support business sellers at this time.
         if not seller.is_business:
-            raise NotImplementedError(
-                'non-business sellers are currently not supported'
-            )
+            return NOT_APPLICABLE
 
         # If the buyer resides outside the EU, we do not have to charge VAT.
         if buyer.country_code not in EU_COUNTRY_CODES:
-            return VatCharge(VatChargeAction.no_charge, buyer.country_code, 0)
+            return VatCharge.of(VatChargeAction.no_charge,
+                                buyer.country_code,
+                                0)
 
         # Both businesses and consumers are charged VAT in the seller's
         # country if both seller and buyer reside in the same country.
         if buyer.country_code == seller.country_code:
-            return VatCharge(VatChargeAction.charge,
-                             seller.country_code,
-                             self.get_vat_rate(item_type, date))
+            return VatCharge.of(VatChargeAction.charge,
+                                seller.country_code,
+                                self.get_vat_rate(item_type, date))
 
         # Businesses in other EU countries are not charged VAT but are
         # responsible for accounting for the tax through the reverse-charge
         # mechanism.
         if buyer.is_business:
-            return VatCharge(VatChargeAction.reverse_charge,
-                             buyer.country_code,
-                             0)
+            return VatCharge.of(VatChargeAction.reverse_charge,
+                                buyer.country_code,
+                                0)
 
         # Consumers in other EU countries are charged VAT in their country of
         # residence after January 1st, 2015. Before this date, you charge VAT
         # in the country where the company is located.
         if date >= JANUARY_1_2015:
-            buyer_rules = VAT_RULES[buyer.country_code]
+            country_vat_rules = self.country_vat_rules
+            if country_vat_rules is None:
+                country_vat_rules = VAT_RULES
+            buyer_rules = country_vat_rules[buyer.country_code]
+
+            return VatCharge.of(VatChargeAction.charge,
+                                buyer.country_code,
+                                buyer_rules.get_vat_rate(item_type, date))
+        else:
+            return VatCharge.of(VatChargeAction.charge,
+                                seller.country_code,
+                                self.get_vat_rate(item_type, date))
+
+
+def _not_implemented(seller):
+    """Make the exception raised by EU VAT rules not applying to a sale.
+
+    :param seller: Seller.
+    :type seller: Party
+    :rtype: NotImplementedError
+    """
 
-            return VatCharge(VatChargeAction.charge,
-                             buyer.country_code,
-                             buyer_rules.get_vat_rate(item_type, date))
+    if not seller.is_business:
+        return NotImplementedError(
+            'non-business sellers are currently not supported'
+        )
+    return NotImplementedError()
+
+
+RESOLUTION_ORDER = (
+    'sale_to_country_vat_charge',
+    'sale_from_country_vat_charge',
+)
+"""Order in which VAT rules are resolved for a sale.
+
+The rules of the buyer's country for selling to the country are resolved
+first, falling back to the rules of the seller's country for selling from the
+country.
+"""
+
+
+_RESOLVERS = {}
+"""Resolvers in :data:`RESOLUTION_ORDER` by VAT rules class.
+"""
+
+
+def get_resolvers(rules_class):
+    """Get the resolvers of a VAT rules class in resolution order.
+
+    Resolvers are the ``resolve_*`` methods of the class unless the class
+    overrides the corresponding ``get_*`` method more specifically, in which
+    case the ``get_*`` method is adapted.
+
+    :param rules_class: VAT rules class.
+    :returns:
+        a :class:`tuple` of functions for every entry in
+        :data:`RESOLUTION_ORDER` taking the rules, sale date, item type, buyer
+        and seller and returning either a :class:`VatCharge` or
+        :data:`NOT_APPLICABLE`.
+    """
+
+    resolvers = _RESOLVERS.get(rules_class)
+    if resolvers is not None:
+        return resolvers
+
+    mro = rules_class.__mro__
+
+    def get_precedence(name):
+        for i, cls in enumerate(mro):
+            if name in cls.__dict__:
+                return i
+        return len(mro)
+
+    resolvers = []
+    for name in RESOLUTION_ORDER:
+        resolve_name = 'resolve_' + name
+        get_name = 'get_' + name
+
+        if get_precedence(resolve_name) <= get_precedence(get_name):
+            resolvers.append(getattr(rules_class, resolve_name))
         else:
-            return VatCharge(VatChargeAction.charge,
-                             seller.country_code,
-                             self.get_vat_rate(item_type, date))
+            resolvers.append(_adapt_get_vat_charge(get_name))
+
+    resolvers = _RESOLVERS[rules_class] = tuple(resolvers)
+    return resolvers
+
+
+def _adapt_get_vat_charge(get_name):
+    """Adapt a ``get_*`` VAT charge method to return :data:`NOT_APPLICABLE`.
+    """
+
+    def resolve(rules, date, item_type, buyer, seller):
+        try:
+            return getattr(rules, get_name)(date, item_type, buyer, seller)
+        except NotImplementedError:
+            return NOT_APPLICABLE
+
+    return resolve
+
+
+def resolve_sale_vat_charge(date,
+                            item_type,
+                            buyer,
+                            seller,
+                            buyer_vat_rules,
+                            seller_vat_rules):
+    """Resolve the VAT charge for a sale through VAT rules in resolution order.
+
+    :param date: Sale date.
+    :type date: datetime.date
+    :param item_type: Type of the item being sold.
+    :type item_type: ItemType
+    :param buyer: Buyer.
+    :type buyer: Party
+    :param seller: Seller.
+    :type seller: Party
+    :param buyer_vat_rules: Optional VAT rules of the buyer's country.
+    :param seller_vat_rules: Optional VAT rules of the seller's country.
+    :returns:
+        the :class:`VatCharge` of the first applicable rules or
+        :data:`NOT_APPLICABLE` if no rules apply.
+    """
+
+    if buyer_vat_rules:
+        resolvers = _RESOLVERS.get(type(buyer_vat_rules)) or \
+            get_resolvers(type(buyer_vat_rules))
+        vat_charge = resolvers[0](buyer_vat_rules,
+                                  date,
+                                  item_type,
+                                  buyer,
+                                  seller)
+        if vat_charge is not NOT_APPLICABLE:
+            return vat_charge
+
+    if seller_vat_rules:
+        resolvers = _RESOLVERS.get(type(seller_vat_rules)) or \
+            get_resolvers(type(seller_vat_rules))
+        return resolvers[1](seller_vat_rules, date, item_type, buyer, seller)
+
+    return NOT_APPLICABLE
+
+
+class SaleVatChargeTable(object):
+    """Memoization table of VAT charges for sales.
+
+    The VAT charge for a sale only depends on the countries of the buyer and
+    seller, whether they are businesses, the item type and the rate periods in
+    effect at the sale date, so charges are memoized under a key of exactly
+    those values. Looking up a memoized charge is a single dictionary lookup.
+
+    The table is cleared whenever the rate periods of any
+    :class:`EuVatRateRule` change. Charges determined concurrently with a
+    change are not memoized.
+    """
+
+    def __init__(self):
+        self._charges = {}
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def __len__(self):
+        return len(self._charges)
+
+    def get(self, key):
+        """Get a memoized VAT charge.
+
+        :param key: Sale key.
+        :returns: the memoized :class:`VatCharge` or ``None``.
+        """
+
+        return self._charges.get(key)
+
+    def set(self, key, vat_charge, generation):
+        """Memoize a VAT charge.
+
+        :param key: Sale key.
+        :param vat_charge: VAT charge for the sale.
+        :type vat_charge: VatCharge
+        :param generation:
+            Value of :attr:`generation` before the VAT charge was determined.
+            The VAT charge is discarded if the table has been cleared since.
+        """
+
+        with self._lock:
+            if generation == self.generation:
+                self._charges[key] = vat_charge
+
+    def clear(self):
+        """Clear all memoized VAT charges.
+        """
+
+        with self._lock:
+            self._charges = {}
+            self.generation += 1
+
+
+SALE_VAT_CHARGES = SaleVatChargeTable()
+"""Memoized VAT charges for sales.
+"""
+
+
+class _ReadOnlyDict(dict):
+    """Dictionary that cannot be modified once created.
+
+    Used for rate periods, whose rates are indexed when they are assigned, so
+    modifying them in place fails loudly rather than being silently ignored.
+    """
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('rate periods are read-only; assign new rate periods '
+                        'to EuVatRateRule.vat_rates instead')
+
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self), ))
+
+
+def _get_rate_table(rates, rate_tables):
+    """Get the shared item type to rate mapping equal to the given rates.
+
+    :param rates: Mapping from item types to rates.
+    :param rate_tables:
+        :class:`dict` of the mappings shared so far, to which the mapping is
+        added if no equal one is shared yet.
+    :rtype: dict
+    """
+
+    # Rates are compared by their string representation, so equal rates of
+    # different precision such as ``Decimal('20')`` and ``Decimal('20.0')``
+    # are kept apart.
+    key = frozenset((item_type, str(rate))
+                    for item_type, rate in rates.items())
+    table = rate_tables.get(key)
+    if table is None:
+        table = rate_tables[key] = _ReadOnlyDict(rates)
+    return table
 
 
 class EuVatRateRule(EuVatRulesMixin):
     """VAT rules for a country with a constant VAT rate in the entiry country.
+
+    The rate periods are indexed at construction as a timeline of sorted
+    ``valid_from`` boundaries, which is searched by bisection, and a direct
+    item type to rate mapping per period. Periods with identical rates share
+    the same mapping, also across the countries of a :class:`VatRulesTable`.
     """
 
-    def __init__(self, vat_rates):
-        self.vat_rates = vat_rates
+    def __init__(self, vat_rates, rate_tables=None):
+        """Initialize VAT rules for a country.
+
+        :param vat_rates: Rate periods.
+        :param rate_tables:
+            Optional :class:`dict` of item type to rate mappings shared with
+            the rules of other countries.
+        """
+
+        self._set_vat_rates(vat_rates, {} if rate_tables is None else
+                            rate_tables)
+
+    @property
+    def vat_rates(self):
+        """VAT rate periods for the country.
+
+        The rate periods are a read-only copy of the assigned ones, as the
+        rates are indexed when assigned. Assigning new rate periods rebuilds
+        the rate timeline and clears :data:`SALE_VAT_CHARGES`.
+
+        :rtype: tuple
+        """
+
+        return self._vat_rates
+
+    @vat_rates.setter
+    def vat_rates(self, vat_rates):
+        self._set_vat_rates(vat_rates, {})
+
+        # Memoized VAT charges may refer to the replaced rate periods.
+        SALE_VAT_CHARGES.clear()
+
+    def _set_vat_rates(self, vat_rates, rate_tables):
+        vat_rates = tuple(
+            _ReadOnlyDict(item,
+                          rates=_get_rate_table(item['rates'], rate_tables))
+            for item in vat_rates
+        )
+
+        # Sort the periods by the date from which they are valid. Should two
+        # periods be valid from the same date, the first one given is used.
+        boundaries = []
+        periods = []
+        for item in sorted(vat_rates, key=lambda item: item['valid_from']):
+            if boundaries and boundaries[-1] == item['valid_from']:
+                continue
+            boundaries.append(item['valid_from'])
+            periods.append(item['rates'])
+
+        self._vat_rates = vat_rates
+        self._valid_from_dates = boundaries
+        self._period_rates = periods
+
+    def get_vat_rate_period(self, date):
+        """Get the index of the rate period in effect at a given date.
+
+        :param date: Date.
+        :type date: datetime.date
+        :returns:
+            the index of the rate period in effect at the given date or ``-1``
+            if no rate period is in effect.
+        :rtype: int
+        """
+
+        return bisect.bisect_right(self._valid_from_dates, date) - 1
 
     def get_vat_rate(self, item_type, date):
-        rates = None
-        for item in self.vat_rates:
-            if date >= item['valid_from'] and \
-               not rates:
-                rates = item
-            if date >= item['valid_from'] and \
-               rates and rates['valid_from'] < item['valid_from']:
-                rates = item
-        if not rates:
+        period = self.get_vat_rate_period(date)
+        if period < 0:
             raise ValueError('`date` is invalid, date: ', date)
-        for category in rates['rates']:
-            if category == item_type:
-                return rates['rates'][category]
-        raise ValueError('`item_type` is invalid, item_type: ', item_type)
+        try:
+            return self._period_rates[period][item_type]
+        except KeyError:
+            raise ValueError('`item_type` is invalid, item_type: ', item_type)
+
+
+class VatRulesTable(object):
+    """Immutable table of VAT rules by country.
+
+    A table is built in full before it is activated through
+    :func:`set_vat_rules_table`, so a sale is always determined by the rules
+    of a single table and VAT rate dataset version.
+
+    :ivar rules:
+        Mapping from ISO 3166-1 alpha-2 country codes to the VAT rules
+        applicable in the given country. Should not be modified once the table
+        is active.
+    :type rules: dict
+    :ivar version:
+        Version of the VAT rate dataset the rules were built from or ``None``
+        if unknown.
+    :type version: str
+    """
+
+    __slots__ = ('rules', 'version')
+
+    def __init__(self, rules, version=None):
+        object.__setattr__(self, 'rules', rules)
+        object.__setattr__(self, 'version', version)
+
+    @classmethod
+    def from_vat_rates(cls, vat_rates, version=None):
+        """Build a table of EU VAT rules from VAT rates.
+
+        :param vat_rates:
+            :class:`dict` mapping country codes to a list of rate periods as
+            accepted by :class:`EuVatRateRule`.
+        :param version: Version of the VAT rate dataset.
+        :type version: str
+        :rtype: VatRulesTable
+        :raises ValueError: if VAT rates are missing for any EU country.
+        """
+
+        missing_country_codes = EU_COUNTRY_CODES.difference(vat_rates)
+        if missing_country_codes:
+            raise ValueError('VAT rates missing for countries: %s' %
+                             (', '.join(sorted(missing_country_codes)), ))
 
+        rules = {}
+        rate_tables = {}
+        for country_code in EU_COUNTRY_CODES:
+            rule = EuVatRateRule(vat_rates[country_code], rate_tables)
+            rule.country_vat_rules = rules
+            rules[country_code] = rule
+
+        return cls(rules, version)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('%s is immutable' % (self.__class__.__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError('%s is immutable' % (self.__class__.__name__))
+
+    def __repr__(self):
+        return '<pyvat.VatRulesTable: version = %r, countries = %d>' % (
+            self.version, len(self.rules),
+        )
+
+
+_VAT_RULES_TABLE_LOCK = threading.Lock()
 
 # VAT rates are based on the report from January 1st, 2017
 # http://ec.europa.eu/taxation_customs/sites/taxation/files/resources/documents/taxation/vat/how_vat_works/rates/vat_rates_en.pdf
-VAT_RULES = {}
-for country_code in EU_COUNTRY_CODES:
-    VAT_RULES[country_code] = EuVatRateRule(VAT_RATES[country_code])
-
+_VAT_RULES_TABLE = VatRulesTable.from_vat_rates(VAT_RATES, VAT_RATES_VERSION)
 
-"""VAT rules by country.
+VAT_RULES = _VAT_RULES_TABLE.rules
+"""VAT rules by country of the active :class:`VatRulesTable`.
 
 Maps an ISO 3316 alpha-2 country code to the VAT rules applicable in the given
-country.
-"""
\ No newline at end of file
+country. Rebound when another table is activated.
+"""
+
+
+def get_vat_rules_table():
+    """Get the active VAT rules table.
+
+    :rtype: VatRulesTable
+    """
+
+    return _VAT_RULES_TABLE
+
+
+def set_vat_rules_table(table):
+    """Activate a VAT rules table.
+
+    The table replaces the active table atomically. Sales already being
+    determined complete with the rules of the table they started with.
+
+    :param table: VAT rules table.
+    :type table: VatRulesTable
+    """
+
+    global _VAT_RULES_TABLE, VAT_RULES
+
+    with _VAT_RULES_TABLE_LOCK:
+        _VAT_RULES_TABLE = table
+        VAT_RULES = table.rules
+
+        # Memoized VAT charges refer to the rules of the replaced table.
+        SALE_VAT_CHARGES.clear()
+
+
+def load_vat_rules_table(path=None):
+    """Load a VAT rate dataset and activate VAT rules built from it.
+
+    The active table is left in place if the dataset cannot be loaded.
+
+    :param path:
+        Optional path of the dataset file. Default ``None`` loading the
+        dataset shipped with pyvat.
+    :returns: the activated table.
+    :rtype: VatRulesTable
+    :raises ValueError:
+        if the dataset is malformed, of an unsupported format or misses VAT
+        rates for any EU country.
+    """
+
+    version, vat_rates = load_vat_rates(path)
+    table = VatRulesTable.from_vat_rates(vat_rates, version)
+    set_vat_rules_table(table)
+    return table
@@ -1,3 +1,6 @@
+from xml.parsers import expat
+
+
 class NodeNotFoundError(Exception):
     """XML node was not found.
     """
@@ -35,3 +38,200 @@ def get_text(node):
 
     return ''.join(child.data for child in node.childNodes
                    if child.nodeType == node.TEXT_NODE)
+
+
+class CheckVatResponse(object):
+    """Fields of a VIES ``checkVat`` SOAP response.
+
+    :ivar fault: Whether the response body is a SOAP fault.
+    :ivar fault_string:
+        Text of the first ``faultstring`` element of a SOAP fault or ``None``.
+    :ivar valid:
+        Text of the ``ns2:valid`` element or ``None`` if the response does not
+        contain it.
+    :ivar name: Text of the ``ns2:name`` element or ``None`` if omitted.
+    :ivar address: Text of the ``ns2:address`` element or ``None`` if omitted.
+    :ivar error:
+        :class:`NodeNotFoundError` describing why :attr:`valid` is missing or
+        ``None``.
+    """
+
+    __slots__ = ('fault', 'fault_string', 'valid', 'name', 'address', 'error')
+
+    def __init__(self):
+        self.fault = False
+        self.fault_string = None
+        self.valid = None
+        self.name = None
+        self.address = None
+        self.error = None
+
+
+class _CheckVatResponseHandler(object):
+    """Expat handler collecting the fields of a ``checkVat`` SOAP response.
+
+    Mirrors looking up the first child element with a given tag name at every
+    level of the document, collecting only the text directly contained in the
+    fields of interest.
+    """
+
+    FIELDS = {
+        'ns2:valid': 'valid',
+        'ns2:name': 'name',
+        'ns2:address': 'address',
+    }
+
+    def __init__(self):
+        self.response = CheckVatResponse()
+        self.depth = 0
+        self.root = None
+        self.seen = set()
+        self.path = []
+        self.text = None
+        self.text_depth = None
+        self.text_field = None
+        self.in_cdata = False
+
+    def start_element(self, name, attributes):
+        self.depth += 1
+        depth = self.depth
+        path = self.path
+
+        # Text is only collected until the first child element.
+        if self.text_field == 'fault_string' and self.text_depth < depth:
+            self.end_text()
+
+        if depth == 1:
+            self.root = name
+            return
+
+        # Match the first faultstring element anywhere within the fault.
+        if name == 'faultstring' and depth > 3 and len(path) == 2 and \
+           path[1] == 'fault' and 'fault_string' not in self.seen:
+            self.seen.add('fault_string')
+            self.start_text('fault_string', depth)
+            return
+
+        # Only descend into the first matching element at every level.
+        if len(path) != depth - 2:
+            return
+
+        if depth == 2:
+            if name == 'env:Body' and 'body' not in self.seen:
+                self.seen.add('body')
+                path.append('body')
+        elif depth == 3:
+            if name == 'env:Fault' and 'fault' not in self.seen:
+                self.seen.add('fault')
+                self.response.fault = True
+                path.append('fault')
+            elif name == 'ns2:checkVatResponse' and \
+                    'response' not in self.seen:
+                self.seen.add('response')
+                path.append('response')
+        elif path[-1] == 'response' and depth == 4:
+            field = self.FIELDS.get(name)
+            if field is not None and field not in self.seen:
+                self.seen.add(field)
+                self.start_text(field, depth)
+
+    def end_element(self, name):
+        if self.text_depth == self.depth:
+            self.end_text()
+
+        if self.path and len(self.path) == self.depth - 1:
+            self.path.pop()
+
+        self.depth -= 1
+
+    def character_data(self, data):
+        if self.text is not None and not self.in_cdata and \
+           self.text_depth == self.depth:
+            self.text.append(data)
+
+    def start_cdata(self):
+        self.in_cdata = True
+
+    def end_cdata(self):
+        self.in_cdata = False
+
+    def start_text(self, field, depth):
+        self.text = []
+        self.text_depth = depth
+        self.text_field = field
+
+    def end_text(self):
+        setattr(self.response, self.text_field, u''.join(self.text))
+        self.text = None
+        self.text_depth = None
+        self.text_field = None
+
+
+def parse_check_vat_response(data):
+    """Parse a VIES ``checkVat`` SOAP response.
+
+    Parses the response in a single streaming pass without building a
+    document tree, only extracting the fields of interest. The response is
+    expected to be structured as follows, where the address and name elements
+    might be omitted, or the ``ns2:checkVatResponse`` element replaced by an
+    ``env:Fault`` element::
+
+       <env:Envelope
+           xmlns:env="http://schemas.xmlsoap.org/soap/envelope/">
+           <env:Header/>
+           <env:Body>
+               <ns2:checkVatResponse
+                   xmlns:ns2="urn:ec.europa.eu:taxud:vies:services:checkVat:types">
+                   <ns2:countryCode>DE</ns2:countryCode>
+                   <ns2:vatNumber>812383453</ns2:vatNumber>
+                   <ns2:requestDate>2022-08-12+02:00</ns2:requestDate>
+                   <ns2:valid>true</ns2:valid>
+                   <ns2:name>---</ns2:name>
+                   <ns2:address>---</ns2:address>
+               </ns2:checkVatResponse>
+           </env:Body>
+       </env:Envelope>
+
+    :param data: Raw response body.
+    :type data: bytes
+    :rtype: CheckVatResponse
+    :raises xml.parsers.expat.ExpatError: if the response is not well-formed.
+    :raises ValueError: if the root element is not a SOAP envelope.
+    :raises NodeNotFoundError: if the SOAP envelope has no body.
+    """
+
+    handler = _CheckVatResponseHandler()
+
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    parser.StartElementHandler = handler.start_element
+    parser.EndElementHandler = handler.end_element
+    parser.CharacterDataHandler = handler.character_data
+    parser.StartCdataSectionHandler = handler.start_cdata
+    parser.EndCdataSectionHandler = handler.end_cdata
+    parser.Parse(data, True)
+
+    if handler.root != 'env:Envelope':
+        raise ValueError(
+            'expected response XML root element to be a SOAP envelope'
+        )
+
+    if 'body' not in handler.seen:
+        raise NodeNotFoundError('no child element node with tag %s was found'
+                                % ('env:Body'))
+
+    response = handler.response
+    if response.fault:
+        return response
+
+    if 'response' not in handler.seen:
+        response.error = NodeNotFoundError(
+            'no child element node with tag %s was found' %
+            ('ns2:checkVatResponse')
+        )
+    elif 'valid' not in handler.seen:
+        response.error = NodeNotFoundError(
+            'no child element node with tag %s was found' % ('ns2:valid')
+        )
+
+    return response
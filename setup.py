@@ -11,10 +11,14 @@ packages = [
 
 requires = [
     'requests>=1.0.0,<3.0',
-    'pycountry',
     'enum34',
+    'futures; python_version < "3"',
 ]
 
+extras_require = {
+    'async': ['aiohttp'],
+}
+
 tests_require = [
     'nose',
     'rednose',
@@ -30,9 +34,10 @@ setup(
     author_email='support@iconfinder.com',
     url='http://www.iconfinder.com',
     packages=packages,
-    package_data={'': ['LICENSE']},
+    package_data={'': ['LICENSE'], 'pyvat': ['vat_rates.json']},
     package_dir={'pyvat': 'pyvat'},
     include_package_data=True,
+    extras_require=extras_require,
     tests_require=tests_require,
     install_requires=requires,
     license=open('LICENSE').read(),
@@ -0,0 +1,282 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pyvat import check_vat_number_async, VatNumberCheckResult
+from pyvat.aio import ASYNC_VAT_REGISTRIES, AsyncViesRegistry
+from pyvat.circuit_breaker import CircuitBreaker, CLOSED, HALF_OPEN, OPEN
+from pyvat.exceptions import ServerError
+from unittest2 import TestCase
+
+from .test_circuit_breaker import Clock
+from .test_registries import FAULT_RESPONSE, VALID_RESPONSE
+
+
+class CannedAsyncViesRegistry(AsyncViesRegistry):
+    """asyncio VIES registry answering every request with a canned response.
+    """
+
+    def __init__(self, response, **kwargs):
+        super(CannedAsyncViesRegistry, self).__init__(**kwargs)
+        self.response = response
+
+    async def _post(self, request_data):
+        if isinstance(self.response, BaseException):
+            raise self.response
+        return self.response
+
+
+class SlowAsyncViesRegistry(CannedAsyncViesRegistry):
+    """Canned asyncio VIES registry counting slow requests.
+    """
+
+    def __init__(self, response, **kwargs):
+        super(SlowAsyncViesRegistry, self).__init__(response, **kwargs)
+        self.requests = 0
+
+    async def _post(self, request_data):
+        self.requests += 1
+        await asyncio.sleep(0.01)
+        return await super(SlowAsyncViesRegistry, self)._post(request_data)
+
+
+class AsyncViesRegistryTestCase(TestCase):
+    """Test case for :class:`AsyncViesRegistry`.
+    """
+
+    def test_check_vat_number(self):
+        """AsyncViesRegistry.check_vat_number(..)
+        """
+
+        registry = CannedAsyncViesRegistry((200, 'text/xml', VALID_RESPONSE))
+        result = asyncio.run(registry.check_vat_number('33779437', 'DK'))
+        self.assertTrue(result.is_valid)
+        self.assertEqual(result.business_name, u'ICONFINDER ApS')
+
+        registry = CannedAsyncViesRegistry(asyncio.TimeoutError())
+        result = asyncio.run(registry.check_vat_number('33779437', 'DK'))
+        self.assertIsNone(result.is_valid)
+
+        registry = CannedAsyncViesRegistry((200, 'text/xml', FAULT_RESPONSE))
+        with self.assertRaises(ServerError):
+            asyncio.run(registry.check_vat_number('33779437', 'DK'))
+
+    def test_check_vat_number_circuit_breaker(self):
+        """AsyncViesRegistry(circuit_breaker=..).check_vat_number(..) raising
+        an exception or being cancelled
+        """
+
+        clock = Clock()
+        breaker = CircuitBreaker(failure_threshold=1,
+                                 reset_timeout=10,
+                                 clock=clock)
+        breaker.set_available('DK', False)
+        clock.now += 10
+
+        # Cancelled checks release the trial of a half-open circuit.
+        registry = SlowAsyncViesRegistry((200, 'text/xml', VALID_RESPONSE),
+                                         circuit_breaker=breaker,
+                                         coalesce=False)
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(asyncio.wait_for(
+                registry.check_vat_number('33779437', 'DK'),
+                0.001
+            ))
+        self.assertEqual(breaker.get_state('DK'), HALF_OPEN)
+
+        # Malformed responses count as failures.
+        registry = CannedAsyncViesRegistry(
+            (200, 'text/xml', b'<soap:Envelope'),
+            circuit_breaker=breaker
+        )
+        with self.assertRaises(Exception):
+            asyncio.run(registry.check_vat_number('33779437', 'DK'))
+        self.assertEqual(breaker.get_state('DK'), OPEN)
+
+        clock.now += 10
+        registry = CannedAsyncViesRegistry((200, 'text/xml', VALID_RESPONSE),
+                                           circuit_breaker=breaker)
+        result = asyncio.run(registry.check_vat_number('33779437', 'DK'))
+        self.assertTrue(result.is_valid)
+        self.assertEqual(breaker.get_state('DK'), CLOSED)
+
+    def test_check_vat_number_coalescing(self):
+        """AsyncViesRegistry.check_vat_number(..) coalescing concurrent checks
+        """
+
+        async def check(registry, count):
+            return await asyncio.gather(*[
+                registry.check_vat_number('33779437', 'DK')
+                for _ in range(count)
+            ], return_exceptions=True)
+
+        registry = SlowAsyncViesRegistry((200, 'text/xml', VALID_RESPONSE))
+        results = asyncio.run(check(registry, 5))
+        self.assertEqual(registry.requests, 1)
+        self.assertEqual(list(registry._in_flight.values()), [{}])
+        for result in results:
+            self.assertTrue(result.is_valid)
+        for result in results[1:]:
+            self.assertEqual(result.log_events[-1].name, 'coalesced')
+
+        registry = SlowAsyncViesRegistry((200, 'text/xml', FAULT_RESPONSE))
+        for exception in asyncio.run(check(registry, 3)):
+            self.assertIsInstance(exception, ServerError)
+        self.assertEqual(registry.requests, 1)
+
+        registry = SlowAsyncViesRegistry((200, 'text/xml', VALID_RESPONSE),
+                                         coalesce=False)
+        asyncio.run(check(registry, 3))
+        self.assertEqual(registry.requests, 3)
+
+    def test_check_vat_number_coalescing_cancelled(self):
+        """AsyncViesRegistry.check_vat_number(..) with a cancelled caller
+        """
+
+        async def check(registry):
+            first = asyncio.ensure_future(
+                registry.check_vat_number('33779437', 'DK')
+            )
+            second = asyncio.ensure_future(
+                registry.check_vat_number('33779437', 'DK')
+            )
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        registry = SlowAsyncViesRegistry((200, 'text/xml', VALID_RESPONSE))
+        result = asyncio.run(check(registry))
+        self.assertTrue(result.is_valid)
+        self.assertEqual(registry.requests, 1)
+
+    def test_check_vat_number_coalescing_closed_loop(self):
+        """AsyncViesRegistry.check_vat_number(..) after closing an event loop
+        with a check in flight
+        """
+
+        registry = SlowAsyncViesRegistry((200, 'text/xml', VALID_RESPONSE))
+
+        loop = asyncio.new_event_loop()
+        try:
+            with self.assertRaises(asyncio.TimeoutError):
+                loop.run_until_complete(asyncio.wait_for(
+                    registry.check_vat_number('33779437', 'DK'),
+                    0.001
+                ))
+        finally:
+            loop.close()
+        self.assertEqual(registry.requests, 1)
+
+        # Checks on another event loop do not join the check left in flight.
+        result = asyncio.run(registry.check_vat_number('33779437', 'DK'))
+        self.assertTrue(result.is_valid)
+        self.assertEqual(registry.requests, 2)
+        self.assertNotIn(loop, registry._in_flight)
+
+    def test_check_status(self):
+        """AsyncViesRegistry(circuit_breaker=..).check_status()
+        """
+
+        bodies = [
+            json.dumps({
+                'vow': {'available': True},
+                'countries': [
+                    {'countryCode': 'DK', 'availability': 'Available'},
+                    {'countryCode': 'EL', 'availability': 'Unavailable'},
+                ],
+            }).encode('utf-8'),
+            json.dumps({'countries': [{'countryCode': 'DK'}]}).encode('utf-8'),
+        ]
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = bodies.pop(0)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        async def check_status(registry):
+            try:
+                availability = await registry.check_status()
+                with self.assertRaises(ValueError):
+                    await registry.check_status()
+                return availability
+            finally:
+                await registry.aclose()
+
+        server = HTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            breaker = CircuitBreaker()
+            registry = AsyncViesRegistry(
+                circuit_breaker=breaker,
+                status_url='http://127.0.0.1:%d/check-status' % (
+                    server.server_address[1],
+                ),
+            )
+            availability = asyncio.run(check_status(registry))
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+        self.assertEqual(availability, {'DK': True, 'GR': False})
+        self.assertEqual(breaker.get_state('DK'), CLOSED)
+        self.assertEqual(breaker.get_state('GR'), OPEN)
+
+    def test_get_client_session(self):
+        """AsyncViesRegistry._get_client_session()
+        """
+
+        registry = AsyncViesRegistry()
+
+        async def get_sessions():
+            return (await registry._get_client_session(),
+                    await registry._get_client_session())
+
+        first, same = asyncio.run(get_sessions())
+        self.assertIs(first, same)
+        self.assertFalse(first.closed)
+
+        # Sessions of event loops that have been closed are closed once the
+        # registry is used on another event loop.
+        second, _ = asyncio.run(get_sessions())
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+
+        asyncio.run(registry.aclose())
+        self.assertTrue(second.closed)
+        self.assertEqual(registry._client_sessions, {})
+
+
+class CheckVatNumberAsyncTestCase(TestCase):
+    """Test case for :func:`check_vat_number_async`.
+    """
+
+    def test_check_vat_number_async(self):
+        """check_vat_number_async(..)
+        """
+
+        registry = ASYNC_VAT_REGISTRIES['DK']
+        ASYNC_VAT_REGISTRIES['DK'] = CannedAsyncViesRegistry(
+            (200, 'text/xml', VALID_RESPONSE)
+        )
+        try:
+            result = asyncio.run(check_vat_number_async('DK 33 77 94 37'))
+        finally:
+            ASYNC_VAT_REGISTRIES['DK'] = registry
+
+        self.assertIsInstance(result, VatNumberCheckResult)
+        self.assertTrue(result.is_valid)
+
+        result = asyncio.run(check_vat_number_async('123456'))
+        self.assertIs(result.is_valid, False)
+
+
+__all__ = ('AsyncViesRegistryTestCase', 'CheckVatNumberAsyncTestCase', )
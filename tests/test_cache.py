@@ -0,0 +1,248 @@
+import os
+import shutil
+import tempfile
+import threading
+from pyvat import VatNumberCheckResult
+from pyvat.cache import LruResultCache, SqliteResultCache
+from pyvat.exceptions import ServerError
+from unittest2 import TestCase
+
+from .test_registries import (
+    CannedViesRegistry,
+    FAULT_RESPONSE,
+    VALID_RESPONSE,
+)
+
+
+class Clock(object):
+    """Manually advanced clock.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class LruResultCacheTestCase(TestCase):
+    """Test case for :class:`LruResultCache`.
+    """
+
+    def test_get_set(self):
+        """LruResultCache.get(..) and LruResultCache.set(..)
+        """
+
+        cache = LruResultCache()
+        self.assertIsNone(cache.get('33779437', 'DK'))
+
+        cache.set('33779437', 'DK', VatNumberCheckResult(
+            True,
+            business_name=u'ICONFINDER ApS',
+            business_address=u'Bredgade 19E 2 sal'
+        ))
+        result = cache.get('33779437', 'DK')
+        self.assertTrue(result.is_valid)
+        self.assertEqual(result.business_name, u'ICONFINDER ApS')
+        self.assertEqual(result.business_address, u'Bredgade 19E 2 sal')
+        self.assertIsNone(cache.get('33779437', 'FI'))
+
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_nondeterministic(self):
+        """LruResultCache.set(..) with a nondeterministic result
+        """
+
+        cache = LruResultCache()
+        cache.set('33779437', 'DK', VatNumberCheckResult())
+        self.assertEqual(len(cache), 0)
+
+    def test_ttl(self):
+        """LruResultCache expires valid and invalid results separately
+        """
+
+        clock = Clock()
+        cache = LruResultCache(valid_ttl=100, invalid_ttl=10, clock=clock)
+        cache.set('33779437', 'DK', VatNumberCheckResult(True))
+        cache.set('12345674', 'DK', VatNumberCheckResult(False))
+
+        clock.now += 10
+        self.assertIsNone(cache.get('12345674', 'DK'))
+        self.assertTrue(cache.get('33779437', 'DK').is_valid)
+
+        clock.now += 90
+        self.assertIsNone(cache.get('33779437', 'DK'))
+        self.assertEqual(cache.expirations, 2)
+
+    def test_eviction(self):
+        """LruResultCache evicts the least recently used result
+        """
+
+        cache = LruResultCache(max_size=2)
+        cache.set('1', 'DK', VatNumberCheckResult(True))
+        cache.set('2', 'DK', VatNumberCheckResult(True))
+        cache.get('1', 'DK')
+        cache.set('3', 'DK', VatNumberCheckResult(True))
+
+        self.assertIsNotNone(cache.get('1', 'DK'))
+        self.assertIsNone(cache.get('2', 'DK'))
+        self.assertIsNotNone(cache.get('3', 'DK'))
+        self.assertEqual(cache.evictions, 1)
+
+
+class SqliteResultCacheTestCase(TestCase):
+    """Test case for :class:`SqliteResultCache`.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite3')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_set(self):
+        """SqliteResultCache.get(..) and SqliteResultCache.set(..)
+        """
+
+        cache = SqliteResultCache(self.path)
+        self.assertIsNone(cache.get('33779437', 'DK'))
+
+        cache.set('33779437', 'DK', VatNumberCheckResult(
+            True,
+            business_name=u'ICONFINDER ApS',
+            business_address=u'Bredgade 19E 2 sal\n1260 K\xf8benhavn K'
+        ))
+        cache.set('12345674', 'DK', VatNumberCheckResult(False))
+        cache.set('11111111', 'DK', VatNumberCheckResult())
+
+        # Results survive reopening the cache.
+        cache = SqliteResultCache(self.path)
+        result = cache.get('33779437', 'DK')
+        self.assertTrue(result.is_valid)
+        self.assertEqual(result.business_name, u'ICONFINDER ApS')
+        self.assertEqual(result.business_address,
+                         u'Bredgade 19E 2 sal\n1260 K\xf8benhavn K')
+        self.assertIs(cache.get('12345674', 'DK').is_valid, False)
+        self.assertIsNone(cache.get('11111111', 'DK'))
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_ttl(self):
+        """SqliteResultCache expires valid and invalid results separately
+        """
+
+        clock = Clock()
+        cache = SqliteResultCache(self.path,
+                                  valid_ttl=100,
+                                  invalid_ttl=10,
+                                  clock=clock)
+        cache.set('33779437', 'DK', VatNumberCheckResult(True))
+        cache.set('12345674', 'DK', VatNumberCheckResult(False))
+
+        clock.now += 10
+        self.assertIsNone(cache.get('12345674', 'DK'))
+        self.assertTrue(cache.get('33779437', 'DK').is_valid)
+
+        cache.purge()
+        cache.invalid_ttl = None
+        self.assertIsNone(cache.get('12345674', 'DK'))
+
+    def test_corrupt_database(self):
+        """SqliteResultCache with a corrupt database file
+        """
+
+        with open(self.path, 'wb') as f:
+            f.write(b'not a database' * 100)
+
+        # Database errors are treated as misses.
+        cache = SqliteResultCache(self.path)
+        cache.set('33779437', 'DK', VatNumberCheckResult(True))
+        self.assertIsNone(cache.get('33779437', 'DK'))
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+    def test_concurrent_readers(self):
+        """SqliteResultCache shared by concurrent readers
+        """
+
+        cache = SqliteResultCache(self.path)
+        cache.set('33779437', 'DK', VatNumberCheckResult(True))
+
+        def read():
+            for _ in range(100):
+                cache.get('33779437', 'DK')
+                cache.get('12345674', 'DK')
+
+        threads = [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual((cache.hits, cache.misses), (400, 400))
+
+    def test_concurrent_writers(self):
+        """SqliteResultCache shared by concurrent writers
+        """
+
+        def write(offset):
+            cache = SqliteResultCache(self.path)
+            for i in range(50):
+                cache.set('%08d' % (offset + i), 'DK',
+                          VatNumberCheckResult(True))
+
+        threads = [threading.Thread(target=write, args=(i * 50, ))
+                   for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        cache = SqliteResultCache(self.path)
+        for i in range(200):
+            self.assertTrue(cache.get('%08d' % (i), 'DK').is_valid)
+
+
+class ViesRegistryCacheTestCase(TestCase):
+    """Test case for :class:`ViesRegistry` with a result cache.
+    """
+
+    def test_check_vat_number(self):
+        """ViesRegistry.check_vat_number(..) with a result cache
+        """
+
+        cache = LruResultCache()
+        registry = CannedViesRegistry((200, 'text/xml', VALID_RESPONSE),
+                                      cache=cache)
+
+        self.assertTrue(registry.check_vat_number('33779437', 'DK').is_valid)
+        result = registry.check_vat_number('33779437', 'DK')
+        self.assertTrue(result.is_valid)
+        self.assertEqual(result.business_name, u'ICONFINDER ApS')
+        self.assertEqual(len(registry.requests), 1)
+
+    def test_check_vat_number_uncached(self):
+        """ViesRegistry.check_vat_number(..) does not cache failures
+        """
+
+        cache = LruResultCache()
+
+        registry = CannedViesRegistry((500, 'text/xml', VALID_RESPONSE),
+                                      cache=cache)
+        registry.check_vat_number('33779437', 'DK')
+        registry.check_vat_number('33779437', 'DK')
+        self.assertEqual(len(registry.requests), 2)
+
+        registry = CannedViesRegistry((200, 'text/xml', FAULT_RESPONSE),
+                                      cache=cache)
+        for _ in range(2):
+            with self.assertRaises(ServerError):
+                registry.check_vat_number('33779437', 'DK')
+        self.assertEqual(len(registry.requests), 2)
+        self.assertEqual(len(cache), 0)
+
+
+__all__ = (
+    'LruResultCacheTestCase',
+    'SqliteResultCacheTestCase',
+    'ViesRegistryCacheTestCase',
+)
@@ -0,0 +1,262 @@
+import json
+import threading
+from pyvat import ViesRegistry, VatNumberCheckResult
+from pyvat.circuit_breaker import CircuitBreaker, CLOSED, HALF_OPEN, OPEN
+from pyvat.exceptions import ServerError
+from pyvat.rate_limiter import RateLimiter
+from unittest2 import TestCase
+
+from .test_registries import (
+    CannedViesRegistry,
+    FAULT_RESPONSE,
+    VALID_RESPONSE,
+)
+
+
+class Clock(object):
+    """Manually advanced clock.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CircuitBreakerTestCase(TestCase):
+    """Test case for :class:`CircuitBreaker`.
+    """
+
+    def test_circuit(self):
+        """CircuitBreaker state transitions
+        """
+
+        clock = Clock()
+        breaker = CircuitBreaker(failure_threshold=3,
+                                 reset_timeout=10,
+                                 clock=clock)
+
+        # Consecutive failures open the circuit.
+        for _ in range(2):
+            self.assertTrue(breaker.allow('DK'))
+            breaker.record_failure('DK')
+        breaker.record_success('DK')
+        for _ in range(3):
+            self.assertTrue(breaker.allow('DK'))
+            breaker.record_fault('DK', 'MS_UNAVAILABLE')
+        self.assertEqual(breaker.get_state('DK'), OPEN)
+        self.assertFalse(breaker.allow('DK'))
+        self.assertEqual(breaker.rejections, 1)
+
+        # Circuits are kept by country.
+        self.assertEqual(breaker.get_state('SE'), CLOSED)
+        self.assertTrue(breaker.allow('SE'))
+
+        # A single trial is made once the circuit is half-open, and failing
+        # it opens the circuit again.
+        clock.now += 10
+        self.assertEqual(breaker.get_state('DK'), HALF_OPEN)
+        self.assertTrue(breaker.allow('DK'))
+        self.assertFalse(breaker.allow('DK'))
+        breaker.record('DK', VatNumberCheckResult())
+        self.assertEqual(breaker.get_state('DK'), OPEN)
+
+        # Released trials free the trial for another check.
+        clock.now += 10
+        self.assertTrue(breaker.allow('DK'))
+        breaker.release('DK')
+        self.assertEqual(breaker.get_state('DK'), HALF_OPEN)
+        self.assertTrue(breaker.allow('DK'))
+        self.assertFalse(breaker.allow('DK'))
+        breaker.record('DK', VatNumberCheckResult())
+
+        # Trials that are never recorded are given up on.
+        clock.now += 10
+        self.assertTrue(breaker.allow('DK'))
+        clock.now += 10
+        self.assertTrue(breaker.allow('DK'))
+
+        # A successful trial closes the circuit.
+        breaker.record('DK', VatNumberCheckResult(False))
+        self.assertEqual(breaker.get_state('DK'), CLOSED)
+        self.assertTrue(breaker.allow('DK'))
+
+    def test_record_fault(self):
+        """CircuitBreaker.record_fault(..) of client faults
+        """
+
+        breaker = CircuitBreaker(failure_threshold=1)
+        breaker.record_fault('DK', 'INVALID_INPUT')
+        self.assertEqual(breaker.get_state('DK'), CLOSED)
+        breaker.record_fault('DK', 'TIMEOUT')
+        self.assertEqual(breaker.get_state('DK'), OPEN)
+
+    def test_set_available(self):
+        """CircuitBreaker.set_available(..)
+        """
+
+        breaker = CircuitBreaker()
+        breaker.set_available('DK', False)
+        self.assertEqual(breaker.get_state('DK'), OPEN)
+        breaker.set_available('DK', True)
+        self.assertEqual(breaker.get_state('DK'), CLOSED)
+
+        breaker.set_available('SE', False)
+        breaker.reset()
+        self.assertEqual(breaker.get_state('SE'), CLOSED)
+
+
+class ViesRegistryCircuitBreakerTestCase(TestCase):
+    """Test case for :class:`ViesRegistry` with a circuit breaker.
+    """
+
+    def test_check_vat_number(self):
+        """ViesRegistry(circuit_breaker=..).check_vat_number(..)
+        """
+
+        breaker = CircuitBreaker(failure_threshold=2)
+
+        registry = CannedViesRegistry(IOError('connection reset'),
+                                      circuit_breaker=breaker)
+        for _ in range(2):
+            self.assertIsNone(
+                registry.check_vat_number('33779437', 'DK').is_valid
+            )
+        self.assertEqual(len(registry.requests), 2)
+
+        # Checks for countries with an open circuit are rejected without a
+        # request.
+        result = registry.check_vat_number('33779437', 'DK')
+        self.assertIsNone(result.is_valid)
+        self.assertEqual([event.name for event in result.log_events],
+                         ['circuit_open'])
+        self.assertEqual(len(registry.requests), 2)
+
+        # Faults count as failures.
+        registry = CannedViesRegistry((200, 'text/xml', FAULT_RESPONSE),
+                                      circuit_breaker=breaker)
+        for _ in range(2):
+            with self.assertRaises(ServerError):
+                registry.check_vat_number('13585628', 'SE')
+        self.assertEqual(breaker.get_state('SE'), OPEN)
+
+        registry = CannedViesRegistry((200, 'text/xml', VALID_RESPONSE),
+                                      circuit_breaker=breaker)
+        self.assertTrue(registry.check_vat_number('20774740', 'FI').is_valid)
+        self.assertEqual(breaker.get_state('FI'), CLOSED)
+
+    def test_check_vat_number_exception(self):
+        """ViesRegistry(circuit_breaker=..).check_vat_number(..) raising an
+        exception
+        """
+
+        clock = Clock()
+        breaker = CircuitBreaker(failure_threshold=1,
+                                 reset_timeout=10,
+                                 clock=clock)
+        breaker.set_available('DK', False)
+        clock.now += 10
+
+        # Malformed responses count as failures, reopening a half-open
+        # circuit rather than holding on to its trial.
+        registry = CannedViesRegistry((200, 'text/xml', b'<soap:Envelope'),
+                                      circuit_breaker=breaker)
+        with self.assertRaises(Exception):
+            registry.check_vat_number('33779437', 'DK')
+        self.assertEqual(breaker.get_state('DK'), OPEN)
+
+        clock.now += 10
+        registry = CannedViesRegistry((200, 'text/xml', VALID_RESPONSE),
+                                      circuit_breaker=breaker)
+        self.assertTrue(registry.check_vat_number('33779437', 'DK').is_valid)
+        self.assertEqual(breaker.get_state('DK'), CLOSED)
+
+    def test_check_vat_number_rate_limited(self):
+        """ViesRegistry(circuit_breaker=.., rate_limiter=..) rejecting checks
+        """
+
+        clock = Clock()
+        breaker = CircuitBreaker(failure_threshold=1,
+                                 reset_timeout=10,
+                                 clock=clock)
+        limiter = RateLimiter(rate=1, max_queue=0, clock=clock)
+        registry = CannedViesRegistry((200, 'text/xml', VALID_RESPONSE),
+                                      circuit_breaker=breaker,
+                                      rate_limiter=limiter)
+
+        # Checks rejected by the rate limiter neither count as failures nor
+        # hold on to the trial of a half-open circuit.
+        self.assertTrue(registry.check_vat_number('33779437', 'DK').is_valid)
+        breaker.set_available('DK', False)
+        clock.now += 10
+        self.assertEqual(breaker.get_state('DK'), HALF_OPEN)
+
+        limiter.reserve('SE')
+        result = registry.check_vat_number('33779437', 'DK')
+        self.assertEqual([event.name for event in result.log_events],
+                         ['rate_limited'])
+        self.assertEqual(breaker.get_state('DK'), HALF_OPEN)
+
+        clock.now += 1
+        self.assertTrue(registry.check_vat_number('33779437', 'DK').is_valid)
+        self.assertEqual(breaker.get_state('DK'), CLOSED)
+
+    def test_check_status(self):
+        """ViesRegistry(circuit_breaker=..).check_status()
+        """
+
+        try:
+            from http.server import BaseHTTPRequestHandler, HTTPServer
+        except ImportError:
+            from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+        bodies = [
+            json.dumps({
+                'vow': {'available': True},
+                'countries': [
+                    {'countryCode': 'DK', 'availability': 'Available'},
+                    {'countryCode': 'EL', 'availability': 'Unavailable'},
+                ],
+            }).encode('utf-8'),
+            json.dumps({'countries': [{'countryCode': 'DK'}]}).encode('utf-8'),
+        ]
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = bodies.pop(0)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = HTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            breaker = CircuitBreaker()
+            registry = ViesRegistry(
+                circuit_breaker=breaker,
+                status_url='http://127.0.0.1:%d/check-status' % (
+                    server.server_address[1],
+                ),
+            )
+            availability = registry.check_status()
+            with self.assertRaises(ValueError):
+                registry.check_status()
+            registry.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+        self.assertEqual(availability, {'DK': True, 'GR': False})
+        self.assertEqual(breaker.get_state('DK'), CLOSED)
+        self.assertEqual(breaker.get_state('GR'), OPEN)
+
+
+__all__ = ('CircuitBreakerTestCase', 'ViesRegistryCircuitBreakerTestCase', )
@@ -0,0 +1,40 @@
+import pycountry
+from pyvat import decompose_vat_number
+from pyvat.countries import EU_COUNTRY_CODES, ISO_3166_1_ALPHA_2_COUNTRY_CODES
+from unittest2 import TestCase
+
+
+class CountriesTestCase(TestCase):
+    """Test case for country data.
+    """
+
+    def test_iso_3166_1_alpha_2_country_codes(self):
+        """ISO_3166_1_ALPHA_2_COUNTRY_CODES
+        """
+
+        self.assertEqual(
+            ISO_3166_1_ALPHA_2_COUNTRY_CODES,
+            frozenset(country.alpha_2 for country in pycountry.countries)
+        )
+        self.assertEqual(EU_COUNTRY_CODES - ISO_3166_1_ALPHA_2_COUNTRY_CODES,
+                         set(['XI']))
+
+
+class DecomposeVatNumberTestCase(TestCase):
+    """Test case for :func:`decompose_vat_number`.
+    """
+
+    def test_decompose_vat_number(self):
+        """decompose_vat_number(..)
+        """
+
+        for vat_number, expected in [
+            ('DK 1358 5628', ('13585628', 'DK')),
+            ('EL094014298', ('094014298', 'GR')),
+            ('NO123456789MVA', ('123456789MVA', 'NO')),
+            ('us123456789', ('123456789', 'US')),
+            ('XX345678901', (None, None)),
+            ('12345678', (None, None)),
+            ('', (None, None)),
+        ]:
+            self.assertEqual(decompose_vat_number(vat_number), expected)
@@ -0,0 +1,78 @@
+import subprocess
+import sys
+from unittest2 import TestCase
+
+
+class ImportTestCase(TestCase):
+    """Test case for importing pyvat.
+    """
+
+    def test_deferred_imports(self):
+        """import pyvat
+        """
+
+        # Only modules the interpreter has not loaded on startup are
+        # considered, as site hooks may import some of them by themselves.
+        output = subprocess.check_output([sys.executable, '-c', '''
+import sys
+baseline = set(sys.modules)
+import pyvat
+pyvat.is_vat_number_format_valid('DK13585628')
+pyvat.get_sale_vat_charge
+print(' '.join(sorted(name for name in sys.modules if name not in baseline)))
+'''])
+        modules = output.decode('utf-8').split()
+
+        for module in ['requests', 'pycountry', 'asyncio', 'aiohttp',
+                       'concurrent.futures']:
+            self.assertNotIn(module, modules)
+
+    def test_check_vat_number_async(self):
+        """pyvat.check_vat_number_async
+        """
+
+        if sys.version_info < (3, 5):
+            self.skipTest('asyncio interface requires Python 3.5 or newer')
+
+        import pyvat
+        from pyvat.aio import check_vat_number_async
+
+        self.assertIs(pyvat.check_vat_number_async, check_vat_number_async)
+        self.assertNotIn('check_vat_number_async', pyvat.__all__)
+
+    def test_star_import(self):
+        """from pyvat import *
+        """
+
+        # Star imports neither require aiohttp nor load the asyncio
+        # interface.
+        output = subprocess.check_output([sys.executable, '-c', '''
+import sys
+sys.modules['aiohttp'] = None
+baseline = set(sys.modules)
+from pyvat import *
+check_vat_number
+print(' '.join(sorted(name for name in sys.modules if name not in baseline)))
+'''])
+        modules = output.decode('utf-8').split()
+
+        for module in ['asyncio', 'pyvat.aio']:
+            self.assertNotIn(module, modules)
+
+    def test_aio_without_aiohttp(self):
+        """import pyvat.aio without aiohttp
+        """
+
+        if sys.version_info < (3, 5):
+            self.skipTest('asyncio interface requires Python 3.5 or newer')
+
+        output = subprocess.check_output([sys.executable, '-c', '''
+import sys
+sys.modules['aiohttp'] = None
+import pyvat
+try:
+    import pyvat.aio
+except ImportError:
+    print('ImportError')
+'''])
+        self.assertEqual(output.decode('utf-8').strip(), 'ImportError')
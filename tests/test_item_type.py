@@ -0,0 +1,48 @@
+from pyvat import ItemType, ItemTypeCategory
+from pyvat.item_type import ITEM_TYPE_CATEGORIES
+from unittest2 import TestCase
+
+
+class ItemTypeTestCase(TestCase):
+    """Test case for :class:`ItemType`.
+    """
+
+    def test_categories(self):
+        """ItemType category flags
+        """
+
+        self.assertTrue(ItemType.ebook.is_electronic_service)
+        self.assertFalse(ItemType.ebook.is_broadcasting_service)
+        self.assertTrue(
+            ItemType.generic_telecommunications_service.
+            is_telecommunications_service
+        )
+        self.assertTrue(ItemType.prepaid_broadcasting_service.
+                        is_broadcasting_service)
+        self.assertTrue(ItemType.generic_physical_good.is_physical_good)
+        self.assertFalse(ItemType.generic_physical_good.is_electronic_service)
+
+        for item_type in ItemType:
+            self.assertEqual(item_type.categories,
+                             frozenset(ITEM_TYPE_CATEGORIES[item_type]))
+            for category in ItemTypeCategory:
+                self.assertEqual(getattr(item_type, 'is_%s' % category.name),
+                                 category in item_type.categories)
+
+    def test_of_category(self):
+        """ItemType.of_category(..)
+        """
+
+        self.assertEqual(
+            ItemType.of_category(ItemTypeCategory.electronic_service),
+            frozenset([ItemType.generic_electronic_service,
+                       ItemType.ebook,
+                       ItemType.enewspaper])
+        )
+        self.assertEqual(
+            ItemType.of_category(ItemTypeCategory.physical_good),
+            frozenset([ItemType.generic_physical_good])
+        )
+
+
+__all__ = ('ItemTypeTestCase', )
@@ -0,0 +1,52 @@
+import pickle
+from pyvat import Party
+from unittest2 import TestCase
+
+
+class PartyTestCase(TestCase):
+    """Test case for :class:`Party`.
+    """
+
+    def test_of(self):
+        """Party.of(..)
+        """
+
+        party = Party.of('DK', True)
+        self.assertIs(Party.of('DK', True), party)
+        self.assertIsNot(Party.of('DK', False), party)
+        self.assertIsNot(Party('DK', True), party)
+        self.assertEqual(party.country_code, 'DK')
+        self.assertIs(party.is_business, True)
+
+        # Parties of unknown country codes are not shared.
+        self.assertIsNot(Party.of('XX', True), Party.of('XX', True))
+        self.assertEqual(Party.of('XX', True), Party('XX', True))
+        self.assertNotIn((Party, 'XX', True), Party._instances)
+
+    def test_immutable(self):
+        """Party immutability
+        """
+
+        party = Party('DK', True)
+        with self.assertRaises(AttributeError):
+            party.country_code = 'SE'
+        with self.assertRaises(AttributeError):
+            del party.is_business
+        with self.assertRaises(AttributeError):
+            party.vat_number = '13585628'
+
+    def test_eq_and_hash(self):
+        """Party equality and hashing
+        """
+
+        self.assertEqual(Party('DK', True), Party.of('DK', True))
+        self.assertNotEqual(Party('DK', True), Party('DK', False))
+        self.assertNotEqual(Party('DK', True), Party('SE', True))
+        self.assertEqual(len(set([Party('DK', True),
+                                  Party.of('DK', True),
+                                  Party('SE', True)])), 2)
+        self.assertEqual(pickle.loads(pickle.dumps(Party('DK', True))),
+                         Party('DK', True))
+
+
+__all__ = ('PartyTestCase', )
@@ -0,0 +1,243 @@
+import asyncio
+from pyvat.aio import AsyncViesRegistry
+from pyvat.exceptions import ServerError
+from pyvat.rate_limiter import RateLimiter
+from unittest2 import TestCase
+
+from .test_circuit_breaker import Clock
+from .test_registries import CannedViesRegistry, VALID_RESPONSE
+
+
+MS_MAX_CONCURRENT_REQ_RESPONSE = (
+    u'<env:Envelope xmlns:env="http://schemas.xmlsoap.org/soap/envelope/">'
+    u'<env:Header/><env:Body><env:Fault><faultcode>env:Server</faultcode>'
+    u'<faultstring>MS_MAX_CONCURRENT_REQ</faultstring></env:Fault></env:Body>'
+    u'</env:Envelope>'
+).encode('utf-8')
+"""Fault response for exceeding the concurrency limit of a member state.
+"""
+
+
+class SleepingClock(Clock):
+    """Manually advanced clock advanced by sleeping.
+    """
+
+    def __init__(self):
+        super(SleepingClock, self).__init__()
+        self.sleeps = []
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class RateLimiterTestCase(TestCase):
+    """Test case for :class:`RateLimiter`.
+    """
+
+    def test_reserve(self):
+        """RateLimiter.reserve(..)
+        """
+
+        clock = Clock()
+        limiter = RateLimiter(rate=10, burst=2, max_queue=2, clock=clock)
+
+        # The burst is allowed right away, after which checks are spaced out
+        # at the rate until the queue is full.
+        self.assertEqual(limiter.reserve('DK'), 0)
+        self.assertEqual(limiter.reserve('SE'), 0)
+        self.assertAlmostEqual(limiter.reserve('DK'), 0.1)
+        self.assertAlmostEqual(limiter.reserve('FI'), 0.2)
+        self.assertIsNone(limiter.reserve('DK'))
+        self.assertEqual(limiter.rejections, 1)
+        self.assertEqual(limiter.delayed, 2)
+
+        # Checks that are done waiting leave the queue.
+        clock.now += 0.1
+        self.assertAlmostEqual(limiter.reserve('DK'), 0.2)
+
+        # Idle buckets refill up to the burst size.
+        clock.now += 10
+        self.assertEqual(limiter.reserve('DK'), 0)
+        self.assertEqual(limiter.reserve('DK'), 0)
+        self.assertAlmostEqual(limiter.reserve('DK'), 0.1)
+
+    def test_reserve_by_country(self):
+        """RateLimiter.reserve(..) by country
+        """
+
+        clock = Clock()
+        limiter = RateLimiter(rate=100,
+                              country_rate=10,
+                              country_rates={'SE': 1},
+                              clock=clock)
+
+        # Checks take the tokens of all buckets at the time they are made.
+        self.assertEqual(limiter.reserve('DK'), 0)
+        self.assertAlmostEqual(limiter.reserve('DK'), 0.1)
+        self.assertAlmostEqual(limiter.reserve('FI'), 0.11)
+        self.assertAlmostEqual(limiter.reserve('SE'), 0.12)
+        self.assertAlmostEqual(limiter.reserve('SE'), 1.12)
+        self.assertEqual(limiter.get_rate(), 100)
+        self.assertEqual(limiter.get_rate('DK'), 10)
+        self.assertEqual(limiter.get_rate('SE'), 1)
+
+        limiter = RateLimiter(clock=clock)
+        for _ in range(1000):
+            self.assertEqual(limiter.reserve('DK'), 0)
+        self.assertIsNone(limiter.get_rate())
+
+    def test_reserve_global_rate(self):
+        """RateLimiter.reserve(..) keeping to the global rate
+        """
+
+        clock = Clock()
+        limiter = RateLimiter(rate=10,
+                              country_rate=4,
+                              country_rates={'SE': 1},
+                              max_queue=1000,
+                              clock=clock)
+
+        starts = []
+        for i in range(60):
+            clock.now += 0.01
+            delay = limiter.reserve(('DK', 'SE', 'FI')[i % 3])
+            starts.append(clock.now + delay)
+
+        # However the checks for countries are spaced out, no more checks are
+        # made in total than the global rate allows.
+        starts.sort()
+        for earlier, later in zip(starts, starts[1:]):
+            self.assertGreaterEqual(later - earlier, 0.1 - 1e-9)
+
+    def test_max_wait(self):
+        """RateLimiter(max_wait=..).reserve(..)
+        """
+
+        limiter = RateLimiter(rate=10, max_wait=0.15, clock=Clock())
+        self.assertEqual(limiter.reserve('DK'), 0)
+        self.assertAlmostEqual(limiter.reserve('DK'), 0.1)
+        self.assertIsNone(limiter.reserve('DK'))
+
+    def test_acquire(self):
+        """RateLimiter.acquire(..)
+        """
+
+        clock = SleepingClock()
+        limiter = RateLimiter(rate=10,
+                              max_queue=0,
+                              clock=clock,
+                              sleep=clock.sleep)
+
+        self.assertTrue(limiter.acquire('DK'))
+        self.assertFalse(limiter.acquire('DK'))
+
+        limiter.max_queue = 1
+        self.assertTrue(limiter.acquire('DK'))
+        self.assertTrue(limiter.acquire('DK'))
+        self.assertEqual(len(clock.sleeps), 2)
+        for seconds in clock.sleeps:
+            self.assertAlmostEqual(seconds, 0.1)
+
+    def test_record_fault(self):
+        """RateLimiter.record_fault(..)
+        """
+
+        clock = Clock()
+        limiter = RateLimiter(rate=100, country_rate=10, clock=clock)
+
+        # Concurrency faults slow the buckets down once per interval.
+        limiter.record_fault('DK', 'MS_MAX_CONCURRENT_REQ')
+        limiter.record_fault('DK', 'MS_MAX_CONCURRENT_REQ')
+        self.assertEqual(limiter.get_rate('DK'), 5)
+        self.assertEqual(limiter.get_rate('SE'), 10)
+        self.assertEqual(limiter.get_rate(), 100)
+
+        limiter.record_fault('DK', 'GLOBAL_MAX_CONCURRENT_REQ')
+        self.assertEqual(limiter.get_rate(), 50)
+
+        limiter.record_fault('DK', 'MS_UNAVAILABLE')
+        clock.now += 1
+        limiter.record_fault('DK', 'INVALID_INPUT')
+        self.assertEqual(limiter.get_rate('DK'), 5)
+
+        # Rates do not drop below a fraction of the configured rate.
+        for _ in range(10):
+            clock.now += 1
+            limiter.record_fault('DK', 'MS_MAX_CONCURRENT_REQ')
+        self.assertAlmostEqual(limiter.get_rate('DK'), 1)
+
+        # Successful checks speed the buckets back up.
+        for _ in range(200):
+            limiter.record_success('DK')
+        self.assertEqual(limiter.get_rate('DK'), 10)
+        self.assertEqual(limiter.get_rate(), 100)
+
+        # Without country buckets, member state faults slow down the global
+        # bucket.
+        limiter = RateLimiter(rate=100, clock=clock)
+        limiter.record_fault('DK', 'MS_MAX_CONCURRENT_REQ')
+        self.assertEqual(limiter.get_rate(), 50)
+
+        limiter.reset()
+        self.assertEqual(limiter.get_rate(), 100)
+
+
+class ViesRegistryRateLimiterTestCase(TestCase):
+    """Test case for :class:`ViesRegistry` with a rate limiter.
+    """
+
+    def test_check_vat_number(self):
+        """ViesRegistry(rate_limiter=..).check_vat_number(..)
+        """
+
+        clock = SleepingClock()
+        limiter = RateLimiter(country_rate=10,
+                              max_queue=1,
+                              clock=clock,
+                              sleep=clock.sleep)
+
+        registry = CannedViesRegistry((200, 'text/xml', VALID_RESPONSE),
+                                      rate_limiter=limiter)
+        self.assertTrue(registry.check_vat_number('33779437', 'DK').is_valid)
+        self.assertTrue(registry.check_vat_number('33779437', 'DK').is_valid)
+        self.assertEqual(len(clock.sleeps), 1)
+
+        # Checks rejected by the rate limiter are not made.
+        limiter.max_queue = 0
+        result = registry.check_vat_number('33779437', 'DK')
+        self.assertIsNone(result.is_valid)
+        self.assertEqual([event.name for event in result.log_events],
+                         ['rate_limited'])
+        self.assertEqual(len(registry.requests), 2)
+
+        registry.response = (200, 'text/xml', MS_MAX_CONCURRENT_REQ_RESPONSE)
+        with self.assertRaises(ServerError):
+            registry.check_vat_number('13585628', 'SE')
+        self.assertEqual(limiter.get_rate('SE'), 5)
+
+    def test_check_vat_number_async(self):
+        """AsyncViesRegistry(rate_limiter=..).check_vat_number(..)
+        """
+
+        class CannedAsyncViesRegistry(AsyncViesRegistry):
+            async def _post(self, request_data):
+                return (200, 'text/xml', VALID_RESPONSE)
+
+        async def check(registry):
+            return await asyncio.gather(*[
+                registry.check_vat_number(vat_number, 'DK')
+                for vat_number in ('33779437', '12345674', '25313763')
+            ])
+
+        limiter = RateLimiter(rate=50, max_queue=1)
+        registry = CannedAsyncViesRegistry(rate_limiter=limiter)
+        results = asyncio.run(check(registry))
+
+        self.assertEqual([result.is_valid for result in results],
+                         [True, True, None])
+        self.assertEqual(results[2].log_events[0].name, 'rate_limited')
+        self.assertEqual(limiter.delayed, 1)
+
+
+__all__ = ('RateLimiterTestCase', 'ViesRegistryRateLimiterTestCase', )
@@ -0,0 +1,344 @@
+import threading
+import time
+from pyvat import ViesRegistry
+from pyvat.exceptions import ServerError
+from unittest2 import TestCase
+
+
+VALID_RESPONSE = (
+    u'<env:Envelope xmlns:env="http://schemas.xmlsoap.org/soap/envelope/">'
+    u'<env:Header/><env:Body><ns2:checkVatResponse xmlns:ns2="urn:ec.europa.'
+    u'eu:taxud:vies:services:checkVat:types"><ns2:countryCode>DK</ns2:country'
+    u'Code><ns2:vatNumber>33779437</ns2:vatNumber><ns2:requestDate>2022-08-12'
+    u'+02:00</ns2:requestDate><ns2:valid>true</ns2:valid><ns2:name>ICONFINDER'
+    u' ApS</ns2:name><ns2:address>Bredgade 19E 2 sal\n1260 K\xf8benhavn K'
+    u'</ns2:address></ns2:checkVatResponse></env:Body></env:Envelope>'
+).encode('utf-8')
+"""Response for a valid VAT number.
+"""
+
+INVALID_RESPONSE = (
+    u'<env:Envelope xmlns:env="http://schemas.xmlsoap.org/soap/envelope/">'
+    u'<env:Header/><env:Body><ns2:checkVatResponse xmlns:ns2="urn:ec.europa.'
+    u'eu:taxud:vies:services:checkVat:types"><ns2:countryCode>DK</ns2:country'
+    u'Code><ns2:vatNumber>12345674</ns2:vatNumber><ns2:requestDate>2022-08-12'
+    u'+02:00</ns2:requestDate><ns2:valid>false</ns2:valid><ns2:name>---'
+    u'</ns2:name><ns2:address>---</ns2:address></ns2:checkVatResponse>'
+    u'</env:Body></env:Envelope>'
+).encode('utf-8')
+"""Response for an invalid VAT number.
+"""
+
+FAULT_RESPONSE = (
+    u'<env:Envelope xmlns:env="http://schemas.xmlsoap.org/soap/envelope/">'
+    u'<env:Header/><env:Body><env:Fault><faultcode>env:Server</faultcode>'
+    u'<faultstring>MS_UNAVAILABLE</faultstring></env:Fault></env:Body>'
+    u'</env:Envelope>'
+).encode('utf-8')
+"""Fault response for an unavailable member state.
+"""
+
+
+class CannedViesRegistry(ViesRegistry):
+    """VIES registry answering every request with a canned response.
+    """
+
+    def __init__(self, response, **kwargs):
+        super(CannedViesRegistry, self).__init__(**kwargs)
+        self.response = response
+        self.requests = []
+
+    def _post(self, request_data):
+        self.requests.append(request_data)
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+
+class ViesRegistryConnectionPoolTestCase(TestCase):
+    """Test case for the connection pool of :class:`ViesRegistry`.
+    """
+
+    def test_sessions_share_adapter(self):
+        """ViesRegistry sessions share a connection pool between threads
+        """
+
+        registry = ViesRegistry(pool_size=4)
+        sessions = []
+
+        def get_session():
+            sessions.append(registry._get_session())
+
+        threads = [threading.Thread(target=get_session) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIsNot(sessions[0], sessions[1])
+        self.assertIs(sessions[0].adapters['http://'],
+                      sessions[1].adapters['http://'])
+        self.assertIs(registry._get_session(), registry._get_session())
+
+    def test_close(self):
+        """ViesRegistry.close()
+        """
+
+        registry = ViesRegistry()
+        session = registry._get_session()
+        registry.close()
+
+        self.assertIsNot(registry._get_session(), session)
+
+
+class ViesRegistryTestCase(TestCase):
+    """Test case for :class:`ViesRegistry`.
+    """
+
+    def test_check_vat_number(self):
+        """ViesRegistry.check_vat_number(..)
+        """
+
+        registry = CannedViesRegistry((200, 'text/xml', VALID_RESPONSE))
+        result = registry.check_vat_number('33779437', 'DK')
+        self.assertTrue(result.is_valid)
+        self.assertEqual(result.business_name, u'ICONFINDER ApS')
+        self.assertEqual(result.business_address,
+                         u'Bredgade 19E 2 sal\n1260 K\xf8benhavn K')
+
+        registry = CannedViesRegistry((200, 'text/xml', INVALID_RESPONSE))
+        result = registry.check_vat_number('12345674', 'DK')
+        self.assertIs(result.is_valid, False)
+        self.assertEqual(result.business_name, u'---')
+        self.assertEqual(result.business_address, u'---')
+
+    def test_check_vat_number_greece(self):
+        """ViesRegistry.check_vat_number(.., 'GR')
+        """
+
+        registry = CannedViesRegistry((200, 'text/xml', INVALID_RESPONSE))
+        registry.check_vat_number('094259216', 'GR')
+        self.assertIn(u'<ns0:countryCode>EL</ns0:countryCode>',
+                      registry.requests[0])
+
+    def test_check_vat_number_nondeterministic(self):
+        """ViesRegistry.check_vat_number(..) with problematic responses
+        """
+
+        for response in [(500, 'text/xml', VALID_RESPONSE),
+                         (200, 'text/html', VALID_RESPONSE),
+                         IOError('connection reset')]:
+            registry = CannedViesRegistry(response)
+            result = registry.check_vat_number('33779437', 'DK')
+            self.assertIsNone(result.is_valid)
+
+    def test_check_vat_number_fault(self):
+        """ViesRegistry.check_vat_number(..) with a SOAP fault
+        """
+
+        registry = CannedViesRegistry((200, 'text/xml', FAULT_RESPONSE))
+        with self.assertRaises(ServerError) as context:
+            registry.check_vat_number('33779437', 'DK')
+        self.assertEqual(context.exception.fault_code, 'MS_UNAVAILABLE')
+
+    def test_check_vat_number_log(self):
+        """ViesRegistry.check_vat_number(..) check log
+        """
+
+        registry = CannedViesRegistry((500, 'text/xml', VALID_RESPONSE))
+        result = registry.check_vat_number('33779437', 'DK')
+
+        self.assertEqual([event.name for event in result.log_events],
+                         ['request',
+                          'request_body',
+                          'response',
+                          'response_body',
+                          'nondeterministic'])
+        self.assertIs(result.log_events[3].args[0], VALID_RESPONSE)
+        self.assertEqual(result.log_lines[0],
+                         u'> POST %s with payload of content type text/xml, '
+                         u'charset UTF-8:' % (registry.CHECK_VAT_SERVICE_URL))
+        self.assertEqual(result.log_lines[1], registry.requests[0])
+        self.assertEqual(result.log_lines[2],
+                         u'< Response with status 500 of content type '
+                         u'text/xml:')
+        self.assertEqual(result.log_lines[3], VALID_RESPONSE.decode('utf-8'))
+
+    def test_check_vat_number_without_bodies(self):
+        """ViesRegistry(capture_bodies=False).check_vat_number(..)
+        """
+
+        registry = CannedViesRegistry((200, 'text/xml', VALID_RESPONSE),
+                                      capture_bodies=False)
+        result = registry.check_vat_number('33779437', 'DK')
+
+        self.assertTrue(result.is_valid)
+        self.assertEqual([event.name for event in result.log_events],
+                         ['request', 'response'])
+        self.assertEqual(len(result.log_lines), 2)
+
+    def test_service_url(self):
+        """ViesRegistry(service_url=..).check_vat_number(..)
+        """
+
+        try:
+            from http.server import BaseHTTPRequestHandler, HTTPServer
+        except ImportError:
+            from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+        paths = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                paths.append(self.path)
+                self.rfile.read(int(self.headers['Content-Length']))
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/xml;charset=UTF-8')
+                self.send_header('Content-Length', str(len(VALID_RESPONSE)))
+                self.end_headers()
+                self.wfile.write(VALID_RESPONSE)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = HTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            service_url = 'http://127.0.0.1:%d/checkVatService' % (
+                server.server_address[1],
+            )
+            registry = ViesRegistry(service_url=service_url)
+            result = registry.check_vat_number('33779437', 'DK')
+            registry.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+        self.assertEqual(registry.service_url, service_url)
+        self.assertEqual(ViesRegistry().service_url,
+                         ViesRegistry.CHECK_VAT_SERVICE_URL)
+        self.assertTrue(result.is_valid)
+        self.assertEqual(paths, ['/checkVatService'])
+        self.assertIn(service_url, result.log_lines[0])
+
+
+class _LookupCountingDict(dict):
+    """Dictionary counting lookups through :meth:`get`.
+    """
+
+    def __init__(self):
+        super(_LookupCountingDict, self).__init__()
+        self.lookups = 0
+
+    def get(self, key, default=None):
+        self.lookups += 1
+        return super(_LookupCountingDict, self).get(key, default)
+
+
+class GatedViesRegistry(CannedViesRegistry):
+    """Canned VIES registry holding requests until its gate is opened.
+    """
+
+    def __init__(self, response, **kwargs):
+        super(GatedViesRegistry, self).__init__(response, **kwargs)
+        self.gate = threading.Event()
+
+    def _post(self, request_data):
+        self.requests.append(request_data)
+        self.gate.wait()
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+
+class ViesRegistryCoalescingTestCase(TestCase):
+    """Test case for coalescing concurrent checks in :class:`ViesRegistry`.
+    """
+
+    def check_concurrently(self, registry, count):
+        """Check a VAT number concurrently once the first check is in flight.
+
+        :returns: a list of the results or exceptions of the checks.
+        """
+
+        registry._in_flight = lookups = _LookupCountingDict()
+        outcomes = [None] * count
+
+        def check(i):
+            try:
+                outcomes[i] = registry.check_vat_number('33779437', 'DK')
+            except Exception as e:
+                outcomes[i] = e
+
+        threads = [threading.Thread(target=check, args=(i, ))
+                   for i in range(count)]
+        threads[0].start()
+        while not registry.requests:
+            time.sleep(0.001)
+        for thread in threads[1:]:
+            thread.start()
+        while lookups.lookups < count:
+            time.sleep(0.001)
+
+        registry.gate.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(registry.requests), 1)
+        self.assertEqual(registry._in_flight, {})
+        return outcomes
+
+    def test_check_vat_number(self):
+        """ViesRegistry.check_vat_number(..) coalescing concurrent checks
+        """
+
+        registry = GatedViesRegistry((200, 'text/xml', VALID_RESPONSE))
+        results = self.check_concurrently(registry, 5)
+
+        self.assertEqual(len(set(map(id, results))), 5)
+        for result in results:
+            self.assertTrue(result.is_valid)
+            self.assertEqual(result.business_name, u'ICONFINDER ApS')
+        self.assertEqual([event.name for event in results[0].log_events],
+                         ['request', 'request_body', 'response',
+                          'response_body'])
+        for result in results[1:]:
+            self.assertEqual(result.log_events[-1].name, 'coalesced')
+
+        # Later checks make a request of their own.
+        registry.check_vat_number('33779437', 'DK')
+        self.assertEqual(len(registry.requests), 2)
+
+    def test_check_vat_number_fault(self):
+        """ViesRegistry.check_vat_number(..) coalescing a SOAP fault
+        """
+
+        registry = GatedViesRegistry((200, 'text/xml', FAULT_RESPONSE))
+        for exception in self.check_concurrently(registry, 3):
+            self.assertIsInstance(exception, ServerError)
+
+    def test_check_vat_number_without_coalescing(self):
+        """ViesRegistry(coalesce=False).check_vat_number(..)
+        """
+
+        registry = GatedViesRegistry((200, 'text/xml', VALID_RESPONSE),
+                                     coalesce=False)
+        threads = [threading.Thread(target=registry.check_vat_number,
+                                    args=('33779437', 'DK'))
+                   for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        while len(registry.requests) < 3:
+            time.sleep(0.001)
+        registry.gate.set()
+        for thread in threads:
+            thread.join()
+
+
+__all__ = (
+    'ViesRegistryCoalescingTestCase',
+    'ViesRegistryConnectionPoolTestCase',
+    'ViesRegistryTestCase',
+)
@@ -0,0 +1,43 @@
+from pyvat import VatNumberCheckResult
+from unittest2 import TestCase
+
+
+class VatNumberCheckResultTestCase(TestCase):
+    """Test case for :class:`VatNumberCheckResult`.
+    """
+
+    def test_log(self):
+        """VatNumberCheckResult.log(..)
+        """
+
+        result = VatNumberCheckResult()
+        result.log('response', u'< Response with status %d:', 200)
+        result.log('response_body', u'%s', u'\xf8'.encode('utf-8'))
+
+        self.assertEqual(result.log_events[0].name, 'response')
+        self.assertEqual(result.log_events[0].args, (200, ))
+        self.assertEqual(result.log_lines,
+                         [u'< Response with status 200:', u'\xf8'])
+
+        result.log('nondeterministic', u'< 100% nondeterministic')
+        self.assertEqual(result.log_lines[-1], u'< 100% nondeterministic')
+
+    def test_log_lines(self):
+        """VatNumberCheckResult.log_lines
+        """
+
+        result = VatNumberCheckResult(False, [u'> Line 1'])
+        self.assertEqual(result.log_lines, [u'> Line 1'])
+        self.assertEqual(len(result.log_events), 1)
+
+        result.log_lines.append(u'> Line 2')
+        result.log(None, u'> Line %d', 3)
+        self.assertEqual(result.log_lines,
+                         [u'> Line 1', u'> Line 2', u'> Line 3'])
+
+        result.log_lines = [u'> Line 4']
+        self.assertEqual(result.log_lines, [u'> Line 4'])
+        self.assertIsNone(result.log_events[0].name)
+
+
+__all__ = ('VatNumberCheckResultTestCase', )
@@ -0,0 +1,376 @@
+import asyncio
+import threading
+import time
+from pyvat import VatNumberCheckResult
+from pyvat.aio import AsyncViesRegistry
+from pyvat.circuit_breaker import CircuitBreaker, CLOSED, OPEN
+from pyvat.exceptions import ServerError
+from pyvat.retry import HedgingPolicy, RetryPolicy
+from unittest2 import TestCase
+
+from .test_registries import (
+    CannedViesRegistry,
+    FAULT_RESPONSE,
+    INVALID_RESPONSE,
+    VALID_RESPONSE,
+)
+
+
+INVALID_INPUT_RESPONSE = (
+    u'<env:Envelope xmlns:env="http://schemas.xmlsoap.org/soap/envelope/">'
+    u'<env:Header/><env:Body><env:Fault><faultcode>env:Server</faultcode>'
+    u'<faultstring>INVALID_INPUT</faultstring></env:Fault></env:Body>'
+    u'</env:Envelope>'
+).encode('utf-8')
+"""Fault response for an invalid request.
+"""
+
+
+class SequenceViesRegistry(CannedViesRegistry):
+    """VIES registry answering requests with a sequence of canned responses.
+
+    Responses that are :class:`threading.Event` instances are waited for
+    before answering with the following response.
+    """
+
+    def __init__(self, responses, **kwargs):
+        super(SequenceViesRegistry, self).__init__(None, **kwargs)
+        self.responses = list(responses)
+        self._lock = threading.Lock()
+
+    def _post(self, request_data):
+        with self._lock:
+            self.requests.append(request_data)
+            response = self.responses.pop(0)
+            if isinstance(response, threading.Event):
+                gate, response = response, self.responses.pop(0)
+            else:
+                gate = None
+
+        if gate is not None:
+            gate.wait()
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class RetryPolicyTestCase(TestCase):
+    """Test case for :class:`RetryPolicy`.
+    """
+
+    def test_get_delay(self):
+        """RetryPolicy.get_delay(..)
+        """
+
+        policy = RetryPolicy(base_delay=0.1, max_delay=0.3, jitter=lambda: 1)
+        self.assertAlmostEqual(policy.get_delay(0), 0.1)
+        self.assertAlmostEqual(policy.get_delay(1), 0.2)
+        self.assertAlmostEqual(policy.get_delay(2), 0.3)
+
+        policy.jitter = lambda: 0.5
+        self.assertAlmostEqual(policy.get_delay(1), 0.1)
+
+    def test_get_fault_delay(self):
+        """RetryPolicy.get_fault_delay(..)
+        """
+
+        policy = RetryPolicy(max_attempts=2, jitter=lambda: 1)
+        self.assertAlmostEqual(policy.get_fault_delay('MS_UNAVAILABLE', 0),
+                               0.1)
+        self.assertIsNone(policy.get_fault_delay('MS_UNAVAILABLE', 1))
+        self.assertIsNone(policy.get_fault_delay('INVALID_INPUT', 0))
+
+    def test_get_result_delay(self):
+        """RetryPolicy.get_result_delay(..)
+        """
+
+        policy = RetryPolicy(max_attempts=2,
+                             exception_types=(IOError, ),
+                             jitter=lambda: 1)
+
+        result = VatNumberCheckResult()
+        result.log('timeout', u'< Request timed out: %s', 'timeout')
+        self.assertAlmostEqual(policy.get_result_delay(result, 0), 0.1)
+        self.assertIsNone(policy.get_result_delay(result, 1))
+
+        result = VatNumberCheckResult()
+        result.log('exception', u'< Request failed: %r', IOError())
+        self.assertAlmostEqual(policy.get_result_delay(result, 0), 0.1)
+
+        result = VatNumberCheckResult()
+        result.log('exception', u'< Request failed: %r', ValueError())
+        self.assertIsNone(policy.get_result_delay(result, 0))
+
+        result = VatNumberCheckResult()
+        result.log('nondeterministic', u'< Response is nondeterministic')
+        self.assertIsNone(policy.get_result_delay(result, 0))
+
+        self.assertIsNone(policy.get_result_delay(VatNumberCheckResult(), 0))
+        self.assertIsNone(policy.get_result_delay(VatNumberCheckResult(True),
+                                                  0))
+
+
+class HedgingPolicyTestCase(TestCase):
+    """Test case for :class:`HedgingPolicy`.
+    """
+
+    def test_get_delay(self):
+        """HedgingPolicy.get_delay()
+        """
+
+        policy = HedgingPolicy(percentile=90, window=10, min_samples=5)
+        for latency in (0.5, 0.4, 0.3, 0.2):
+            policy.record(latency)
+        self.assertIsNone(policy.get_delay())
+
+        policy.record(0.1)
+        self.assertEqual(policy.get_delay(), 0.5)
+
+        for latency in (0.01, ) * 9:
+            policy.record(latency)
+        self.assertEqual(policy.get_delay(), 0.01)
+
+        # Only the most recent latencies are tracked.
+        policy.percentile = 100
+        self.assertEqual(policy.get_delay(), 0.1)
+        policy.record(0.01)
+        self.assertEqual(policy.get_delay(), 0.01)
+
+
+class ViesRegistryRetryTestCase(TestCase):
+    """Test case for :class:`ViesRegistry` with retries and hedging.
+    """
+
+    def test_check_vat_number(self):
+        """ViesRegistry(retry_policy=..).check_vat_number(..)
+        """
+
+        policy = RetryPolicy(max_attempts=3, jitter=lambda: 0)
+
+        registry = SequenceViesRegistry(
+            [IOError('connection reset'),
+             (200, 'text/xml', FAULT_RESPONSE),
+             (200, 'text/xml', VALID_RESPONSE)],
+            retry_policy=policy,
+            capture_bodies=False,
+        )
+        result = registry.check_vat_number('33779437', 'DK')
+        self.assertTrue(result.is_valid)
+        self.assertEqual([event.name for event in result.log_events],
+                         ['request', 'exception', 'retry',
+                          'fault', 'retry',
+                          'request', 'response'])
+        self.assertEqual(result.log_lines[2],
+                         u'> Retrying request in 0.000 seconds, attempt 2 '
+                         u'of 3')
+        self.assertEqual(len(registry.requests), 3)
+
+        # Checks are not retried beyond the maximum number of attempts.
+        registry = SequenceViesRegistry(
+            [(200, 'text/xml', FAULT_RESPONSE)] * 3,
+            retry_policy=policy,
+        )
+        with self.assertRaises(ServerError):
+            registry.check_vat_number('33779437', 'DK')
+        self.assertEqual(len(registry.requests), 3)
+
+        # Nor after client faults and conclusive results.
+        registry = SequenceViesRegistry(
+            [(200, 'text/xml', INVALID_INPUT_RESPONSE)],
+            retry_policy=policy,
+        )
+        with self.assertRaises(ServerError):
+            registry.check_vat_number('33779437', 'DK')
+
+        registry = SequenceViesRegistry(
+            [(200, 'text/xml', INVALID_RESPONSE)],
+            retry_policy=policy,
+        )
+        self.assertIs(registry.check_vat_number('12345674', 'DK').is_valid,
+                      False)
+
+    def test_check_vat_number_circuit_breaker(self):
+        """ViesRegistry(retry_policy=.., circuit_breaker=..)
+        """
+
+        policy = RetryPolicy(max_attempts=3, jitter=lambda: 0)
+        breaker = CircuitBreaker(failure_threshold=2)
+
+        # The circuit breaker records a single outcome per check, however
+        # many attempts it took.
+        registry = SequenceViesRegistry(
+            [(200, 'text/xml', FAULT_RESPONSE),
+             (200, 'text/xml', FAULT_RESPONSE),
+             (200, 'text/xml', VALID_RESPONSE)],
+            retry_policy=policy,
+            circuit_breaker=breaker,
+        )
+        self.assertTrue(registry.check_vat_number('33779437', 'DK').is_valid)
+        self.assertEqual(breaker.get_state('DK'), CLOSED)
+
+        registry = SequenceViesRegistry(
+            [(200, 'text/xml', FAULT_RESPONSE)] * 6,
+            retry_policy=policy,
+            circuit_breaker=breaker,
+        )
+        with self.assertRaises(ServerError):
+            registry.check_vat_number('33779437', 'DK')
+        self.assertEqual(breaker.get_state('DK'), CLOSED)
+        with self.assertRaises(ServerError):
+            registry.check_vat_number('33779437', 'DK')
+        self.assertEqual(breaker.get_state('DK'), OPEN)
+        self.assertEqual(len(registry.requests), 6)
+
+    def test_check_vat_number_hedged(self):
+        """ViesRegistry(hedging_policy=..).check_vat_number(..)
+        """
+
+        policy = HedgingPolicy(min_samples=1)
+
+        # Checks are not hedged until latencies have been tracked.
+        registry = SequenceViesRegistry([(200, 'text/xml', VALID_RESPONSE)],
+                                        hedging_policy=policy)
+        self.assertTrue(registry.check_vat_number('33779437', 'DK').is_valid)
+        self.assertIsNotNone(policy.get_delay())
+
+        for _ in range(20):
+            policy.record(0.001)
+
+        def release_after_post(registry, gate):
+            original_post = registry._post
+
+            def post(request_data):
+                try:
+                    return original_post(request_data)
+                finally:
+                    gate.set()
+
+            registry._post = post
+
+        # The second request stands in for a first request that is
+        # inconclusive.
+        gate = threading.Event()
+        registry = SequenceViesRegistry(
+            [gate, IOError('connection reset'),
+             (200, 'text/xml', VALID_RESPONSE)],
+            hedging_policy=policy,
+        )
+        release_after_post(registry, gate)
+        result = registry.check_vat_number('33779437', 'DK')
+
+        self.assertTrue(result.is_valid)
+        self.assertEqual(result.log_events[0].name, 'hedge')
+        self.assertEqual(len(registry.requests), 2)
+
+        # Conclusive results of the first request are preferred.
+        gate = threading.Event()
+        registry = SequenceViesRegistry(
+            [gate, (200, 'text/xml', VALID_RESPONSE),
+             IOError('connection reset')],
+            hedging_policy=policy,
+        )
+        release_after_post(registry, gate)
+        result = registry.check_vat_number('33779437', 'DK')
+        self.assertTrue(result.is_valid)
+        self.assertEqual(result.log_events[0].name, 'hedge')
+        self.assertEqual(len(registry.requests), 2)
+
+        # The first request is made by the calling thread.
+        policy = HedgingPolicy(min_samples=1)
+        policy.record(10)
+        registry = SequenceViesRegistry([(200, 'text/xml', VALID_RESPONSE)],
+                                        hedging_policy=policy)
+        threads = []
+        original_post = registry._post
+
+        def post(request_data):
+            threads.append(threading.current_thread())
+            return original_post(request_data)
+
+        registry._post = post
+        self.assertTrue(registry.check_vat_number('33779437', 'DK').is_valid)
+        registry.close()
+        self.assertEqual(threads, [threading.current_thread()])
+
+    def test_check_vat_number_hedged_concurrently(self):
+        """ViesRegistry(hedging_policy=..).check_vat_number(..) hedging few
+        concurrent checks
+        """
+
+        class SlowViesRegistry(CannedViesRegistry):
+            def _post(self, request_data):
+                time.sleep(0.02)
+                return self.response
+
+        policy = HedgingPolicy(percentile=95, min_samples=20)
+        registry = SlowViesRegistry((200, 'text/xml', VALID_RESPONSE),
+                                    pool_size=2,
+                                    coalesce=False,
+                                    capture_bodies=False,
+                                    hedging_policy=policy)
+        results = []
+
+        def check():
+            for _ in range(10):
+                results.append(registry.check_vat_number('33779437', 'DK'))
+
+        # Checks outnumbering the threads of the executor are not hedged
+        # for waiting on it.
+        threads = [threading.Thread(target=check) for _ in range(60)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        registry.close()
+
+        hedged = [result for result in results
+                  if result.log_events[0].name == 'hedge']
+        self.assertEqual(len(results), 600)
+        self.assertLess(len(hedged), 60)
+
+    def test_check_vat_number_async(self):
+        """AsyncViesRegistry(retry_policy=.., hedging_policy=..)
+        """
+
+        class SequenceAsyncViesRegistry(AsyncViesRegistry):
+            def __init__(self, responses, **kwargs):
+                super(SequenceAsyncViesRegistry, self).__init__(**kwargs)
+                self.responses = list(responses)
+                self.requests = 0
+
+            async def _post(self, request_data):
+                self.requests += 1
+                delay, response = self.responses.pop(0)
+                await asyncio.sleep(delay)
+                if isinstance(response, Exception):
+                    raise response
+                return response
+
+        registry = SequenceAsyncViesRegistry(
+            [(0, asyncio.TimeoutError()),
+             (0, (200, 'text/xml', VALID_RESPONSE))],
+            retry_policy=RetryPolicy(jitter=lambda: 0),
+        )
+        result = asyncio.run(registry.check_vat_number('33779437', 'DK'))
+        self.assertTrue(result.is_valid)
+        self.assertEqual(registry.requests, 2)
+        self.assertIn('retry', [event.name for event in result.log_events])
+
+        policy = HedgingPolicy(min_samples=1)
+        policy.record(0.001)
+        registry = SequenceAsyncViesRegistry(
+            [(10, (200, 'text/xml', INVALID_RESPONSE)),
+             (0, (200, 'text/xml', VALID_RESPONSE))],
+            hedging_policy=policy,
+        )
+        result = asyncio.run(registry.check_vat_number('33779437', 'DK'))
+        self.assertTrue(result.is_valid)
+        self.assertEqual(result.log_events[0].name, 'hedge')
+        self.assertEqual(registry.requests, 2)
+
+
+__all__ = (
+    'HedgingPolicyTestCase',
+    'RetryPolicyTestCase',
+    'ViesRegistryRetryTestCase',
+)
@@ -1,13 +1,29 @@
 import datetime
+import os
+import pyvat
 import pycountry
+import shutil
+import tempfile
+import threading
 from decimal import Decimal
 from pyvat import (
     get_sale_vat_charge,
+    get_sale_vat_charges,
     ItemType,
     Party,
     VatChargeAction,
 )
 from pyvat.countries import EU_COUNTRY_CODES
+from pyvat.vat_rates import dump_vat_rates, VAT_RATES, VAT_RATES_VERSION
+from pyvat.vat_rules import (
+    EuVatRateRule,
+    get_vat_rules_table,
+    load_vat_rules_table,
+    SALE_VAT_CHARGES,
+    set_vat_rules_table,
+    VAT_RULES,
+    VatRulesTable,
+)
 from unittest2 import TestCase
 
 
@@ -379,3 +395,261 @@ class GetSaleVatChargeTestCase(TestCase):
                             self.assertEqual(vat_charge.action,
                                              VatChargeAction.no_charge)
                             self.assertEqual(vat_charge.rate, Decimal(0))
+
+    def test_get_sale_vat_charges(self):
+        """get_sale_vat_charges(..)
+        """
+
+        dates = [datetime.date(2020, 6, 1),
+                 datetime.date(2020, 6, 2),
+                 datetime.date(2020, 6, 1),
+                 datetime.date(2020, 6, 1),
+                 datetime.date(2020, 6, 1)]
+        buyer_country_codes = ['DE', 'DE', 'DE', 'US', 'SE']
+        buyer_is_business = [False, False, True, False, False]
+
+        actions, country_codes, rates = get_sale_vat_charges(
+            dates,
+            ItemType.ebook,
+            buyer_country_codes,
+            buyer_is_business,
+            'SE',
+            [True, True, True, True, False]
+        )
+
+        self.assertEqual(actions, [VatChargeAction.charge,
+                                   VatChargeAction.charge,
+                                   VatChargeAction.reverse_charge,
+                                   VatChargeAction.no_charge,
+                                   None])
+        self.assertEqual(country_codes, ['DE', 'DE', 'DE', 'US', None])
+        self.assertEqual(rates, [EXPECTED_VAT_RATES['DE'][ItemType.ebook],
+                                 EXPECTED_VAT_RATES['DE'][ItemType.ebook],
+                                 Decimal(0),
+                                 Decimal(0),
+                                 None])
+
+        for i in range(4):
+            vat_charge = get_sale_vat_charge(
+                dates[i],
+                ItemType.ebook,
+                Party(buyer_country_codes[i], buyer_is_business[i]),
+                Party('SE', True)
+            )
+            self.assertEqual(
+                (actions[i], country_codes[i], rates[i]),
+                (vat_charge.action, vat_charge.country_code, vat_charge.rate)
+            )
+
+        self.assertEqual(get_sale_vat_charges([], [], [], [], [], []),
+                         ([], [], []))
+
+        with self.assertRaises(ValueError):
+            get_sale_vat_charges(dates[0], ItemType.ebook, 'DE', True, 'SE',
+                                 True)
+        with self.assertRaises(ValueError):
+            get_sale_vat_charges(dates, ItemType.ebook, ['DE'], True, 'SE',
+                                 True)
+
+    def test_get_sale_vat_charge_not_implemented(self):
+        """get_sale_vat_charge(..) for unsupported sales
+        """
+
+        for item_type, seller in [
+            (ItemType.ebook, Party(country_code='SE', is_business=False)),
+            (ItemType.generic_physical_good,
+             Party(country_code='SE', is_business=True)),
+        ]:
+            with self.assertRaises(NotImplementedError):
+                get_sale_vat_charge(datetime.date(2020, 6, 1),
+                                    item_type,
+                                    Party(country_code='DK', is_business=True),
+                                    seller)
+
+    def test_get_sale_vat_charge_memoized(self):
+        """get_sale_vat_charge(..) memoization
+        """
+
+        buyer = Party(country_code='DK', is_business=False)
+        seller = Party(country_code='SE', is_business=True)
+        date = datetime.date(2020, 6, 1)
+        later_date = datetime.date(2030, 6, 1)
+
+        vat_charge = get_sale_vat_charge(date, ItemType.ebook, buyer, seller)
+        self.assertIs(get_sale_vat_charge(date,
+                                          ItemType.ebook,
+                                          Party('DK', False),
+                                          Party('SE', True)),
+                      vat_charge)
+        self.assertEqual(vat_charge.rate, Decimal(25))
+
+        # Building rules does not invalidate memoized VAT charges of the
+        # active rules.
+        memoized = len(SALE_VAT_CHARGES)
+        VatRulesTable.from_vat_rates(VAT_RATES)
+        EuVatRateRule(VAT_RATES['DK'])
+        self.assertEqual(len(SALE_VAT_CHARGES), memoized)
+        self.assertIs(get_sale_vat_charge(date, ItemType.ebook, buyer, seller),
+                      vat_charge)
+
+        # Changing the rates of a country invalidates memoized VAT charges.
+        rules = VAT_RULES['DK']
+        vat_rates = rules.vat_rates
+        try:
+            rules.vat_rates = list(vat_rates) + [{
+                'valid_from': datetime.date(2030, 1, 1),
+                'rates': {ItemType.ebook: Decimal(30)},
+            }]
+            self.assertEqual(len(SALE_VAT_CHARGES), 0)
+            self.assertEqual(get_sale_vat_charge(later_date,
+                                                 ItemType.ebook,
+                                                 buyer,
+                                                 seller).rate,
+                             Decimal(30))
+            self.assertEqual(get_sale_vat_charge(date,
+                                                 ItemType.ebook,
+                                                 buyer,
+                                                 seller).rate,
+                             Decimal(25))
+        finally:
+            rules.vat_rates = vat_rates
+
+        self.assertEqual(get_sale_vat_charge(later_date,
+                                             ItemType.ebook,
+                                             buyer,
+                                             seller).rate,
+                         Decimal(25))
+
+        # Rate periods cannot be modified in place, as the change would not
+        # be picked up.
+        with self.assertRaises(TypeError):
+            rules.vat_rates[-1]['rates'][ItemType.ebook] = Decimal(5)
+        with self.assertRaises(TypeError):
+            rules.vat_rates[-1]['valid_from'] = datetime.date(2030, 1, 1)
+        with self.assertRaises(AttributeError):
+            rules.vat_rates.append(rules.vat_rates[-1])
+        self.assertEqual(get_sale_vat_charge(date,
+                                             ItemType.ebook,
+                                             buyer,
+                                             seller).rate,
+                         Decimal(25))
+
+        # Replacing the rules of a country does as well.
+        try:
+            VAT_RULES['DK'] = EuVatRateRule([{
+                'valid_from': datetime.date(2015, 1, 1),
+                'rates': {ItemType.ebook: Decimal(10)},
+            }])
+            self.assertEqual(get_sale_vat_charge(date,
+                                                 ItemType.ebook,
+                                                 buyer,
+                                                 seller).rate,
+                             Decimal(10))
+        finally:
+            VAT_RULES['DK'] = rules
+
+        self.assertEqual(get_sale_vat_charge(date,
+                                             ItemType.ebook,
+                                             buyer,
+                                             seller).rate,
+                         Decimal(25))
+
+    def test_get_sale_vat_charge_memoized_concurrently(self):
+        """get_sale_vat_charge(..) memoization with rates changed concurrently
+        """
+
+        buyer = Party(country_code='DK', is_business=False)
+        seller = Party(country_code='SE', is_business=True)
+        date = datetime.date(2020, 6, 1)
+
+        # VAT charges of rules changed while the VAT charge is determined
+        # are not memoized.
+        get_sale_key = pyvat._get_sale_key
+
+        def get_changed_sale_key(*args):
+            key = get_sale_key(*args)
+            SALE_VAT_CHARGES.clear()
+            return key
+
+        SALE_VAT_CHARGES.clear()
+        pyvat._get_sale_key = get_changed_sale_key
+        try:
+            get_sale_vat_charge(date, ItemType.ebook, buyer, seller)
+        finally:
+            pyvat._get_sale_key = get_sale_key
+        self.assertEqual(len(SALE_VAT_CHARGES), 0)
+
+    def test_get_sale_vat_charge_reloaded(self):
+        """get_sale_vat_charge(..) with reloaded VAT rates
+        """
+
+        buyer = Party(country_code='DK', is_business=False)
+        seller = Party(country_code='SE', is_business=True)
+        date = datetime.date(2020, 6, 1)
+
+        vat_rates = dict(VAT_RATES)
+        vat_rates['DK'] = [{
+            'valid_from': datetime.date(2015, 1, 1),
+            'rates': {ItemType.ebook: Decimal('30.0')},
+        }]
+
+        table = get_vat_rules_table()
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'vat_rates.json')
+            with open(path, 'w') as f:
+                f.write(dump_vat_rates('test', vat_rates))
+
+            reloaded_table = load_vat_rules_table(path)
+            self.assertIs(get_vat_rules_table(), reloaded_table)
+
+            vat_charge = get_sale_vat_charge(date,
+                                             ItemType.ebook,
+                                             buyer,
+                                             seller)
+            self.assertEqual(vat_charge.rate, Decimal(30))
+            self.assertEqual(vat_charge.version, 'test')
+
+            # The active table is kept if a dataset fails to load.
+            with open(path, 'w') as f:
+                f.write('{}')
+            with self.assertRaises(ValueError):
+                load_vat_rules_table(path)
+            self.assertIs(get_vat_rules_table(), reloaded_table)
+
+            # Concurrent sales are determined by a single table.
+            results = []
+            stopped = threading.Event()
+
+            def determine():
+                while not stopped.is_set():
+                    vat_charge = get_sale_vat_charge(date,
+                                                     ItemType.ebook,
+                                                     buyer,
+                                                     seller)
+                    results.append((vat_charge.version, vat_charge.rate))
+
+            threads = [threading.Thread(target=determine) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            try:
+                for _ in range(200):
+                    set_vat_rules_table(table)
+                    set_vat_rules_table(reloaded_table)
+            finally:
+                stopped.set()
+                for thread in threads:
+                    thread.join()
+
+            self.assertTrue(results)
+            self.assertEqual(set(results) - set([
+                (VAT_RATES_VERSION, Decimal(25)),
+                ('test', Decimal(30)),
+            ]), set())
+        finally:
+            set_vat_rules_table(table)
+            shutil.rmtree(directory)
+
+        vat_charge = get_sale_vat_charge(date, ItemType.ebook, buyer, seller)
+        self.assertEqual(vat_charge.rate, Decimal(25))
+        self.assertEqual(vat_charge.version, VAT_RATES_VERSION)
@@ -1,8 +1,15 @@
+import threading
+import time
 from pyvat import (
+    are_vat_number_formats_valid,
     check_vat_number,
+    check_vat_numbers,
     is_vat_number_format_valid,
+    VAT_REGISTRIES,
     VatNumberCheckResult,
 )
+from pyvat.exceptions import ServerError
+from pyvat.registries import Registry
 from unittest2 import TestCase
 
 
@@ -12,13 +19,22 @@ VAT_NUMBER_FORMAT_CASES = {
     ],
     'AT': [
         ('U68103312', True),
-        ('U12345678', True),
+        ('U13585627', True),
+        ('U12345678', False),
     ],
     'BE': [
-        ('123456789', True),
+        ('403019261', True),
+        ('0403019261', True),
+        ('123456789', False),
+    ],
+    'BG': [
+        ('175074752', True),
+        ('1750747521', True),
+        ('175074751', False),
     ],
     'CY': [
-        ('12345678X', True),
+        ('10259033P', True),
+        ('12345678X', False),
     ],
     'CZ': [
         ('12345678', True),
@@ -26,33 +42,41 @@ VAT_NUMBER_FORMAT_CASES = {
         ('1234567890', True),
     ],
     'DE': [
-        ('123456789', True),
+        ('136695976', True),
+        ('123456789', False),
     ],
     'DK': [
-        (' 12 34 56 78', True),
-        ('12345678', True),
+        (' 13 58 56 28', True),
+        ('13585628', True),
         ('00000000', True),
-        ('99999999', True),
+        ('12345678', False),
+        ('99999999', False),
         ('99999O99', False),
         ('9999999', False),
         ('999999900', False),
     ],
     'EE': [
-        ('123456789', True),
+        ('100931558', True),
+        ('123456789', False),
     ],
     'ES': [
-        ('X12345678', True),
-        ('12345678X', True),
-        ('X1234567X', True),
+        ('B58378431', True),
+        ('X2482300W', True),
+        ('54362315K', True),
+        ('X12345678', False),
+        ('12345678X', False),
+        ('X1234567X', False),
     ],
     'FI': [
-        ('12345678', True),
+        ('20774740', True),
+        ('12345678', False),
     ],
     'FR': [
-        ('12345678901', True),
+        ('40303265045', True),
         ('X2345678901', True),
         ('1X345678901', True),
         ('XX345678901', True),
+        ('12345678901', False),
         ('O2345678901', False),
         ('1O345678901', False),
         ('OO345678901', False),
@@ -61,60 +85,89 @@ VAT_NUMBER_FORMAT_CASES = {
         ('II345678901', False),
     ],
     'GB': [
-        ('123456789', True),
-        ('123456789001', True),
+        ('980780684', True),
+        ('242338087388', True),
+        ('GD100', True),
+        ('HA500', True),
+        ('123456789', False),
+        ('123456789001', False),
+        ('GD500', False),
         ('999999999999999999999999999999999999', False),
     ],
     'GR': [
-        ('012345678', True),
+        ('094259216', True),
+        ('012345678', False),
     ],
     'HR': [
-        ('12345678901', True),
+        ('33392005961', True),
+        ('12345678901', False),
         ('1234567890', False),
         ('123456789012', False),
         ('1234567890A', False),
     ],
     'HU': [
-        ('12345678', True),
+        ('12892312', True),
+        ('12345678', False),
     ],
     'IE': [
         ('1114174HH', True),
-        ('1X34567X', True),
-        ('1234567X', True),
+        ('6433435F', True),
+        ('8D79739I', True),
+        ('1X34567X', False),
+        ('1234567X', False),
     ],
     'IT': [
-        ('12345678901', True),
+        ('00743110157', True),
+        ('12345678901', False),
     ],
     'LV': [
         ('12345678901', True),
+        ('40003521600', True),
+        ('40003521601', False),
     ],
     'LT': [
-        ('123456789', True),
-        ('123456789012', True),
+        ('119511515', True),
+        ('100001919017', True),
+        ('123456789', False),
+        ('123456789012', False),
     ],
     'LU': [
-        ('12345678', True),
+        ('15027442', True),
+        ('12345678', False),
     ],
     'MT': [
-        ('12345678', True),
+        ('11679112', True),
+        ('12345678', False),
     ],
     'NL': [
         ('043133502B02', True),
+        ('000099998B57', True),
+        ('043133503B02', False),
     ],
     'PL': [
-        ('1234567890', True),
+        ('8567346215', True),
+        ('1234567890', False),
     ],
     'PT': [
         ('123456789', True),
+        ('501964843', True),
+        ('501964842', False),
+    ],
+    'RO': [
+        ('18547290', True),
+        ('18547291', False),
     ],
     'SE': [
-        ('123456789001', True),
+        ('123456789701', True),
+        ('123456789001', False),
     ],
     'SK': [
-        ('1234567890', True),
+        ('2022749619', True),
+        ('1234567890', False),
     ],
     'SI': [
-        ('12345678', True),
+        ('50223054', True),
+        ('12345678', False),
     ],
 }
 """Cases for testing VAT number format validation.
@@ -145,6 +198,7 @@ VAT_NUMBER_CHECK_CASES = {
             business_name=u'ICONFINDER ApS',
             business_address=u'Bredgade 19E 2 sal\n1260 K\xf8benhavn K'
         )),
+        ('12345678', VatNumberCheckResult(False)),
         ('99999O99', VatNumberCheckResult(False)),
         ('9999999', VatNumberCheckResult(False)),
         ('999999900', VatNumberCheckResult(False)),
@@ -224,6 +278,75 @@ class IsVatNumberFormatValidTestCase(TestCase):
                 )
 
 
+class AreVatNumberFormatsValidTestCase(TestCase):
+    """Test case for :func:`are_vat_number_formats_valid`.
+    """
+
+    def test_no_country_code(self):
+        """are_vat_number_formats_valid([..], country_codes=None)
+        """
+
+        vat_numbers = []
+        expected_results = []
+        for country_code, cases in VAT_NUMBER_FORMAT_CASES.items():
+            for vat_number, expected_result in cases:
+                vat_numbers.append('%s%s' % (country_code, vat_number))
+                expected_results.append(expected_result)
+
+        vat_numbers += ['', 'US 123', 'EL 094259216', 'dk 1358\n5628\x00']
+        expected_results += [False, None, True, False]
+
+        self.assertEqual(are_vat_number_formats_valid(vat_numbers),
+                         expected_results)
+        self.assertEqual(are_vat_number_formats_valid([]), [])
+
+    def test_country_code(self):
+        """are_vat_number_formats_valid([..], country_codes=[..])
+        """
+
+        vat_numbers = []
+        country_codes = []
+        expected_results = []
+        for country_code, cases in VAT_NUMBER_FORMAT_CASES.items():
+            for vat_number, expected_result in cases:
+                for prefix in ['', country_code]:
+                    vat_numbers.append('%s%s' % (prefix, vat_number))
+                    country_codes.append(country_code)
+                    expected_results.append(expected_result)
+
+        self.assertEqual(are_vat_number_formats_valid(vat_numbers,
+                                                      country_codes),
+                         expected_results)
+        self.assertEqual(are_vat_number_formats_valid(['13585628',
+                                                       'DK13585628',
+                                                       '12345678',
+                                                       '1234567'],
+                                                      'DK'),
+                         [True, True, False, False])
+        self.assertEqual(are_vat_number_formats_valid(['DK13585628',
+                                                       '13585628',
+                                                       'SE123',
+                                                       'US123'],
+                                                      [None, 'DK', None,
+                                                       'US']),
+                         [True, True, False, None])
+
+        with self.assertRaises(ValueError):
+            are_vat_number_formats_valid(['12345678'], ['DK', 'FI'])
+
+    def test_whitespace(self):
+        """are_vat_number_formats_valid([..]) with Unicode whitespace
+        """
+
+        vat_numbers = [u'DK\u00a01358\u20095628', u'DK\u30001358-5628',
+                       u'DK\u200b13585628']
+        self.assertEqual(are_vat_number_formats_valid(vat_numbers),
+                         [is_vat_number_format_valid(vat_number)
+                          for vat_number in vat_numbers])
+        self.assertEqual(are_vat_number_formats_valid(vat_numbers),
+                         [True, True, False])
+
+
 class CheckVatNumberTestCase(TestCase):
     """Test case for :func:`check_vat_number`.
     """
@@ -263,4 +386,117 @@ class CheckVatNumberTestCase(TestCase):
                 )
 
 
-__all__ = ('IsVatNumberFormatValidTestCase', 'CheckVatNumberTestCase', )
+class ConcurrencyRecordingRegistry(Registry):
+    """Registry recording the peak number of concurrent checks.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.workers = {}
+        self.peak_workers = {}
+        self.peak_total_workers = 0
+
+    def check_vat_number(self, vat_number, country_code):
+        with self.lock:
+            self.workers[country_code] = \
+                self.workers.get(country_code, 0) + 1
+            self.peak_workers[country_code] = max(
+                self.peak_workers.get(country_code, 0),
+                self.workers[country_code]
+            )
+            self.peak_total_workers = max(self.peak_total_workers,
+                                          sum(self.workers.values()))
+
+        time.sleep(0.01)
+
+        with self.lock:
+            self.workers[country_code] -= 1
+
+        if vat_number == '13585628':
+            raise ServerError('MS_UNAVAILABLE')
+        if vat_number == '33779437':
+            raise ValueError('malformed response')
+
+        return VatNumberCheckResult(True)
+
+
+class CheckVatNumbersTestCase(TestCase):
+    """Test case for :func:`check_vat_numbers`.
+    """
+
+    def setUp(self):
+        self.registry = ConcurrencyRecordingRegistry()
+        self.original_registries = dict(VAT_REGISTRIES)
+        for country_code in VAT_REGISTRIES:
+            VAT_REGISTRIES[country_code] = self.registry
+
+    def tearDown(self):
+        VAT_REGISTRIES.update(self.original_registries)
+
+    def test_check_vat_numbers(self):
+        """check_vat_numbers(..)
+        """
+
+        vat_numbers = []
+        for country_code, prefix in [(None, 'DK'), ('FI', '')]:
+            vat_numbers += [
+                (vat_number, country_code)
+                for vat_number in ['%s%08d' % (prefix, i) for i in range(1000)]
+                if is_vat_number_format_valid(vat_number, country_code)
+            ][:20]
+        vat_numbers += [('123456', None),
+                        ('DK12345678', None),
+                        ('DK13585628', None),
+                        ('DK33779437', None)]
+
+        results = dict(check_vat_numbers(vat_numbers,
+                                         max_workers=3,
+                                         max_workers_per_country=2))
+
+        self.assertEqual(set(results), set(vat_numbers))
+        self.assertIs(results[('123456', None)].is_valid, False)
+        self.assertIs(results[('DK12345678', None)].is_valid, False)
+        self.assertIsNone(results[('DK13585628', None)].is_valid)
+        self.assertIsNone(results[('DK33779437', None)].is_valid)
+        self.assertEqual(
+            [event.name
+             for event in results[('DK33779437', None)].log_events],
+            ['exception']
+        )
+        self.assertTrue(results[('00000000', 'FI')].is_valid)
+
+        self.assertLessEqual(self.registry.peak_total_workers, 3)
+        self.assertEqual(self.registry.peak_workers['DK'], 2)
+        self.assertLessEqual(self.registry.peak_workers['FI'], 2)
+
+    def test_check_vat_numbers_streaming(self):
+        """check_vat_numbers(..) reading VAT numbers as they are checked
+        """
+
+        vat_numbers = [
+            ('DK%08d' % (i, ), None) for i in range(10000)
+            if is_vat_number_format_valid('DK%08d' % (i, ))
+        ][:100]
+        read = []
+
+        def read_vat_numbers():
+            for vat_number_tuple in vat_numbers:
+                read.append(vat_number_tuple)
+                yield vat_number_tuple
+
+        results = check_vat_numbers(read_vat_numbers(),
+                                    max_workers=2,
+                                    max_pending=4)
+        next(results)
+        self.assertLessEqual(len(read), 5)
+
+        self.assertEqual(len(list(results)), len(vat_numbers) - 1)
+        self.assertEqual(len(read), len(vat_numbers))
+
+
+__all__ = (
+    'IsVatNumberFormatValidTestCase',
+    'AreVatNumberFormatsValidTestCase',
+    'CheckVatNumberTestCase',
+    'CheckVatNumbersTestCase',
+)
@@ -0,0 +1,92 @@
+import pickle
+from decimal import Decimal
+from pyvat import VatCharge, VatChargeAction
+from unittest2 import TestCase
+
+
+class VatChargeTestCase(TestCase):
+    """Test case for :class:`VatCharge`.
+    """
+
+    def test_of(self):
+        """VatCharge.of(..)
+        """
+
+        vat_charge = VatCharge.of(VatChargeAction.charge, 'DK', 25)
+        self.assertIs(VatCharge.of(VatChargeAction.charge, 'DK', 25),
+                      vat_charge)
+        self.assertIsNot(VatCharge.of(VatChargeAction.charge, 'SE', 25),
+                         vat_charge)
+        self.assertEqual(vat_charge.rate, Decimal(25))
+        self.assertIsInstance(vat_charge.rate, Decimal)
+
+        # Rates are keyed by their decimal value and precision.
+        self.assertIs(VatCharge.of(VatChargeAction.charge, 'DK', '25'),
+                      vat_charge)
+        self.assertIs(VatCharge.of(VatChargeAction.charge, 'DK', Decimal(25)),
+                      vat_charge)
+        self.assertIsNot(VatCharge.of(VatChargeAction.charge,
+                                      'DK',
+                                      Decimal('25.0')),
+                         vat_charge)
+
+        # The number of shared VAT charges is bounded.
+        for version in range(VatCharge.MAX_SHARED_INSTANCES + 1):
+            VatCharge.of(VatChargeAction.charge, 'DK', 25, str(version))
+        self.assertLessEqual(len(VatCharge._instances),
+                             VatCharge.MAX_SHARED_INSTANCES)
+        self.assertIsNot(VatCharge.of(VatChargeAction.charge, 'DK', 25),
+                         vat_charge)
+        self.assertEqual(VatCharge.of(VatChargeAction.charge, 'DK', 25),
+                         vat_charge)
+
+    def test_immutable(self):
+        """VatCharge immutability
+        """
+
+        vat_charge = VatCharge(VatChargeAction.charge, 'DK', 25)
+        with self.assertRaises(AttributeError):
+            vat_charge.rate = Decimal(0)
+        with self.assertRaises(AttributeError):
+            del vat_charge.action
+
+    def test_eq_and_hash(self):
+        """VatCharge equality and hashing
+        """
+
+        vat_charge = VatCharge(VatChargeAction.charge, 'DK', 25)
+        self.assertEqual(vat_charge,
+                         VatCharge(VatChargeAction.charge, 'DK', Decimal(25)))
+        self.assertNotEqual(vat_charge,
+                            VatCharge(VatChargeAction.reverse_charge, 'DK', 0))
+        self.assertEqual(
+            hash(vat_charge),
+            hash(VatCharge.of(VatChargeAction.charge, 'DK', Decimal('25.0')))
+        )
+        self.assertEqual(pickle.loads(pickle.dumps(vat_charge)), vat_charge)
+
+    def test_version(self):
+        """VatCharge.version
+        """
+
+        vat_charge = VatCharge.of(VatChargeAction.charge, 'DK', 25, '2025')
+        self.assertEqual(vat_charge.version, '2025')
+        self.assertIsNone(VatCharge.of(VatChargeAction.charge,
+                                       'DK',
+                                       25).version)
+        self.assertIs(VatCharge.of(VatChargeAction.charge, 'DK', 25, '2025'),
+                      vat_charge)
+        self.assertIsNot(VatCharge.of(VatChargeAction.charge, 'DK', 25),
+                         vat_charge)
+
+        # The version is not part of the value of a VAT charge.
+        self.assertEqual(vat_charge,
+                         VatCharge(VatChargeAction.charge, 'DK', 25, '2026'))
+        self.assertEqual(hash(vat_charge),
+                         hash(VatCharge(VatChargeAction.charge, 'DK', 25)))
+
+        self.assertEqual(pickle.loads(pickle.dumps(vat_charge)).version,
+                         '2025')
+
+
+__all__ = ('VatChargeTestCase', )
@@ -0,0 +1,119 @@
+import datetime
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from pyvat import ItemType
+from pyvat.vat_rates import (
+    dump_vat_rates,
+    load_vat_rates,
+    parse_vat_rates,
+    VAT_RATES,
+    VAT_RATES_VERSION,
+)
+from unittest2 import TestCase
+
+
+VAT_RATES_DATASET = {
+    'format': 1,
+    'version': 'test',
+    'item_types': ['generic_physical_good', 'ebook', 'hovercraft'],
+    'tables': [
+        ['19.0', None, None],
+        ['20.0', '10.0', '5.0'],
+    ],
+    'countries': {
+        'AA': [['2002-01-01', 0], ['2015-01-01', 1]],
+        'BB': [['2015-01-01', 1]],
+    },
+}
+"""VAT rate dataset with an item type unknown to pyvat.
+"""
+
+
+class VatRatesTestCase(TestCase):
+    """Test case for the VAT rate dataset.
+    """
+
+    def test_parse_vat_rates(self):
+        """parse_vat_rates(..)
+        """
+
+        version, vat_rates = parse_vat_rates(json.dumps(VAT_RATES_DATASET))
+
+        self.assertEqual(version, 'test')
+        self.assertEqual(vat_rates, {
+            'AA': [{
+                'valid_from': datetime.date(2002, 1, 1),
+                'rates': {
+                    ItemType.generic_physical_good: Decimal('19.0'),
+                },
+            }, {
+                'valid_from': datetime.date(2015, 1, 1),
+                'rates': {
+                    ItemType.generic_physical_good: Decimal('20.0'),
+                    ItemType.ebook: Decimal('10.0'),
+                },
+            }],
+            'BB': [{
+                'valid_from': datetime.date(2015, 1, 1),
+                'rates': {
+                    ItemType.generic_physical_good: Decimal('20.0'),
+                    ItemType.ebook: Decimal('10.0'),
+                },
+            }],
+        })
+
+        # Identical rate tables are shared.
+        self.assertIs(vat_rates['AA'][1]['rates'], vat_rates['BB'][0]['rates'])
+
+    def test_parse_vat_rates__invalid(self):
+        """parse_vat_rates(..) with invalid datasets
+        """
+
+        for content in [
+            '',
+            '[]',
+            json.dumps(dict(VAT_RATES_DATASET, format=2)),
+            json.dumps(dict(VAT_RATES_DATASET, tables=None)),
+            json.dumps(dict(VAT_RATES_DATASET, countries={
+                'AA': [['2002-01-01', 2]],
+            })),
+            json.dumps(dict(VAT_RATES_DATASET, countries={
+                'AA': [['2002-13-01', 0]],
+            })),
+            json.dumps(dict(VAT_RATES_DATASET, tables=[['twenty']])),
+        ]:
+            self.assertRaises(ValueError, parse_vat_rates, content)
+
+    def test_dump_vat_rates(self):
+        """dump_vat_rates(..)
+        """
+
+        content = dump_vat_rates(VAT_RATES_VERSION, VAT_RATES)
+        self.assertEqual(parse_vat_rates(content),
+                         (VAT_RATES_VERSION, VAT_RATES))
+
+        data = json.loads(content)
+        self.assertLess(len(data['tables']),
+                        sum(len(periods) for periods in VAT_RATES.values()))
+
+    def test_load_vat_rates(self):
+        """load_vat_rates(..)
+        """
+
+        version, vat_rates = load_vat_rates()
+        self.assertEqual(version, VAT_RATES_VERSION)
+        self.assertEqual(vat_rates, VAT_RATES)
+
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'vat_rates.json')
+            with open(path, 'w') as f:
+                json.dump(VAT_RATES_DATASET, f)
+
+            self.assertEqual(load_vat_rates(path),
+                             parse_vat_rates(json.dumps(VAT_RATES_DATASET)))
+        finally:
+            shutil.rmtree(directory)
@@ -0,0 +1,267 @@
+import datetime
+from decimal import Decimal
+from pyvat import ItemType, Party, VatCharge, VatChargeAction
+from pyvat.countries import EU_COUNTRY_CODES
+from pyvat.vat_rates import VAT_RATES_VERSION
+from pyvat.vat_rules import (
+    EuVatRateRule,
+    get_vat_rules_table,
+    NOT_APPLICABLE,
+    resolve_sale_vat_charge,
+    VatRules,
+    VatRulesTable,
+)
+from unittest2 import TestCase
+
+
+VAT_RATES = [{
+    'valid_from': datetime.date(2015, 1, 1),
+    'rates': {
+        ItemType.generic_physical_good: Decimal('20.0'),
+        ItemType.ebook: Decimal('10.0'),
+    }
+}, {
+    'valid_from': datetime.date(2002, 1, 1),
+    'rates': {
+        ItemType.generic_physical_good: Decimal('19.0'),
+    }
+}, {
+    'valid_from': datetime.date(2015, 1, 1),
+    'rates': {
+        ItemType.generic_physical_good: Decimal('99.0'),
+    }
+}]
+"""Unordered rate periods with a duplicate ``valid_from`` date.
+"""
+
+
+class EuVatRateRuleTestCase(TestCase):
+    """Test case for :class:`EuVatRateRule`.
+    """
+
+    def test_get_vat_rate(self):
+        """EuVatRateRule.get_vat_rate(..)
+        """
+
+        rule = EuVatRateRule(VAT_RATES)
+
+        self.assertEqual(
+            rule.get_vat_rate(ItemType.generic_physical_good,
+                              datetime.date(2002, 1, 1)),
+            Decimal('19.0')
+        )
+        self.assertEqual(
+            rule.get_vat_rate(ItemType.generic_physical_good,
+                              datetime.date(2014, 12, 31)),
+            Decimal('19.0')
+        )
+        self.assertEqual(
+            rule.get_vat_rate(ItemType.generic_physical_good,
+                              datetime.date(2015, 1, 1)),
+            Decimal('20.0')
+        )
+        self.assertEqual(
+            rule.get_vat_rate(ItemType.ebook, datetime.date(2030, 1, 1)),
+            Decimal('10.0')
+        )
+
+        with self.assertRaises(ValueError):
+            rule.get_vat_rate(ItemType.generic_physical_good,
+                              datetime.date(2001, 12, 31))
+
+        with self.assertRaises(ValueError):
+            rule.get_vat_rate(ItemType.ebook, datetime.date(2014, 1, 1))
+
+    def test_get_vat_rate_period(self):
+        """EuVatRateRule.get_vat_rate_period(..)
+        """
+
+        rule = EuVatRateRule(VAT_RATES)
+
+        self.assertEqual(rule.get_vat_rate_period(datetime.date(2001, 1, 1)),
+                         -1)
+        self.assertEqual(rule.get_vat_rate_period(datetime.date(2002, 1, 1)),
+                         0)
+        self.assertEqual(rule.get_vat_rate_period(datetime.date(2015, 1, 1)),
+                         1)
+
+    def test_resolve_sale_vat_charge(self):
+        """EuVatRateRule.resolve_sale_*_vat_charge(..)
+        """
+
+        rule = EuVatRateRule(VAT_RATES)
+        date = datetime.date(2014, 1, 1)
+        buyer = Party('DK', False)
+
+        # Non-business sellers are not supported.
+        seller = Party('DK', False)
+        self.assertIs(rule.resolve_sale_to_country_vat_charge(
+            date, ItemType.generic_physical_good, buyer, seller
+        ), NOT_APPLICABLE)
+        self.assertIs(rule.resolve_sale_from_country_vat_charge(
+            date, ItemType.generic_physical_good, buyer, seller
+        ), NOT_APPLICABLE)
+        with self.assertRaises(NotImplementedError) as context:
+            rule.get_sale_to_country_vat_charge(
+                date, ItemType.generic_physical_good, buyer, seller
+            )
+        self.assertIn('non-business', str(context.exception))
+
+        # Consumers in other EU countries fall back to the seller's rules
+        # prior to January 1st, 2015.
+        seller = Party('SE', True)
+        self.assertIs(rule.resolve_sale_to_country_vat_charge(
+            date, ItemType.generic_physical_good, buyer, seller
+        ), NOT_APPLICABLE)
+        with self.assertRaises(NotImplementedError):
+            rule.get_sale_to_country_vat_charge(
+                date, ItemType.generic_physical_good, buyer, seller
+            )
+
+        vat_charge = rule.resolve_sale_from_country_vat_charge(
+            date, ItemType.generic_physical_good, buyer, seller
+        )
+        self.assertEqual(vat_charge.action, VatChargeAction.charge)
+        self.assertEqual(vat_charge.country_code, 'SE')
+        self.assertEqual(vat_charge.rate, Decimal('19.0'))
+
+
+class GetVatChargeRules(VatRules):
+    """VAT rules only implementing the ``get_*`` methods.
+    """
+
+    def get_sale_from_country_vat_charge(self,
+                                         date,
+                                         item_type,
+                                         buyer,
+                                         seller):
+        return VatCharge(VatChargeAction.no_charge, buyer.country_code, 0)
+
+
+class GetVatChargeEuVatRateRule(EuVatRateRule):
+    """EU VAT rules overriding a ``get_*`` method.
+    """
+
+    def get_sale_to_country_vat_charge(self,
+                                       date,
+                                       item_type,
+                                       buyer,
+                                       seller):
+        raise NotImplementedError()
+
+
+class ResolveSaleVatChargeTestCase(TestCase):
+    """Test case for :func:`resolve_sale_vat_charge`.
+    """
+
+    def test_resolve_sale_vat_charge(self):
+        """resolve_sale_vat_charge(..)
+        """
+
+        date = datetime.date(2015, 1, 1)
+        item_type = ItemType.generic_physical_good
+        buyer = Party('DK', True)
+        seller = Party('SE', True)
+
+        # The buyer's rules are resolved first.
+        vat_charge = resolve_sale_vat_charge(date,
+                                             item_type,
+                                             buyer,
+                                             seller,
+                                             EuVatRateRule(VAT_RATES),
+                                             GetVatChargeRules())
+        self.assertEqual(vat_charge.action, VatChargeAction.reverse_charge)
+
+        # Rules raising NotImplementedError fall back to the seller's rules.
+        for buyer_vat_rules in [None,
+                                VatRules(),
+                                GetVatChargeEuVatRateRule(VAT_RATES)]:
+            vat_charge = resolve_sale_vat_charge(date,
+                                                 item_type,
+                                                 buyer,
+                                                 seller,
+                                                 buyer_vat_rules,
+                                                 GetVatChargeRules())
+            self.assertEqual(vat_charge.action, VatChargeAction.no_charge)
+
+        self.assertIs(resolve_sale_vat_charge(date,
+                                              item_type,
+                                              buyer,
+                                              seller,
+                                              VatRules(),
+                                              None),
+                      NOT_APPLICABLE)
+
+
+class VatRulesTableTestCase(TestCase):
+    """Test case for :class:`VatRulesTable`.
+    """
+
+    def test_from_vat_rates(self):
+        """VatRulesTable.from_vat_rates(..)
+        """
+
+        vat_rates = dict((country_code, VAT_RATES)
+                         for country_code in EU_COUNTRY_CODES)
+        table = VatRulesTable.from_vat_rates(vat_rates, 'test')
+
+        self.assertEqual(table.version, 'test')
+        self.assertEqual(set(table.rules), EU_COUNTRY_CODES)
+
+        # Rules look up the rules of other countries in their own table.
+        vat_charge = table.rules['SE'].resolve_sale_from_country_vat_charge(
+            datetime.date(2015, 1, 1),
+            ItemType.ebook,
+            Party('DK', False),
+            Party('SE', True)
+        )
+        self.assertEqual(vat_charge.rate, Decimal('10.0'))
+
+        # Identical rates are shared between the countries of a table, but
+        # not with other tables.
+        self.assertIs(table.rules['DK'].vat_rates[0]['rates'],
+                      table.rules['SE'].vat_rates[0]['rates'])
+        other_table = VatRulesTable.from_vat_rates(vat_rates)
+        self.assertIsNot(other_table.rules['DK'].vat_rates[0]['rates'],
+                         table.rules['DK'].vat_rates[0]['rates'])
+
+        # Equal rates of different precision are not.
+        vat_rates['SE'] = [{
+            'valid_from': datetime.date(2015, 1, 1),
+            'rates': {
+                ItemType.generic_physical_good: Decimal('20'),
+                ItemType.ebook: Decimal('10'),
+            },
+        }]
+        other_table = VatRulesTable.from_vat_rates(vat_rates)
+        self.assertEqual(str(other_table.rules['SE'].get_vat_rate(
+            ItemType.ebook,
+            datetime.date(2015, 1, 1)
+        )), '10')
+        self.assertEqual(str(other_table.rules['DK'].get_vat_rate(
+            ItemType.ebook,
+            datetime.date(2015, 1, 1)
+        )), '10.0')
+
+        with self.assertRaises(AttributeError):
+            table.version = None
+
+        del vat_rates['DK']
+        with self.assertRaises(ValueError) as context:
+            VatRulesTable.from_vat_rates(vat_rates)
+        self.assertIn('DK', str(context.exception))
+
+    def test_get_vat_rules_table(self):
+        """get_vat_rules_table()
+        """
+
+        table = get_vat_rules_table()
+        self.assertEqual(table.version, VAT_RATES_VERSION)
+        self.assertEqual(set(table.rules), EU_COUNTRY_CODES)
+
+
+__all__ = (
+    'EuVatRateRuleTestCase',
+    'ResolveSaleVatChargeTestCase',
+    'VatRulesTableTestCase',
+)
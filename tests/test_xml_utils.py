@@ -0,0 +1,76 @@
+from pyvat.xml_utils import NodeNotFoundError, parse_check_vat_response
+from unittest2 import TestCase
+from xml.parsers.expat import ExpatError
+
+from .test_registries import FAULT_RESPONSE, VALID_RESPONSE
+
+
+def envelope(body):
+    return (u'<env:Envelope xmlns:env="http://schemas.xmlsoap.org/soap/'
+            u'envelope/"><env:Header/>%s</env:Envelope>' % (body)) \
+        .encode('utf-8')
+
+
+class ParseCheckVatResponseTestCase(TestCase):
+    """Test case for :func:`parse_check_vat_response`.
+    """
+
+    def test_valid(self):
+        """parse_check_vat_response(..) with a valid VAT number
+        """
+
+        response = parse_check_vat_response(VALID_RESPONSE)
+        self.assertFalse(response.fault)
+        self.assertIsNone(response.error)
+        self.assertEqual(response.valid, u'true')
+        self.assertEqual(response.name, u'ICONFINDER ApS')
+        self.assertEqual(response.address,
+                         u'Bredgade 19E 2 sal\n1260 K\xf8benhavn K')
+
+    def test_fault(self):
+        """parse_check_vat_response(..) with a SOAP fault
+        """
+
+        response = parse_check_vat_response(FAULT_RESPONSE)
+        self.assertTrue(response.fault)
+        self.assertEqual(response.fault_string, u'MS_UNAVAILABLE')
+
+    def test_first_child_elements(self):
+        """parse_check_vat_response(..) only uses first child elements
+        """
+
+        response = parse_check_vat_response(envelope(
+            u'<env:Body><ns2:checkVatResponse xmlns:ns2="urn:x">'
+            u'<ns2:valid>fal<ns2:x>ignored</ns2:x>se</ns2:valid>'
+            u'<ns2:valid>true</ns2:valid>'
+            u'<ns2:name><![CDATA[ignored]]>A &amp; B</ns2:name>'
+            u'</ns2:checkVatResponse></env:Body><env:Body/>'
+        ))
+        self.assertEqual(response.valid, u'false')
+        self.assertEqual(response.name, u'A & B')
+        self.assertIsNone(response.address)
+
+    def test_invalid_body(self):
+        """parse_check_vat_response(..) with an invalid body
+        """
+
+        response = parse_check_vat_response(envelope(u'<env:Body/>'))
+        self.assertIsInstance(response.error, NodeNotFoundError)
+
+        response = parse_check_vat_response(envelope(
+            u'<env:Body><ns2:checkVatResponse xmlns:ns2="urn:x">'
+            u'<ns2:name>A</ns2:name></ns2:checkVatResponse></env:Body>'
+        ))
+        self.assertIsInstance(response.error, NodeNotFoundError)
+
+        with self.assertRaises(NodeNotFoundError):
+            parse_check_vat_response(envelope(u''))
+
+        with self.assertRaises(ValueError):
+            parse_check_vat_response(b'<Envelope/>')
+
+        with self.assertRaises(ExpatError):
+            parse_check_vat_response(b'<env:Envelope')
+
+
+__all__ = ('ParseCheckVatResponseTestCase', )